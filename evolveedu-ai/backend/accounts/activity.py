@@ -0,0 +1,102 @@
+"""
+Learning Activity
+Records note, quiz, roadmap and resource actions in LearningActivity, one row per
+user, day and activity type. Streaks and heatmaps are read back with a single date
+range query, and UserProgress.streak_days is advanced as activity comes in.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import LearningActivity, UserProgress
+
+DEFAULT_WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 366
+
+
+def record_activity(user, activity_type: str, when=None, count: int = 1, first_at=None):
+    """
+    Count an action towards the user's activity for that (local) day. Batched callers
+    pass how many actions they fold in and when the first of them happened.
+    """
+    when = when or timezone.now()
+    day = timezone.localdate(when)
+    with transaction.atomic():
+        updated = (LearningActivity.objects
+                   .filter(user=user, date=day, activity_type=activity_type)
+                   .update(count=F('count') + count, last_at=when))
+        if not updated:
+            try:
+                with transaction.atomic():
+                    LearningActivity.objects.create(user=user, date=day, activity_type=activity_type,
+                                                    count=count, first_at=first_at or when, last_at=when)
+            except IntegrityError:
+                # Created concurrently for the same day
+                LearningActivity.objects.filter(user=user, date=day, activity_type=activity_type) \
+                    .update(count=F('count') + count, last_at=when)
+        advance_streak(user, day)
+
+
+def advance_streak(user, day: date):
+    """Extend, restart or keep the stored streak for activity on `day`"""
+    progress, _ = UserProgress.objects.select_for_update().get_or_create(user=user)
+    last = progress.last_active_date
+    if last is not None and last >= day:
+        return
+    progress.streak_days = progress.streak_days + 1 if last == day - timedelta(days=1) else 1
+    progress.last_active_date = day
+    progress.save(update_fields=['streak_days', 'last_active_date', 'last_activity'])
+
+
+def current_streak(progress: UserProgress, today: date = None) -> int:
+    """Stored streak, or 0 once a whole day has passed without activity"""
+    today = today or timezone.localdate()
+    if progress.last_active_date is None or progress.last_active_date < today - timedelta(days=1):
+        return 0
+    return progress.streak_days
+
+
+def streak_from_dates(active_dates: Iterable[date], today: date) -> Dict:
+    """Current streak (alive through yesterday until today is over) and longest streak"""
+    active = set(active_dates)
+    current, day = 0, today if today in active else today - timedelta(days=1)
+    while day in active:
+        current += 1
+        day -= timedelta(days=1)
+
+    longest, run, previous = 0, 0, None
+    for day in sorted(active):
+        run = run + 1 if previous == day - timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    return {'current': current, 'longest': longest}
+
+
+def activity_summary(user, days: int = DEFAULT_WINDOW_DAYS, today: date = None) -> Dict:
+    """Streaks, per-day heatmap and per-type totals over the last `days` days"""
+    today = today or timezone.localdate()
+    days = min(MAX_WINDOW_DAYS, max(1, days))
+    start = today - timedelta(days=days - 1)
+
+    per_day, per_type = {}, {}
+    rows = LearningActivity.objects.filter(user=user, date__range=(start, today)).values_list(
+        'date', 'activity_type', 'count'
+    )
+    for day, activity_type, count in rows:
+        per_day[day] = per_day.get(day, 0) + count
+        per_type[activity_type] = per_type.get(activity_type, 0) + count
+
+    streaks = streak_from_dates(per_day, today)
+    return {
+        'start_date': start,
+        'end_date': today,
+        'streak_days': streaks['current'],
+        'longest_streak_days': streaks['longest'],
+        'active_days': len(per_day),
+        'by_type': per_type,
+        'heatmap': [{'date': day, 'count': per_day[day]} for day in sorted(per_day)],
+    }
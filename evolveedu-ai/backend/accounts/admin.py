@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, UserProgress
+from .models import LearningActivity, User, UserProgress
 
 
 @admin.register(User)
@@ -25,3 +25,10 @@ class UserProgressAdmin(admin.ModelAdmin):
     list_filter = ('user',)
     search_fields = ('user__email', 'user__username')
     readonly_fields = ()
+
+
+@admin.register(LearningActivity)
+class LearningActivityAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'activity_type', 'count')
+    list_filter = ('activity_type', 'date')
+    search_fields = ('user__email', 'user__username')
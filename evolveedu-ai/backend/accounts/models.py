@@ -60,7 +60,33 @@ class UserProgress(models.Model):
     current_roadmaps = models.JSONField(default=list)
     achievements = models.JSONField(default=list)
     streak_days = models.IntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)  # Day the streak was last extended
     last_activity = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.user.email} - Progress"
\ No newline at end of file
+        return f"{self.user.email} - Progress"
+
+
+class LearningActivity(models.Model):
+    """One row per user, day and kind of activity; repeated actions bump the count"""
+    ACTIVITY_TYPES = [
+        ('note', 'Note'),
+        ('quiz', 'Quiz'),
+        ('roadmap', 'Roadmap'),
+        ('resource', 'Learning Resource'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
+    date = models.DateField()
+    activity_type = models.CharField(max_length=20, choices=ACTIVITY_TYPES)
+    count = models.IntegerField(default=1)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user.email} - {self.activity_type} - {self.date}"
+
+    class Meta:
+        # The unique index on (user, date, activity_type) also serves per-user date range scans
+        unique_together = ['user', 'date', 'activity_type']
+        ordering = ['-date']
@@ -1 +1,62 @@
 # tests.py for accounts
+import pytest
+from datetime import datetime, timedelta
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.activity import activity_summary, current_streak, record_activity
+from accounts.models import LearningActivity, User, UserProgress
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="tester", email="tester@example.com", password="pass123")
+
+
+def _at(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time().replace(hour=12)))
+
+
+@pytest.mark.django_db
+def test_record_activity_deduplicates_per_day_and_type(user):
+    today = timezone.localdate()
+    record_activity(user, "quiz", when=_at(today))
+    record_activity(user, "quiz", when=_at(today))
+    record_activity(user, "note", when=_at(today))
+
+    rows = {row.activity_type: row.count for row in LearningActivity.objects.filter(user=user)}
+    assert rows == {"quiz": 2, "note": 1}
+    assert UserProgress.objects.get(user=user).streak_days == 1
+
+
+@pytest.mark.django_db
+def test_streak_advances_incrementally_and_resets_after_gap(user):
+    today = timezone.localdate()
+    for offset in (5, 3, 2, 1):
+        record_activity(user, "resource", when=_at(today - timedelta(days=offset)))
+
+    progress = UserProgress.objects.get(user=user)
+    assert progress.streak_days == 3
+    assert current_streak(progress, today) == 3
+    assert current_streak(progress, today + timedelta(days=2)) == 0
+
+
+@pytest.mark.django_db
+def test_activity_summary_uses_one_range_query(user, django_assert_num_queries):
+    today = timezone.localdate()
+    for offset in (6, 2, 1, 0, 0):
+        record_activity(user, "roadmap", when=_at(today - timedelta(days=offset)))
+
+    with django_assert_num_queries(1):
+        summary = activity_summary(user, days=7, today=today)
+    assert summary["streak_days"] == 3
+    assert summary["longest_streak_days"] == 3
+    assert summary["active_days"] == 4
+    assert summary["by_type"] == {"roadmap": 5}
+    assert summary["heatmap"][-1] == {"date": today, "count": 2}
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    response = client.get("/api/auth/activity/", {"days": 7})
+    assert response.status_code == 200
+    assert response.data["active_days"] == 4
+    assert client.get("/api/auth/dashboard-stats/").data["streak_days"] == 3
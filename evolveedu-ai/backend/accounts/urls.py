@@ -12,5 +12,6 @@ urlpatterns = [
     path('profile/update/', views.update_profile, name='update_profile'),
     path('change-password/', views.change_password, name='change_password'),
     path('dashboard-stats/', views.dashboard_stats, name='dashboard_stats'),
+    path('activity/', views.activity, name='activity'),
     path('users/', views.UserListView.as_view(), name='user_list'),
 ]
\ No newline at end of file
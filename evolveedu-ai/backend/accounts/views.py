@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import update_session_auth_hash
+from .activity import activity_summary, current_streak
 from .models import User, UserProgress
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
@@ -98,7 +99,7 @@ def dashboard_stats(request):
         'total_notes_generated': user.total_notes_generated,
         'current_level': user.current_level,
         'study_time_minutes': progress.total_study_time,
-        'streak_days': progress.streak_days,
+        'streak_days': current_streak(progress),
         'completed_roadmaps': len(progress.completed_roadmaps),
         'current_roadmaps': len(progress.current_roadmaps),
         'achievements': progress.achievements,
@@ -107,6 +108,16 @@ def dashboard_stats(request):
     return Response(stats)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def activity(request):
+    try:
+        days = int(request.query_params.get('days', 365))
+    except ValueError:
+        return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(activity_summary(request.user, days=days))
+
+
 class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserProfileSerializer
@@ -211,10 +211,30 @@ AI_MODEL_CONFIG = {
     'embeddings_model': 'sentence-transformers/all-MiniLM-L6-v2',
 }
 
+# Background quiz question pre-generation (see `manage.py pregenerate_question_pool`)
+QUIZ_PREGENERATION = {
+    'TOP_K_TOPICS': int(os.getenv('QUIZ_PREGEN_TOP_K', '20')),
+    'POOL_SIZE_PER_TOPIC': int(os.getenv('QUIZ_PREGEN_POOL_SIZE', '30')),
+    'DAILY_TOKEN_BUDGET': int(os.getenv('QUIZ_PREGEN_DAILY_TOKENS', '200000')),
+    'QUESTION_TYPES': ['multiple_choice', 'true_false'],
+    'DEMAND_WINDOW_DAYS': 30,
+}
+
 # Cache Configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'evolveedu-cache',
+# In-process caches (roadmaps.versioning) keep their version keys here. Set REDIS_URL
+# when running several workers so an edit invalidates every worker at once; the local
+# memory cache is per process and other workers catch up within LOCAL_MAX_AGE seconds.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'evolveedu-cache',
+        }
     }
-}
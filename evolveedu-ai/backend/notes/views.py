@@ -4,6 +4,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from accounts.activity import record_activity
 from .models import Note, NoteCategory, NoteShare, StudySession
 from .serializers import (
     NoteSerializer, NoteCategorySerializer, NoteCreateSerializer, NoteShareSerializer,
@@ -111,6 +112,7 @@ def generate_notes_from_youtube(request):
             # Update user stats
             request.user.total_notes_generated += 1
             request.user.save(update_fields=['total_notes_generated'])
+            record_activity(request.user, 'note')
 
             return Response(NoteSerializer(note).data, status=status.HTTP_201_CREATED)
 
@@ -158,6 +160,7 @@ def generate_notes_from_text(request):
             # Update user stats
             request.user.total_notes_generated += 1
             request.user.save(update_fields=['total_notes_generated'])
+            record_activity(request.user, 'note')
 
             return Response(NoteSerializer(note).data, status=status.HTTP_201_CREATED)
 
@@ -206,6 +209,7 @@ def generate_notes_from_pdf(request):
             # Update user stats
             request.user.total_notes_generated += 1
             request.user.save(update_fields=['total_notes_generated'])
+            record_activity(request.user, 'note')
 
             return Response(NoteSerializer(note).data, status=status.HTTP_201_CREATED)
 
@@ -279,6 +283,7 @@ class StudySessionListView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        record_activity(self.request.user, 'note')
 
 
 class StudySessionDetailView(generics.RetrieveUpdateDestroyAPIView):
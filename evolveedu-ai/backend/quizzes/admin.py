@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import QuizCategory, Quiz, Question, QuizAttempt, QuizResponse
+from .models import QuizCategory, Quiz, Question, QuizAttempt, QuizResponse, QuestionStatistics
 
 
 @admin.register(QuizCategory)
@@ -48,3 +48,23 @@ class QuizResponseAdmin(admin.ModelAdmin):
     list_filter = ('is_correct',)
     search_fields = ('attempt__user__email', 'question__text')
     readonly_fields = ('answered_at',)
+
+
+@admin.register(QuestionStatistics)
+class QuestionStatisticsAdmin(admin.ModelAdmin):
+    list_display = ('question', 'responses', 'difficulty', 'discrimination_index', 'mean_time', 'updated_at')
+    list_filter = ('question__quiz',)
+    search_fields = ('question__question_text', 'question__quiz__title')
+    readonly_fields = [field.name for field in QuestionStatistics._meta.fields]
+
+    def difficulty(self, obj):
+        return round(obj.difficulty_index, 2) if obj.responses else None
+    difficulty.short_description = 'p-value'
+
+    def discrimination_index(self, obj):
+        return round(obj.discrimination, 2) if obj.discrimination is not None else None
+    discrimination_index.short_description = 'Point-biserial'
+
+    def mean_time(self, obj):
+        return round(obj.mean_time_seconds, 1) if obj.responses else None
+    mean_time.short_description = 'Mean time (s)'
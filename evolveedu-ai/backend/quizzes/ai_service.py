@@ -6,7 +6,8 @@ Uses OpenAI GPT for generating questions and scoring
 import os
 import json
 import random
-from typing import Dict, List, Tuple
+import threading
+from typing import Dict, Iterator, List, Tuple
 import requests
 from dotenv import load_dotenv
 
@@ -24,6 +25,8 @@ class QuizAIService:
         self.api_key = OPENAI_API_KEY
         self.model = OPENAI_MODEL
         self.api_url = "https://api.openai.com/v1/chat/completions"
+        self.tokens_used = 0
+        self._usage_lock = threading.Lock()
         
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not configured in .env file")
@@ -50,7 +53,12 @@ class QuizAIService:
             response.raise_for_status()
             
             result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
+            content = result["choices"][0]["message"]["content"].strip()
+            with self._usage_lock:
+                # Fall back to a ~4 chars/token estimate when the API omits usage
+                usage = result.get("usage") or {}
+                self.tokens_used += usage.get("total_tokens") or (len(prompt) + len(content)) // 4
+            return content
         except requests.exceptions.RequestException as e:
             return f"Error calling OpenAI API: {str(e)}"
         except Exception as e:
@@ -108,10 +116,147 @@ Ensure answers are factually correct based on the text.
             }
 
     @classmethod
-    def generate_quiz_from_notes(cls, notes_list: List[str], difficulty: str = 'Medium', num_questions: int = 10) -> Dict:
-        """Generate quiz from multiple notes"""
-        combined_text = ' '.join(notes_list)
-        return cls.generate_quiz_from_text(combined_text, num_questions, difficulty)
+    def start_ai_quiz(cls, user, topic: str, difficulty: str = 'intermediate', question_count: int = 10,
+                      category=None, time_limit: int = None):
+        """Create the quiz row that AI-generated questions are attached to"""
+        from .models import Quiz, QuizCategory
+
+        if category is None:
+            category, _ = QuizCategory.objects.get_or_create(name='AI Generated')
+
+        # Titles built from several note titles can run past the column
+        title_length = Quiz._meta.get_field('title').max_length - len(' Quiz')
+        return Quiz.objects.create(
+            title=f'{topic[:title_length].rstrip()} Quiz',
+            description=f'AI-generated {difficulty} quiz about {topic} ({question_count} questions)',
+            category=category,
+            created_by=user,
+            difficulty_level=difficulty,
+            quiz_type='timed' if time_limit else 'practice',
+            time_limit_minutes=time_limit,
+            tags=[topic.lower()],
+        )
+
+    @classmethod
+    def stream_quiz_questions(cls, quiz, topic: str, difficulty: str, question_count: int,
+                              question_types: List[str]) -> Iterator[List]:
+        """Fill a quiz from the question bank, then generate the shortfall in concurrent batches.
+
+        Each batch is saved and yielded as soon as it lands.
+        """
+        from .generation import ChunkedQuizGenerator, split_by_type
+        from .models import Question
+        from .question_bank import QuestionBank
+
+        question_types = question_types or ['multiple_choice']
+        requested = split_by_type(question_count, question_types)
+        saved = 0
+
+        def save_batch(batch):
+            return Question.objects.bulk_create([
+                Question(quiz=quiz, order=saved + i + 1, **data) for i, data in enumerate(batch)
+            ])
+
+        banked = QuestionBank.draw(topic, difficulty, requested)
+        if banked:
+            questions = save_batch(banked)
+            saved += len(questions)
+            yield questions
+
+        shortfall = QuestionBank.shortfall(requested, banked)
+        if shortfall:
+            generator = ChunkedQuizGenerator(
+                topic=topic,
+                difficulty=difficulty,
+                question_count=sum(shortfall.values()),
+                question_types=list(shortfall),
+                service=cls(),
+                type_counts=shortfall,
+            )
+            generator.seed([question['question_text'] for question in banked])
+
+            for batch in generator.stream():
+                QuestionBank.store(topic, difficulty, batch)
+                questions = save_batch(batch)
+                saved += len(questions)
+                yield questions
+
+        quiz.total_questions = saved
+        quiz.save(update_fields=['total_questions'])
+
+    @classmethod
+    def create_quiz_from_ai(cls, user, topic: str, difficulty: str = 'intermediate', question_count: int = 10,
+                            question_types: List[str] = None, category=None, time_limit: int = None):
+        """Generate and persist a complete quiz"""
+        quiz = cls.start_ai_quiz(user, topic, difficulty, question_count, category, time_limit)
+        for _ in cls.stream_quiz_questions(quiz, topic, difficulty, question_count, question_types):
+            pass
+
+        if quiz.total_questions == 0:
+            quiz.delete()
+            raise ValueError('AI did not return any usable questions')
+        return quiz
+
+    @classmethod
+    def evaluate_quiz_attempt(cls, attempt) -> Dict:
+        """Grade a submitted attempt and run the completion updates"""
+        from .grading import finalize_attempt
+
+        if not attempt.responses.exists():
+            return {'error': 'No responses submitted for this attempt'}
+        return finalize_attempt(attempt)
+
+    @classmethod
+    def generate_quiz_from_notes(cls, notes_list: List, difficulty: str = 'intermediate', num_questions: int = 10,
+                                 token_budget: int = None) -> Dict:
+        """Generate quiz questions from several notes (Note objects or plain text).
+
+        Only the most relevant chunks of each note are sent, and questions are spread across notes.
+        """
+        from .generation import parse_questions
+        from .note_context import DEFAULT_TOKEN_BUDGET, build_note_sections, build_notes_prompt
+
+        sections = build_note_sections(notes_list, num_questions, token_budget or DEFAULT_TOKEN_BUDGET)
+        if not sections:
+            return {'error': 'Notes have no content to build questions from', 'success': False, 'questions': []}
+
+        service = cls()
+        response = service._call_openai(build_notes_prompt(sections, difficulty),
+                                        max_tokens=min(4000, 200 * num_questions))
+        questions = parse_questions(response, 'multiple_choice', difficulty)[:num_questions]
+        if not questions:
+            return {'error': 'Failed to parse quiz response', 'success': False, 'questions': []}
+
+        return {
+            'title': 'AI-Generated Quiz',
+            'description': 'Quiz generated from ' + ', '.join(s.source.title or 'notes' for s in sections),
+            'questions': questions,
+            'total_questions': len(questions),
+            'difficulty_level': difficulty,
+            'sources': [{'note_id': s.source.note_id, 'title': s.source.title, 'questions': s.question_count}
+                        for s in sections],
+            'success': True
+        }
+
+    @classmethod
+    def create_quiz_from_notes(cls, user, notes, difficulty: str = 'intermediate', question_count: int = 10,
+                               category=None, time_limit: int = None):
+        """Generate and persist a quiz covering a set of notes"""
+        from .models import Question
+
+        result = cls.generate_quiz_from_notes(notes, difficulty, question_count)
+        if not result['success']:
+            raise ValueError(result['error'])
+
+        topic = ', '.join(note.title for note in notes[:3]) + (' and more' if len(notes) > 3 else '')
+        quiz = cls.start_ai_quiz(user, topic, difficulty, question_count, category, time_limit)
+        quiz.description = result['description']
+        quiz.total_questions = len(result['questions'])
+        quiz.save(update_fields=['description', 'total_questions'])
+        Question.objects.bulk_create([
+            Question(quiz=quiz, order=i + 1, **question) for i, question in enumerate(result['questions'])
+        ])
+        return quiz
 
     @classmethod
     def score_quiz_response(cls, submitted_responses: List[Dict], correct_answers: List[Dict]) -> Dict:
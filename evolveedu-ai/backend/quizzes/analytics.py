@@ -0,0 +1,123 @@
+"""
+Quiz Analytics Rollups
+Per-user daily and lifetime totals of completed attempts, updated when an attempt
+completes, so analytics read a bounded number of rows regardless of history length.
+"""
+
+from datetime import timedelta
+from typing import Dict, List
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyQuizRollup, QuizAttempt, QuizUserTotals
+
+TREND_DAYS = 30
+FAVORITE_CATEGORIES = 5
+
+
+def _add_attempts(row, score_sum: float, passes: int, minutes: int, category: str, count: int = 1):
+    row.attempts += count
+    row.score_sum += score_sum
+    row.passes += passes
+    row.minutes += minutes
+    row.category_counts[category] = row.category_counts.get(category, 0) + count
+
+
+ROLLUP_FIELDS = ['attempts', 'score_sum', 'passes', 'minutes', 'category_counts']
+
+
+def record_attempt_rollups(attempts: List):
+    """Fold completed attempts into their users' daily and lifetime rollups, each row locked and saved once"""
+    if not attempts:
+        return
+    days = {attempt.id: timezone.localdate(attempt.completed_at or timezone.now()) for attempt in attempts}
+    keys = {(attempt.user_id, days[attempt.id]) for attempt in attempts}
+    user_ids = {user_id for user_id, _ in keys}
+
+    with transaction.atomic():
+        DailyQuizRollup.objects.bulk_create([DailyQuizRollup(user_id=user_id, date=day) for user_id, day in keys],
+                                            ignore_conflicts=True)
+        QuizUserTotals.objects.bulk_create([QuizUserTotals(user_id=user_id) for user_id in user_ids],
+                                           ignore_conflicts=True)
+        daily = {(row.user_id, row.date): row for row in DailyQuizRollup.objects.select_for_update().filter(
+            user_id__in=user_ids, date__in={day for _, day in keys}) if (row.user_id, row.date) in keys}
+        totals = QuizUserTotals.objects.select_for_update().in_bulk(user_ids, field_name='user_id')
+
+        for attempt in attempts:
+            for row in (daily[(attempt.user_id, days[attempt.id])], totals[attempt.user_id]):
+                _add_attempts(row, attempt.score_percentage, int(attempt.passed), attempt.time_taken_minutes,
+                              attempt.quiz.category.name)
+        DailyQuizRollup.objects.bulk_update(list(daily.values()), ROLLUP_FIELDS)
+        QuizUserTotals.objects.bulk_update(list(totals.values()), ROLLUP_FIELDS)
+
+
+def rebuild_rollups(user_ids=None) -> int:
+    """Recompute rollups from QuizAttempt history (backfill or repair)"""
+    attempts = QuizAttempt.objects.filter(status='completed', completed_at__isnull=False)
+    if user_ids is not None:
+        attempts = attempts.filter(user_id__in=user_ids)
+
+    grouped = (attempts
+               .annotate(day=TruncDate('completed_at'))
+               .values('user_id', 'day', 'quiz__category__name')
+               .annotate(attempts=Count('id'), score_sum=Sum('score_percentage'),
+                         passes=Count('id', filter=Q(passed=True)), minutes=Sum('time_taken_minutes')))
+
+    daily, totals = {}, {}
+    for row in grouped:
+        user_id = row['user_id']
+        targets = (
+            daily.setdefault((user_id, row['day']), DailyQuizRollup(user_id=user_id, date=row['day'])),
+            totals.setdefault(user_id, QuizUserTotals(user_id=user_id)),
+        )
+        for target in targets:
+            _add_attempts(target, row['score_sum'] or 0.0, row['passes'], row['minutes'] or 0,
+                         row['quiz__category__name'], count=row['attempts'])
+
+    with transaction.atomic():
+        stale_daily = DailyQuizRollup.objects.all()
+        stale_totals = QuizUserTotals.objects.all()
+        if user_ids is not None:
+            stale_daily = stale_daily.filter(user_id__in=user_ids)
+            stale_totals = stale_totals.filter(user_id__in=user_ids)
+        stale_daily.delete()
+        stale_totals.delete()
+        DailyQuizRollup.objects.bulk_create(daily.values())
+        QuizUserTotals.objects.bulk_create(totals.values())
+    return len(daily)
+
+
+def user_quiz_analytics(user) -> Dict:
+    """Analytics payload read from one totals row and at most TREND_DAYS daily rows"""
+    totals = QuizUserTotals.objects.filter(user=user).first()
+    if not totals or totals.attempts == 0:
+        return {
+            'total_attempts': 0,
+            'average_score': 0,
+            'success_rate': 0,
+            'study_time_hours': 0,
+            'favorite_categories': [],
+            'performance_trend': []
+        }
+
+    favorite_categories = sorted(totals.category_counts.items(), key=lambda item: item[1], reverse=True)
+    since = timezone.localdate() - timedelta(days=TREND_DAYS)
+    trend = DailyQuizRollup.objects.filter(user=user, date__gte=since).order_by('date')
+
+    return {
+        'total_attempts': totals.attempts,
+        'average_score': round(totals.score_sum / totals.attempts, 1),
+        'success_rate': round(totals.passes / totals.attempts * 100, 1),
+        'study_time_hours': round(totals.minutes / 60, 1),
+        'favorite_categories': [
+            {'quiz__category__name': name, 'count': count}
+            for name, count in favorite_categories[:FAVORITE_CATEGORIES]
+        ],
+        'performance_trend': [
+            {'date': row.date, 'score': round(row.score_sum / row.attempts, 1), 'attempts': row.attempts}
+            for row in trend if row.attempts
+        ]
+    }
@@ -0,0 +1,135 @@
+"""
+Short Answer Matching
+Local matcher for short_answer and fill_blank responses. Decides confidently right
+and confidently wrong answers from normalization, numeric comparison and edit
+distance; only ambiguous answers need AI grading. Answers that share words with a
+reference but not their order, or that differ from it in negation, are left to the
+AI grader.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Iterable, Optional
+
+CORRECT = 'correct'
+INCORRECT = 'incorrect'
+AMBIGUOUS = 'ambiguous'
+
+EDIT_SIMILARITY_CORRECT = 0.85   # 1 - distance / length, e.g. one typo in a 7 letter word
+SIMILARITY_INCORRECT = 0.4       # Below this on every measure the answer is wrong
+MIN_FUZZY_LENGTH = 4             # Shorter answers must match exactly
+NUMERIC_ABSOLUTE_TOLERANCE = 0.01  # Decimals only; whole numbers (years, counts) must be exact
+
+ARTICLES = {'a', 'an', 'the'}
+NEGATIONS = {'not', 'no', 'never', 'none', 'nothing', 'neither', 'nor', 'cannot', 'without'}
+NUMBER_PATTERN = re.compile(r'^[-+]?(\d+(\.\d*)?|\.\d+)(/\d+)?%?$')
+
+
+@dataclass
+class MatchResult:
+    verdict: str
+    similarity: float
+    method: str
+
+    @property
+    def resolved(self) -> bool:
+        return self.verdict != AMBIGUOUS
+
+
+def normalize_answer(text) -> str:
+    """Lowercase, strip accents and punctuation, drop articles, collapse whitespace"""
+    text = unicodedata.normalize('NFKD', str(text or '').lower())
+    text = re.sub(r"n['’]t\b", ' not', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"[^\w\s.%/+-]", ' ', text)
+    text = re.sub(r"[./+-](?!\d)|(?<!\d)%", ' ', text)
+    return ' '.join(token for token in text.split() if token not in ARTICLES)
+
+
+def parse_number(text: str) -> Optional[float]:
+    """Parse '1,000', '0.5', '1/2' or '50%' from a normalized answer"""
+    candidate = text.replace(',', '').replace(' ', '')
+    if not NUMBER_PATTERN.match(candidate):
+        return None
+    percent = candidate.endswith('%')
+    try:
+        value = float(Fraction(candidate.rstrip('%')))
+    except (ValueError, ZeroDivisionError):
+        return None
+    return value / 100 if percent else value
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance with a two-row table"""
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def edit_similarity(a: str, b: str) -> float:
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    return 1.0 - edit_distance(a, b) / longest
+
+
+def token_similarity(a: str, b: str) -> float:
+    """Dice coefficient of the two token sets"""
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return 2 * len(tokens_a & tokens_b) / (len(tokens_a) + len(tokens_b))
+
+
+def _numbers_match(a: float, b: float, tolerance: float) -> bool:
+    if a.is_integer() and b.is_integer():
+        return a == b
+    return abs(a - b) <= tolerance
+
+
+def _negations(text: str) -> set:
+    return NEGATIONS.intersection(text.split())
+
+
+def match_answer(answer, accepted_answers: Iterable, tolerance: float = NUMERIC_ABSOLUTE_TOLERANCE) -> MatchResult:
+    """
+    Compare an answer against every accepted answer and keep the most favourable verdict.
+    `tolerance` is the absolute slack allowed when either number is not a whole number.
+    """
+    given = normalize_answer(answer)
+    references = [normalize_answer(value) for value in accepted_answers or []]
+    references = [reference for reference in references if reference]
+    if not given or not references:
+        return MatchResult(INCORRECT if references else AMBIGUOUS, 0.0, 'empty')
+    if given in references:
+        return MatchResult(CORRECT, 1.0, 'exact')
+
+    given_number = parse_number(given)
+    numeric_references = [parse_number(reference) for reference in references]
+    if given_number is not None and any(number is not None for number in numeric_references):
+        close = any(number is not None and _numbers_match(given_number, number, tolerance)
+                    for number in numeric_references)
+        return MatchResult(CORRECT if close else INCORRECT, 1.0 if close else 0.0, 'numeric')
+
+    best = MatchResult(AMBIGUOUS, 0.0, 'similarity')
+    for reference in references:
+        tokens = token_similarity(given, reference)
+        edits = edit_similarity(given, reference)
+        # A near miss that adds or drops a negation may mean the opposite, so it is never accepted locally
+        if (_negations(given) == _negations(reference)
+                and min(len(given), len(reference)) >= MIN_FUZZY_LENGTH and edits >= EDIT_SIMILARITY_CORRECT):
+            return MatchResult(CORRECT, edits, 'edit_distance')
+        best.similarity = max(best.similarity, tokens, edits)
+
+    if best.similarity < SIMILARITY_INCORRECT:
+        best.verdict = INCORRECT
+    return best
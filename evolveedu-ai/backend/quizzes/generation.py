@@ -0,0 +1,230 @@
+"""
+Parallel Chunked Quiz Generation
+Splits large quiz requests into small batches per question type and difficulty,
+runs them concurrently and merges the results without near-duplicate questions.
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Set
+
+QUESTIONS_PER_BATCH = 5
+MAX_WORKERS = 4
+MAX_TOKENS_PER_BATCH = 1500
+SIMILARITY_THRESHOLD = 0.8
+MAX_TOP_UP_ROUNDS = 2
+
+OBJECTIVE_TYPES = ('multiple_choice', 'true_false')
+
+
+def normalize_question_text(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = re.sub(r'[^\w\s]', ' ', (text or '').lower())
+    return ' '.join(text.split())
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class QuestionDeduplicator:
+    """Rejects questions whose wording is near-identical to one already accepted"""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._seen_exact: Set[str] = set()
+        self._seen_tokens: List[Set[str]] = []
+
+    def add(self, question_text: str) -> bool:
+        """Register a question, returning False if it duplicates an earlier one"""
+        normalized = normalize_question_text(question_text)
+        if not normalized or normalized in self._seen_exact:
+            return False
+
+        tokens = set(normalized.split())
+        for seen in self._seen_tokens:
+            if _jaccard(tokens, seen) >= self.threshold:
+                return False
+
+        self._seen_exact.add(normalized)
+        self._seen_tokens.append(tokens)
+        return True
+
+
+def split_by_type(question_count: int, question_types: List[str]) -> Dict[str, int]:
+    """Spread a question count as evenly as possible over the requested types"""
+    question_types = list(dict.fromkeys(question_types)) or ['multiple_choice']
+    per_type, remainder = divmod(question_count, len(question_types))
+    return {
+        question_type: per_type + (1 if i < remainder else 0)
+        for i, question_type in enumerate(question_types)
+    }
+
+
+def plan_batches(question_count: int, question_types: List[str], difficulty: str,
+                 batch_size: int = QUESTIONS_PER_BATCH, type_counts: Optional[Dict[str, int]] = None) -> List[Dict]:
+    """Spread the requested count over question types, then cut each type into batches"""
+    type_counts = type_counts or split_by_type(question_count, question_types)
+
+    batches = []
+    for question_type, type_count in type_counts.items():
+        while type_count > 0:
+            size = min(batch_size, type_count)
+            batches.append({
+                'question_type': question_type,
+                'difficulty': difficulty,
+                'count': size,
+            })
+            type_count -= size
+    return batches
+
+
+def parse_questions(response: str, question_type: str, difficulty: str) -> List[Dict]:
+    """Extract questions from an AI response and map them onto Question model fields"""
+    try:
+        start_idx = response.find('{')
+        end_idx = response.rfind('}') + 1
+        data = json.loads(response[start_idx:end_idx])
+    except (ValueError, TypeError):
+        return []
+
+    questions = []
+    for item in data.get('questions', []):
+        if not isinstance(item, dict):
+            continue
+        text = (item.get('question_text') or item.get('question') or '').strip()
+        if not text:
+            continue
+
+        options = item.get('options') or []
+        if question_type == 'true_false' and not options:
+            options = ['True', 'False']
+
+        correct_answers = item.get('correct_answers')
+        if correct_answers is None and 'correct_answer_index' in item:
+            correct_answers = [item['correct_answer_index']]
+        if not isinstance(correct_answers, list):
+            correct_answers = [correct_answers] if correct_answers not in (None, '') else []
+        if question_type in OBJECTIVE_TYPES and not correct_answers:
+            continue
+
+        questions.append({
+            'question_text': text,
+            'question_type': question_type,
+            'options': options if question_type in OBJECTIVE_TYPES else [],
+            'correct_answers': correct_answers,
+            'explanation': item.get('explanation', ''),
+            'hint': item.get('hint', ''),
+            'points': item.get('points', 1) if isinstance(item.get('points', 1), int) else 1,
+            'difficulty_level': difficulty,
+        })
+    return questions
+
+
+def build_batch_prompt(topic: str, batch: Dict, avoid: Optional[List[str]] = None) -> str:
+    """Prompt for a single small batch of one question type"""
+    question_type = batch['question_type']
+    if question_type == 'multiple_choice':
+        answer_format = '"options": ["A", "B", "C", "D"], "correct_answers": [0]'
+    elif question_type == 'true_false':
+        answer_format = '"options": ["True", "False"], "correct_answers": [0]'
+    else:
+        answer_format = '"correct_answers": ["expected answer"]'
+
+    avoid_block = ''
+    if avoid:
+        avoid_block = 'Do not repeat these questions:\n' + '\n'.join(f'- {q}' for q in avoid[:20]) + '\n'
+
+    return f"""Generate {batch['count']} {question_type.replace('_', ' ')} quiz questions about "{topic}" at {batch['difficulty']} difficulty.
+{avoid_block}
+Respond with JSON only:
+{{
+    "questions": [
+        {{"question_text": "Question?", {answer_format}, "explanation": "Why the answer is correct", "points": 1}}
+    ]
+}}
+Every question must test a different fact or idea. Answer indices are zero-based.
+"""
+
+
+class ChunkedQuizGenerator:
+    """Generates large quizzes as concurrent small batches"""
+
+    def __init__(self, topic: str, difficulty: str, question_count: int, question_types: List[str],
+                 service=None, batch_size: int = QUESTIONS_PER_BATCH, max_workers: int = MAX_WORKERS,
+                 type_counts: Optional[Dict[str, int]] = None):
+        if service is None:
+            from .ai_service import QuizAIService
+            service = QuizAIService()
+
+        self.topic = topic
+        self.difficulty = difficulty
+        self.question_count = question_count
+        self.question_types = question_types
+        self.service = service
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.type_counts = type_counts
+        self.deduplicator = QuestionDeduplicator()
+        self.accepted: List[Dict] = []
+        self._known_texts: List[str] = []
+
+    def seed(self, question_texts: List[str]):
+        """Register questions that already exist so new batches do not repeat them"""
+        for text in question_texts:
+            if self.deduplicator.add(text):
+                self._known_texts.append(text)
+
+    def _generate_batch(self, batch: Dict, avoid: List[str]) -> List[Dict]:
+        prompt = build_batch_prompt(self.topic, batch, avoid)
+        response = self.service._call_openai(prompt, max_tokens=MAX_TOKENS_PER_BATCH)
+        return parse_questions(response, batch['question_type'], batch['difficulty'])[:batch['count']]
+
+    def _run_round(self, batches: List[Dict]) -> Iterator[List[Dict]]:
+        if not batches:
+            return
+
+        avoid = self._known_texts + [q['question_text'] for q in self.accepted]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            futures = [executor.submit(self._generate_batch, batch, avoid) for batch in batches]
+            for future in as_completed(futures):
+                try:
+                    questions = future.result()
+                except Exception:
+                    continue
+
+                fresh = []
+                for question in questions:
+                    if len(self.accepted) >= self.question_count:
+                        break
+                    if self.deduplicator.add(question['question_text']):
+                        self.accepted.append(question)
+                        fresh.append(question)
+                if fresh:
+                    yield fresh
+
+    def stream(self) -> Iterator[List[Dict]]:
+        """Yield newly accepted questions as each batch finishes"""
+        if self.question_count <= 0:
+            return
+
+        batches = plan_batches(self.question_count, self.question_types, self.difficulty,
+                               self.batch_size, self.type_counts)
+        yield from self._run_round(batches)
+
+        # Top up whatever was lost to parse failures or deduplication
+        for _ in range(MAX_TOP_UP_ROUNDS):
+            shortfall = self.question_count - len(self.accepted)
+            if shortfall <= 0:
+                break
+            batches = plan_batches(shortfall, self.question_types, self.difficulty, self.batch_size)
+            yield from self._run_round(batches)
+
+    def generate(self) -> List[Dict]:
+        """Run every batch and return the merged question list"""
+        for _ in self.stream():
+            pass
+        return self.accepted
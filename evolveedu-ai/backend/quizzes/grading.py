@@ -0,0 +1,365 @@
+"""
+Quiz Grading
+Local grading of quiz responses, batched AI grading of free-text answers and the
+completion pipeline for attempts.
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.activity import record_activity
+
+from .analytics import rebuild_rollups, record_attempt_rollups
+from .answer_matching import AMBIGUOUS, CORRECT, match_answer
+from .irt import AdaptiveQuizEngine
+from .item_analysis import record_item_statistics
+from .leaderboard import rebuild_leaderboard, record_attempt_scores
+from .models import QuizAttempt, QuizResponse
+from .options import option_indices
+
+OBJECTIVE_TYPES = ('multiple_choice', 'true_false')
+TEXT_MATCH_TYPES = ('short_answer', 'fill_blank')
+
+MAX_PROMPT_TOKENS = 3000  # Budget for the graded items of one grading prompt
+MAX_RESPONSE_TOKENS_PER_ITEM = 120
+MAX_FEEDBACK_CHARS = 600
+PASS_FRACTION = 0.5  # Share of a question's points that counts as a correct answer
+
+logger = logging.getLogger(__name__)
+
+
+def is_objective_answer_correct(question, selected_options) -> bool:
+    """Exact-set grading for multiple choice and true/false questions"""
+    if not isinstance(selected_options, (list, tuple)):
+        selected_options = [selected_options]
+    expected = option_indices(question.correct_answers, question.options)
+    return bool(expected) and option_indices(selected_options, question.options) == expected
+
+
+def grade_response(question, response) -> bool:
+    """Grade one response locally; ambiguous text answers and essays count as wrong here"""
+    if question.question_type in OBJECTIVE_TYPES:
+        return is_objective_answer_correct(question, response.selected_options)
+    if question.question_type in TEXT_MATCH_TYPES:
+        return match_answer(response.text_answer, question.correct_answers).verdict == CORRECT
+    return False
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class BatchFreeTextGrader:
+    """Grades every free-text answer of an attempt in one (or a few) structured AI calls"""
+
+    def __init__(self, service=None, max_prompt_tokens: int = MAX_PROMPT_TOKENS):
+        self._service = service
+        self.max_prompt_tokens = max_prompt_tokens
+
+    @property
+    def service(self):
+        if self._service is None:
+            from .ai_service import QuizAIService
+            self._service = QuizAIService()
+        return self._service
+
+    @staticmethod
+    def build_item(question, response) -> Dict:
+        return {
+            'id': response.id,
+            'question': question.question_text,
+            'reference_answer': [str(answer) for answer in question.correct_answers],
+            'rubric': question.explanation,
+            'max_points': question.points,
+            'student_answer': response.text_answer,
+        }
+
+    def pack(self, items: List[Dict]) -> List[List[Dict]]:
+        """Split items into prompts that stay within the token budget"""
+        batches, current, used = [], [], 0
+        for item in items:
+            cost = _estimate_tokens(json.dumps(item))
+            if current and used + cost > self.max_prompt_tokens:
+                batches.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def build_prompt(items: List[Dict]) -> str:
+        return f"""Grade these {len(items)} student answers. For each item compare the student_answer with the
+reference_answer and rubric, and award a score from 0.0 (wrong) to 1.0 (fully correct).
+Give one or two sentences of constructive feedback addressed to the student.
+
+Items:
+{json.dumps(items, ensure_ascii=False)}
+
+Respond with JSON only, one entry per item id:
+{{"grades": [{{"id": 1, "score": 0.75, "feedback": "..."}}]}}
+"""
+
+    @staticmethod
+    def parse_grades(response: str, expected_ids: Set[int]) -> Dict[int, Dict]:
+        """Validate an AI grading response, dropping anything malformed or unexpected"""
+        try:
+            start_idx = response.find('{')
+            end_idx = response.rfind('}') + 1
+            data = json.loads(response[start_idx:end_idx])
+        except (ValueError, TypeError):
+            return {}
+        if not isinstance(data, dict) or not isinstance(data.get('grades'), list):
+            return {}
+
+        grades = {}
+        for item in data['grades']:
+            if not isinstance(item, dict):
+                continue
+            try:
+                response_id = int(item.get('id'))
+                score = float(item.get('score'))
+            except (TypeError, ValueError):
+                continue
+            if response_id not in expected_ids or response_id in grades:
+                continue
+            grades[response_id] = {
+                'score': min(max(score, 0.0), 1.0),
+                'feedback': str(item.get('feedback') or '').strip()[:MAX_FEEDBACK_CHARS],
+            }
+        return grades
+
+    def grade(self, pairs: List[Tuple]) -> Dict[int, Dict]:
+        """Map response ids to {'score', 'feedback'}; answers the AI did not grade are left out"""
+        items = [self.build_item(question, response) for question, response in pairs if response.text_answer]
+        if not items:
+            return {}
+        try:
+            service = self.service
+        except ValueError:
+            # AI not configured, free-text answers keep their local grade
+            return {}
+
+        grades = {}
+        for batch in self.pack(items):
+            response = service._call_openai(
+                self.build_prompt(batch), max_tokens=MAX_RESPONSE_TOKENS_PER_ITEM * len(batch)
+            )
+            grades.update(self.parse_grades(response, {item['id'] for item in batch}))
+        return grades
+
+
+def grade_attempt(attempt, free_text_grader: Optional[BatchFreeTextGrader] = None,
+                  pending_only: bool = False) -> Dict:
+    """Grade every response of an attempt and return the score summary.
+
+    Free-text answers the AI grader could not score are marked pending review and
+    left out of the score. With `pending_only` only those are graded again and every
+    other response keeps its stored grade.
+    """
+    questions = list(attempt.quiz.questions.all())
+    responses = list(attempt.responses.all())
+    if attempt.quiz.quiz_type == 'adaptive':
+        # Adaptive attempts are scored on the questions actually served
+        answered = {response.question_id for response in responses}
+        questions = [question for question in questions if question.id in answered]
+    question_map = {question.id: question for question in questions}
+
+    escalated, text_answers, resolved_locally = [], 0, 0
+    for response in responses:
+        question = question_map.get(response.question_id)
+        if pending_only and not response.pending_review:
+            continue
+        response.pending_review = False
+        if question and question.question_type in TEXT_MATCH_TYPES:
+            match = match_answer(response.text_answer, question.correct_answers)
+            response.is_correct = match.verdict == CORRECT
+            text_answers += 1
+            if match.verdict == AMBIGUOUS:
+                escalated.append((question, response))
+            else:
+                resolved_locally += 1
+        elif question and question.question_type == 'essay':
+            response.is_correct = False
+            escalated.append((question, response))
+        else:
+            response.is_correct = bool(question) and grade_response(question, response)
+        response.points_earned = question.points if response.is_correct else 0
+
+    # Essays and ambiguous short answers go to the AI grader in one batch
+    if escalated:
+        grades = (free_text_grader or BatchFreeTextGrader()).grade(escalated)
+        for question, response in escalated:
+            grade = grades.get(response.id)
+            if grade:
+                response.points_earned = round(grade['score'] * question.points)
+                response.is_correct = grade['score'] >= PASS_FRACTION
+                response.ai_feedback = grade['feedback']
+            elif response.text_answer:
+                # The AI call failed or skipped this answer, which is not the same as a wrong answer
+                response.pending_review = True
+    if text_answers:
+        logger.info('Attempt %s: %d of %d text answers resolved locally', attempt.id, resolved_locally, text_answers)
+    QuizResponse.objects.bulk_update(responses, ['is_correct', 'points_earned', 'ai_feedback', 'pending_review'])
+
+    pending = {response.question_id for response in responses if response.pending_review}
+    scored = [response for response in responses if not response.pending_review]
+    total_points = sum(question.points for question in questions if question.id not in pending)
+    earned_points = sum(response.points_earned for response in scored)
+    score_percentage = round(earned_points / total_points * 100, 2) if total_points else 0.0
+    if attempt.quiz.quiz_type == 'adaptive' and scored:
+        # Served items differ in difficulty, so the score comes from the ability estimate
+        engine = AdaptiveQuizEngine(attempt.quiz)
+        theta, _ = engine.ability({response.question_id: bool(response.is_correct) for response in scored})
+        score_percentage = round(engine.expected_score(theta), 2)
+    return {
+        'total_questions': len(questions),
+        'correct_answers': sum(1 for response in scored if response.is_correct),
+        'total_points': total_points,
+        'earned_points': earned_points,
+        'score_percentage': score_percentage,
+        'pending_review': len(pending),
+        'text_answers': text_answers,
+        'text_answers_resolved_locally': resolved_locally,
+    }
+
+
+def _attempt_feedback(score_percentage: float, passed: bool) -> str:
+    if score_percentage >= 90:
+        return 'Excellent work! You have mastered this material.'
+    if passed:
+        return 'Well done, you passed. Review the questions you missed to improve further.'
+    if score_percentage >= 50:
+        return 'Almost there. Review the explanations and try again.'
+    return 'Consider reviewing the material more thoroughly before your next attempt.'
+
+
+ATTEMPT_RESULT_FIELDS = [
+    'completed_at', 'time_taken_minutes', 'status', 'total_questions', 'correct_answers',
+    'total_points', 'earned_points', 'score_percentage', 'passed', 'feedback',
+]
+
+
+def _apply_result(attempt, summary: Dict, completed_at):
+    attempt.completed_at = completed_at
+    attempt.time_taken_minutes = max(0, int((completed_at - attempt.started_at).total_seconds() / 60))
+    attempt.status = 'completed'
+    attempt.total_questions = summary['total_questions']
+    attempt.correct_answers = summary['correct_answers']
+    attempt.total_points = summary['total_points']
+    attempt.earned_points = summary['earned_points']
+    attempt.score_percentage = summary['score_percentage']
+    attempt.passed = summary['score_percentage'] >= attempt.quiz.passing_score
+    attempt.feedback = _attempt_feedback(attempt.score_percentage, attempt.passed)
+
+
+def _release(attempt_ids):
+    """Return claimed attempts to in progress when completing them failed"""
+    QuizAttempt.objects.filter(id__in=attempt_ids, status='completed').update(status='in_progress')
+
+
+def finalize_attempt(attempt, completed_at=None) -> Dict:
+    """Grade an in-progress attempt, mark it completed and update derived statistics"""
+    # Claim the attempt first so a racing submit or sweep neither completes nor regrades it
+    if not QuizAttempt.objects.filter(id=attempt.id, status='in_progress').update(status='completed'):
+        return {'error': 'This attempt has already been submitted'}
+
+    try:
+        # Grading may call the AI, so it runs before the transaction is opened
+        summary = grade_attempt(attempt)
+        with transaction.atomic():
+            _apply_result(attempt, summary, completed_at or attempt.completed_at or timezone.now())
+            attempt.save(update_fields=ATTEMPT_RESULT_FIELDS)
+            on_attempts_completed([attempt])
+    except Exception:
+        _release([attempt.id])
+        raise
+    return {**summary, 'passed': attempt.passed, 'feedback': attempt.feedback}
+
+
+def finalize_attempts(attempts: List, completed_at: Dict[int, object]) -> int:
+    """Grade and complete a batch of attempts with a single attempt UPDATE.
+
+    `completed_at` maps attempt ids to their completion time (e.g. the deadline).
+    Attempts no longer in progress are skipped; returns how many were completed.
+    """
+    with transaction.atomic():
+        # Lock and claim the rows still in progress; a submit may have completed some meanwhile
+        claimed = set(QuizAttempt.objects.select_for_update()
+                      .filter(id__in=[attempt.id for attempt in attempts], status='in_progress')
+                      .values_list('id', flat=True))
+        QuizAttempt.objects.filter(id__in=claimed).update(status='completed')
+    attempts = [attempt for attempt in attempts if attempt.id in claimed]
+
+    try:
+        grader = BatchFreeTextGrader()
+        summaries = [grade_attempt(attempt, grader) for attempt in attempts]
+        with transaction.atomic():
+            for attempt, summary in zip(attempts, summaries):
+                _apply_result(attempt, summary, completed_at[attempt.id])
+            QuizAttempt.objects.bulk_update(attempts, ATTEMPT_RESULT_FIELDS)
+
+            # The learner was last active at their final answer, not at the deadline these are closed at
+            last_answered = dict(QuizResponse.objects.filter(attempt_id__in=claimed)
+                                 .values('attempt_id').annotate(last=Max('answered_at'))
+                                 .values_list('attempt_id', 'last'))
+            on_attempts_completed(attempts, active_at=last_answered)
+    except Exception:
+        _release(claimed)
+        raise
+    return len(attempts)
+
+
+def regrade_pending_attempts(limit: int = 100) -> Dict:
+    """Retry AI grading of answers left pending review on completed attempts.
+
+    Updated scores are written back, and the rollups, leaderboards and quiz stats
+    fed by these attempts are rebuilt for the affected users and quizzes.
+    """
+    attempts = list(QuizAttempt.objects.filter(status='completed', responses__pending_review=True)
+                    .select_related('quiz').distinct()[:limit])
+    if not attempts:
+        return {'attempts': 0, 'graded': 0}
+
+    grader = BatchFreeTextGrader()
+    summaries = [grade_attempt(attempt, grader, pending_only=True) for attempt in attempts]
+    with transaction.atomic():
+        for attempt, summary in zip(attempts, summaries):
+            _apply_result(attempt, summary, attempt.completed_at)
+        QuizAttempt.objects.bulk_update(attempts, ATTEMPT_RESULT_FIELDS)
+
+    quizzes = {attempt.quiz_id: attempt.quiz for attempt in attempts}
+    for quiz in quizzes.values():
+        quiz.update_stats()
+        rebuild_leaderboard(quiz)
+    rebuild_rollups({attempt.user_id for attempt in attempts})
+    return {'attempts': len(attempts), 'graded': sum(1 for summary in summaries if not summary['pending_review'])}
+
+
+def on_attempts_completed(attempts: List, active_at: Dict[int, object] = None):
+    """Incremental updates that follow attempt completions, grouped by quiz and by user.
+
+    `active_at` maps attempt ids to when the learner was last active, for attempts
+    closed on their behalf.
+    """
+    active_at = active_at or {}
+    for quiz in {attempt.quiz_id: attempt.quiz for attempt in attempts}.values():
+        quiz.update_stats()
+    record_attempt_rollups(attempts)
+    record_attempt_scores(attempts)
+    record_item_statistics(attempts)
+
+    # One activity update per user and day, counting every attempt in it
+    activity: Dict[tuple, List] = {}
+    for attempt in attempts:
+        when = active_at.get(attempt.id) or attempt.completed_at
+        activity.setdefault((attempt.user_id, timezone.localdate(when)), []).append((when, attempt.user))
+    for _, entries in sorted(activity.items(), key=lambda item: item[0][1]):
+        times = [when for when, _ in entries]
+        record_activity(entries[0][1], 'quiz', when=max(times), count=len(times), first_at=min(times))
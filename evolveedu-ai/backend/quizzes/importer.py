@@ -0,0 +1,127 @@
+"""
+Question Import
+Stream-parses CSV or JSON Lines question banks, validates rows in chunks with
+QuestionImportSerializer and inserts each chunk with one bulk_create. Invalid rows
+are reported with their row number and skipped without aborting the import; an
+undecodable upload stops it, and the report says how far it got.
+"""
+
+import csv
+import json
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Question, Quiz
+from .serializers import QuestionImportSerializer
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+SUPPORTED_FORMATS = ('csv', 'jsonl')
+LIST_FIELDS = ('options', 'correct_answers')
+
+
+def detect_format(filename: str, requested: str = None) -> str:
+    fmt = (requested or filename.rsplit('.', 1)[-1]).lower()
+    if fmt in ('json', 'ndjson'):
+        fmt = 'jsonl'
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}', use one of: {', '.join(SUPPORTED_FORMATS)}")
+    return fmt
+
+
+def _parse_list_cell(value: str) -> List:
+    """CSV list cells hold a JSON array or '|'-separated values; digit strings become indices"""
+    value = (value or '').strip()
+    if not value:
+        return []
+    if value.startswith('['):
+        return json.loads(value)
+    items = [item.strip() for item in value.split('|')]
+    return [int(item) if item.lstrip('-').isdigit() else item for item in items if item]
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+    for row_number, row in enumerate(csv.DictReader(lines), start=2):  # Row 1 is the header
+        data = {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+        try:
+            for field in LIST_FIELDS:
+                if field in data:
+                    data[field] = _parse_list_cell(data[field])
+        except ValueError as e:
+            data = {'__error__': f'Invalid list value: {e}'}
+        yield row_number, data
+
+
+def iter_jsonl_rows(lines: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+    for row_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            data = {'__error__': f'Invalid JSON: {e}'}
+        if not isinstance(data, dict):
+            data = {'__error__': 'Each line must be a JSON object'}
+        yield row_number, data
+
+
+def iter_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Dict]]:
+    return iter_csv_rows(lines) if fmt == 'csv' else iter_jsonl_rows(lines)
+
+
+class QuestionImporter:
+    """Imports rows into a quiz chunk by chunk"""
+
+    def __init__(self, quiz: Quiz, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.quiz = quiz
+        self.chunk_size = chunk_size
+
+    def _validate_chunk(self, chunk, next_order: int, report: Dict) -> List[Question]:
+        questions = []
+        for row_number, data in chunk:
+            if '__error__' in data:
+                self._add_error(report, row_number, {'row': [data['__error__']]})
+                continue
+            serializer = QuestionImportSerializer(data=data)
+            if not serializer.is_valid():
+                self._add_error(report, row_number, serializer.errors)
+                continue
+            validated = serializer.validated_data
+            validated['order'] = validated.get('order') or next_order + len(questions)
+            questions.append(Question(quiz=self.quiz, **validated))
+        return questions
+
+    @staticmethod
+    def _add_error(report: Dict, row_number: int, errors):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': row_number, 'errors': errors})
+
+    def run(self, rows: Iterator[Tuple[int, Dict]]) -> Dict:
+        report = {'created': 0, 'failed': 0, 'errors': []}
+        next_order = (self.quiz.questions.aggregate(last=Max('order'))['last'] or 0) + 1
+
+        rows, last_row = iter(rows), 0
+        while 'error' not in report:
+            # Rows are decoded lazily; a bad byte ends the import after the rows read before it
+            chunk = []
+            try:
+                chunk.extend(islice(rows, self.chunk_size))
+            except UnicodeDecodeError:
+                stopped_after = chunk[-1][0] if chunk else last_row
+                report['error'] = f'File must be UTF-8 encoded; the import stopped after row {stopped_after}'
+            if not chunk:
+                break
+            last_row = chunk[-1][0]
+            questions = self._validate_chunk(chunk, next_order, report)
+            with transaction.atomic():
+                Question.objects.bulk_create(questions)
+            report['created'] += len(questions)
+            next_order += len(questions)
+
+        Quiz.objects.filter(id=self.quiz.id).update(total_questions=self.quiz.questions.count())
+        return report
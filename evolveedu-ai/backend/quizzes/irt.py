@@ -0,0 +1,208 @@
+"""
+Adaptive Quiz Engine
+Two-parameter logistic (2PL) item response theory. Item difficulty and
+discrimination are calibrated incrementally from graded QuizResponse data, and
+adaptive attempts pick the question with maximum Fisher information at the
+current ability estimate, so no AI call is needed per step.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+
+from .models import ItemCalibration, Question, QuizAttempt, QuizResponse
+
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+THETA_PRIOR = np.exp(-0.5 * THETA_GRID ** 2)  # Standard normal prior for EAP estimates
+
+LOGISTIC_SCALE = 1.702  # Logistic <-> normal-ogive scaling constant
+PRIOR_DIFFICULTY = {'beginner': -1.0, 'intermediate': 0.0, 'advanced': 1.0}
+PRIOR_DISCRIMINATION = 1.0
+SHRINKAGE_RESPONSES = 10  # Responses needed before data and prior weigh equally
+
+STOP_STANDARD_ERROR = 0.35
+DEFAULT_MAX_QUESTIONS = 20
+
+
+def probability_correct(theta, a, b):
+    return 1.0 / (1.0 + np.exp(-a * (theta - b)))
+
+
+def item_information(theta, a, b):
+    p = probability_correct(theta, a, b)
+    return a ** 2 * p * (1.0 - p)
+
+
+def _logit(p):
+    return np.log(p / (1.0 - p))
+
+
+def estimate_item_parameters(responses, correct, sum_theta, sum_theta_sq, sum_theta_correct,
+                             prior_difficulty) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized (a, b) from running sums via point-biserial correlation (Lord's approximation).
+
+    Estimates are shrunk towards the prior while an item has few responses.
+    """
+    n = np.maximum(responses, 1.0)
+    p = np.clip(correct / n, 0.02, 0.98)
+
+    mean_theta = sum_theta / n
+    sd_theta = np.sqrt(np.maximum(sum_theta_sq / n - mean_theta ** 2, 1e-6))
+    mean_theta_correct = np.divide(sum_theta_correct, correct, out=mean_theta.copy(), where=correct > 0)
+
+    r = (mean_theta_correct - mean_theta) / sd_theta * np.sqrt(p / (1.0 - p))
+    r = np.clip(r, 0.05, 0.95)
+
+    a = np.clip(LOGISTIC_SCALE * r / np.sqrt(1.0 - r ** 2), 0.2, 3.0)
+    b = np.clip(-(_logit(p) / LOGISTIC_SCALE) / r, -4.0, 4.0)
+
+    weight = responses / (responses + SHRINKAGE_RESPONSES)
+    a = weight * a + (1.0 - weight) * PRIOR_DISCRIMINATION
+    b = weight * b + (1.0 - weight) * prior_difficulty
+    return a, b
+
+
+def estimate_ability(a, b, correct) -> Tuple[float, float]:
+    """Expected a posteriori ability and its standard error"""
+    if len(a) == 0:
+        return 0.0, 1.0
+
+    p = np.clip(probability_correct(THETA_GRID[:, None], a[None, :], b[None, :]), 1e-9, 1 - 1e-9)
+    log_likelihood = (correct * np.log(p) + (1 - correct) * np.log(1 - p)).sum(axis=1)
+    posterior = THETA_PRIOR * np.exp(log_likelihood - log_likelihood.max())
+    posterior /= posterior.sum()
+
+    theta = float((THETA_GRID * posterior).sum())
+    se = float(np.sqrt(((THETA_GRID - theta) ** 2 * posterior).sum()))
+    return theta, se
+
+
+class ItemCalibrator:
+    """Folds responses from completed attempts not yet calibrated into ItemCalibration rows.
+
+    Attempts are tracked by their own flag rather than a completed_at watermark, since
+    attempts can be completed late with an earlier completed_at (e.g. at their deadline).
+    """
+
+    @transaction.atomic
+    def run(self) -> Dict:
+        attempt_ids = list(QuizAttempt.objects.select_for_update()
+                           .filter(status='completed', calibrated=False)
+                           .values_list('id', flat=True))
+        QuizAttempt.objects.filter(id__in=attempt_ids).update(calibrated=True)
+
+        rows = list(
+            QuizResponse.objects
+            .filter(attempt_id__in=attempt_ids)
+            .values_list('attempt_id', 'question_id', 'is_correct', 'attempt__completed_at')
+        )
+        if not rows:
+            return {'responses': 0, 'items': 0}
+
+        attempt_ids = np.array([row[0] for row in rows])
+        question_ids = np.array([row[1] for row in rows])
+        is_correct = np.array([row[2] for row in rows], dtype=float)
+        calibrated_through = max((row[3] for row in rows if row[3]), default=None)
+
+        # Ability of each responding attempt from its proportion correct
+        attempt_keys, attempt_inverse = np.unique(attempt_ids, return_inverse=True)
+        attempt_score = (np.bincount(attempt_inverse, weights=is_correct)
+                         / np.bincount(attempt_inverse))
+        theta = _logit(np.clip(attempt_score, 0.05, 0.95))[attempt_inverse] / LOGISTIC_SCALE
+
+        # Per-item increments of the running sums
+        item_keys, item_inverse = np.unique(question_ids, return_inverse=True)
+        increments = {
+            'responses': np.bincount(item_inverse).astype(float),
+            'correct': np.bincount(item_inverse, weights=is_correct),
+            'sum_theta': np.bincount(item_inverse, weights=theta),
+            'sum_theta_sq': np.bincount(item_inverse, weights=theta ** 2),
+            'sum_theta_correct': np.bincount(item_inverse, weights=theta * is_correct),
+        }
+
+        item_ids = item_keys.tolist()
+        existing = ItemCalibration.objects.in_bulk(item_ids, field_name='question_id')
+        difficulty_levels = dict(Question.objects.filter(id__in=item_ids).values_list('id', 'difficulty_level'))
+
+        totals = {
+            field: values + np.array([getattr(existing[q], field) if q in existing else 0.0 for q in item_ids])
+            for field, values in increments.items()
+        }
+        prior_difficulty = np.array([PRIOR_DIFFICULTY.get(difficulty_levels.get(q), 0.0) for q in item_ids])
+        a, b = estimate_item_parameters(prior_difficulty=prior_difficulty, **totals)
+
+        to_update, to_create = [], []
+        for i, question_id in enumerate(item_ids):
+            calibration = existing.get(question_id) or ItemCalibration(question_id=question_id)
+            calibration.responses = int(totals['responses'][i])
+            calibration.correct = int(totals['correct'][i])
+            calibration.sum_theta = float(totals['sum_theta'][i])
+            calibration.sum_theta_sq = float(totals['sum_theta_sq'][i])
+            calibration.sum_theta_correct = float(totals['sum_theta_correct'][i])
+            calibration.discrimination = float(a[i])
+            calibration.difficulty = float(b[i])
+            calibration.calibrated_through = max(filter(None, [calibration.calibrated_through, calibrated_through]),
+                                                 default=None)
+            (to_update if question_id in existing else to_create).append(calibration)
+
+        ItemCalibration.objects.bulk_create(to_create)
+        ItemCalibration.objects.bulk_update(to_update, [
+            'responses', 'correct', 'sum_theta', 'sum_theta_sq', 'sum_theta_correct',
+            'discrimination', 'difficulty', 'calibrated_through',
+        ])
+        return {'responses': len(rows), 'items': len(item_ids)}
+
+
+class AdaptiveQuizEngine:
+    """Chooses the most informative next question for an adaptive attempt"""
+
+    def __init__(self, quiz, max_questions: int = None, stop_standard_error: float = STOP_STANDARD_ERROR):
+        rows = list(
+            Question.objects.filter(quiz=quiz)
+            .values_list('id', 'difficulty_level', 'calibration__discrimination', 'calibration__difficulty')
+        )
+        self.question_ids = np.array([row[0] for row in rows], dtype=int)
+        self.a = np.array([row[2] if row[2] is not None else PRIOR_DISCRIMINATION for row in rows], dtype=float)
+        self.b = np.array([row[3] if row[3] is not None else PRIOR_DIFFICULTY.get(row[1], 0.0)
+                           for row in rows], dtype=float)
+        self.index = {question_id: i for i, question_id in enumerate(self.question_ids.tolist())}
+        self.max_questions = min(max_questions or DEFAULT_MAX_QUESTIONS, len(rows))
+        self.stop_standard_error = stop_standard_error
+
+    def ability(self, answered: Dict[int, bool]) -> Tuple[float, float]:
+        positions = [self.index[q] for q in answered if q in self.index]
+        correct = np.array([float(answered[q]) for q in answered if q in self.index])
+        return estimate_ability(self.a[positions], self.b[positions], correct)
+
+    def expected_score(self, theta: float) -> float:
+        """Expected percent of the quiz's item pool answered correctly at ability theta"""
+        if not len(self.question_ids):
+            return 0.0
+        return float(probability_correct(theta, self.a, self.b).mean() * 100)
+
+    def next_question_id(self, answered: Dict[int, bool]) -> Optional[int]:
+        return self.state(answered)['next_question_id']
+
+    def state(self, answered: Dict[int, bool]) -> Dict:
+        theta, se = self.ability(answered)
+        done = (len(answered) >= self.max_questions
+                or (len(answered) > 0 and se <= self.stop_standard_error))
+
+        next_question_id = None
+        if not done:
+            information = item_information(theta, self.a, self.b)
+            for question_id in answered:
+                if question_id in self.index:
+                    information[self.index[question_id]] = -np.inf
+            best = int(np.argmax(information))
+            if np.isfinite(information[best]):
+                next_question_id = int(self.question_ids[best])
+
+        return {
+            'ability': round(theta, 3),
+            'standard_error': round(se, 3),
+            'answered': len(answered),
+            'next_question_id': next_question_id,
+            'done': next_question_id is None,
+        }
@@ -0,0 +1,103 @@
+"""
+Item Analysis
+Per-question running statistics (difficulty, timing, option choices and the inputs
+of the point-biserial discrimination index), folded in as attempts are graded so
+reports read precomputed numbers instead of scanning QuizResponse.
+"""
+
+from typing import Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QuestionStatistics, QuizResponse
+from .options import option_indices
+
+EASY_THRESHOLD = 0.9
+HARD_THRESHOLD = 0.2
+LOW_DISCRIMINATION = 0.2
+MIN_RESPONSES_FOR_FLAGS = 10
+
+
+def record_item_statistics(attempts: List):
+    """Fold the graded responses of completed attempts into QuestionStatistics, one row update per question"""
+    scores = {attempt.id: attempt.score_percentage / 100.0 for attempt in attempts}
+    responses = list(QuizResponse.objects.filter(attempt_id__in=scores).select_related('question'))
+    if not responses:
+        return
+
+    question_ids = {response.question_id for response in responses}
+
+    with transaction.atomic():
+        QuestionStatistics.objects.bulk_create(
+            [QuestionStatistics(question_id=question_id) for question_id in question_ids],
+            ignore_conflicts=True
+        )
+        statistics = QuestionStatistics.objects.select_for_update().in_bulk(question_ids, field_name='question_id')
+
+        for response in responses:
+            row = statistics[response.question_id]
+            score = scores[response.attempt_id]
+            row.responses += 1
+            row.correct += int(response.is_correct)
+            row.time_spent_seconds += max(0, response.time_spent_seconds or 0)
+            row.sum_score += score
+            row.sum_score_sq += score ** 2
+            if response.is_correct:
+                row.sum_score_correct += score
+
+            selected = response.selected_options
+            if not isinstance(selected, (list, tuple)):
+                selected = [selected]
+            for index in option_indices(selected, response.question.options):
+                row.option_counts[str(index)] = row.option_counts.get(str(index), 0) + 1
+
+        now = timezone.now()
+        for row in statistics.values():
+            row.updated_at = now
+        QuestionStatistics.objects.bulk_update(list(statistics.values()), [
+            'responses', 'correct', 'time_spent_seconds', 'option_counts',
+            'sum_score', 'sum_score_sq', 'sum_score_correct', 'updated_at',
+        ])
+
+
+def _flags(question, row) -> List[str]:
+    if row.responses < MIN_RESPONSES_FOR_FLAGS:
+        return []
+
+    flags = []
+    if row.difficulty_index >= EASY_THRESHOLD:
+        flags.append('too_easy')
+    elif row.difficulty_index <= HARD_THRESHOLD:
+        flags.append('too_hard')
+    if row.discrimination is not None and row.discrimination < LOW_DISCRIMINATION:
+        flags.append('low_discrimination')
+
+    # A wrong option chosen more often than the right one is probably misleading
+    correct = {str(index) for index in option_indices(question.correct_answers, question.options)}
+    top_correct = max((row.option_counts.get(option, 0) for option in correct), default=0)
+    if any(count > top_correct for option, count in row.option_counts.items() if option not in correct):
+        flags.append('misleading_distractor')
+    return flags
+
+
+def quiz_item_analysis(quiz) -> List[Dict]:
+    """Item-analysis rows for every question of a quiz, in question order"""
+    questions = quiz.questions.select_related('statistics').order_by('order')
+    report = []
+    for question in questions:
+        row = getattr(question, 'statistics', None) or QuestionStatistics(question=question)
+        discrimination = row.discrimination
+        report.append({
+            'question_id': question.id,
+            'order': question.order,
+            'question_text': question.question_text,
+            'question_type': question.question_type,
+            'responses': row.responses,
+            'difficulty_index': round(row.difficulty_index, 3) if row.responses else None,
+            'discrimination': round(discrimination, 3) if discrimination is not None else None,
+            'mean_time_seconds': round(row.mean_time_seconds, 1) if row.responses else None,
+            'option_counts': row.option_counts,
+            'flags': _flags(question, row),
+        })
+    return report
@@ -0,0 +1,174 @@
+"""
+Quiz Leaderboards
+Per-quiz histograms of each user's best score and top-K best-score tables, updated
+incrementally when an attempt completes, so rankings and percentiles never scan
+QuizAttempt. Percentiles compare users, so retrying often does not push others down.
+"""
+
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import QuizAttempt, QuizLeaderboardEntry, QuizScoreHistogram
+
+LEADERBOARD_SIZE = 100
+
+
+def score_bucket(score: float) -> int:
+    bucket = int(score // QuizScoreHistogram.BUCKET_WIDTH)
+    return min(max(bucket, 0), QuizScoreHistogram.BUCKET_COUNT - 1)
+
+
+def _empty_counts() -> List[int]:
+    return [0] * QuizScoreHistogram.BUCKET_COUNT
+
+
+def _beats(score: float, minutes: int, entry: QuizLeaderboardEntry) -> bool:
+    """Higher score wins, a faster attempt breaks ties"""
+    return (score, -minutes) > (entry.best_score, -entry.time_taken_minutes)
+
+
+def _record_histogram(quiz_id, attempts: List, best: Dict[int, object]):
+    """Move each user to the bucket of their new best score; `best` holds their best attempt of the batch"""
+    QuizScoreHistogram.objects.get_or_create(quiz_id=quiz_id, defaults={'counts': _empty_counts()})
+    # Locked before reading earlier bests, so concurrent completions for a user see each other
+    histogram = QuizScoreHistogram.objects.select_for_update().get(quiz_id=quiz_id)
+    if len(histogram.counts) != QuizScoreHistogram.BUCKET_COUNT:
+        histogram.counts = _empty_counts()
+
+    previous = dict(QuizAttempt.objects
+                    .filter(quiz_id=quiz_id, user_id__in=best.keys(), status='completed', completed_at__isnull=False)
+                    .exclude(id__in=[attempt.id for attempt in attempts])
+                    .values('user_id').annotate(best=Max('score_percentage'))
+                    .values_list('user_id', 'best'))
+    for user_id, attempt in best.items():
+        earlier = previous.get(user_id)
+        if earlier is None:
+            histogram.counts[score_bucket(attempt.score_percentage)] += 1
+            histogram.total += 1
+        elif attempt.score_percentage > earlier:
+            histogram.counts[score_bucket(earlier)] -= 1
+            histogram.counts[score_bucket(attempt.score_percentage)] += 1
+    histogram.save(update_fields=['counts', 'total', 'updated_at'])
+
+
+def _record_leaderboard(attempt, size: int):
+    entries = QuizLeaderboardEntry.objects.filter(quiz_id=attempt.quiz_id)
+    score, minutes = attempt.score_percentage, attempt.time_taken_minutes
+
+    entry = entries.select_for_update().filter(user_id=attempt.user_id).first()
+    if entry:
+        if _beats(score, minutes, entry):
+            entry.attempt = attempt
+            entry.best_score = score
+            entry.time_taken_minutes = minutes
+            entry.achieved_at = attempt.completed_at
+            entry.save()
+        return
+
+    cutoff = entries.order_by('-best_score', 'time_taken_minutes', 'achieved_at')[size - 1:size].first()
+    if cutoff and not _beats(score, minutes, cutoff):
+        return
+
+    QuizLeaderboardEntry.objects.create(
+        quiz_id=attempt.quiz_id, user_id=attempt.user_id, attempt=attempt, best_score=score,
+        time_taken_minutes=minutes, achieved_at=attempt.completed_at
+    )
+    if cutoff:
+        # The table grew past its size; drop whoever fell off the end
+        overflow = entries.order_by('-best_score', 'time_taken_minutes', 'achieved_at') \
+                          .values_list('id', flat=True)[size:]
+        QuizLeaderboardEntry.objects.filter(id__in=list(overflow)).delete()
+
+
+def record_attempt_scores(attempts: List, size: int = LEADERBOARD_SIZE):
+    """Fold completed attempts into their quizzes' histograms and leaderboards, once per quiz and user"""
+    by_quiz: Dict[int, List] = {}
+    for attempt in attempts:
+        by_quiz.setdefault(attempt.quiz_id, []).append(attempt)
+
+    with transaction.atomic():
+        for quiz_id, quiz_attempts in by_quiz.items():
+            # Only each user's best attempt of the batch can change their entry
+            best: Dict[int, object] = {}
+            for attempt in quiz_attempts:
+                current = best.get(attempt.user_id)
+                if current is None or (attempt.score_percentage, -attempt.time_taken_minutes) > \
+                        (current.score_percentage, -current.time_taken_minutes):
+                    best[attempt.user_id] = attempt
+            _record_histogram(quiz_id, quiz_attempts, best)
+            for attempt in best.values():
+                _record_leaderboard(attempt, size)
+
+
+def record_attempt_score(attempt, size: int = LEADERBOARD_SIZE):
+    """Fold one completed attempt into its quiz's histogram and leaderboard"""
+    record_attempt_scores([attempt], size)
+
+
+def top_entries(quiz, limit: int = 10) -> List[Dict]:
+    entries = (QuizLeaderboardEntry.objects
+               .filter(quiz=quiz)
+               .select_related('user')
+               .order_by('-best_score', 'time_taken_minutes', 'achieved_at')[:min(limit, LEADERBOARD_SIZE)])
+    return [
+        {
+            'rank': rank,
+            'user_id': entry.user_id,
+            'username': entry.user.username,
+            'best_score': entry.best_score,
+            'time_taken_minutes': entry.time_taken_minutes,
+            'achieved_at': entry.achieved_at,
+        }
+        for rank, entry in enumerate(entries, start=1)
+    ]
+
+
+def score_percentile(quiz, score: float) -> Optional[float]:
+    """Share of users whose best score is below `score`, counting half of its own bucket"""
+    histogram = QuizScoreHistogram.objects.filter(quiz=quiz).first()
+    if not histogram or not histogram.total:
+        return None
+
+    bucket = score_bucket(score)
+    below = sum(histogram.counts[:bucket]) + histogram.counts[bucket] / 2
+    return round(below / histogram.total * 100, 1)
+
+
+def rebuild_leaderboard(quiz, size: int = LEADERBOARD_SIZE) -> int:
+    """Recompute a quiz's histogram and leaderboard from its completed attempts; returns the users ranked"""
+    attempts = QuizAttempt.objects.filter(quiz=quiz, status='completed', completed_at__isnull=False)
+
+    counts = _empty_counts()
+    for score in attempts.values('user_id').annotate(best=Max('score_percentage')).values_list('best', flat=True):
+        counts[score_bucket(score)] += 1
+
+    best, ranked = {}, attempts.order_by('-score_percentage', 'time_taken_minutes', 'completed_at')
+    for attempt in ranked.iterator():
+        if attempt.user_id not in best:
+            best[attempt.user_id] = attempt
+            if len(best) == size:
+                break
+
+    with transaction.atomic():
+        QuizScoreHistogram.objects.update_or_create(quiz=quiz, defaults={'counts': counts, 'total': sum(counts)})
+        QuizLeaderboardEntry.objects.filter(quiz=quiz).delete()
+        QuizLeaderboardEntry.objects.bulk_create([
+            QuizLeaderboardEntry(quiz=quiz, user_id=user_id, attempt=attempt, best_score=attempt.score_percentage,
+                                 time_taken_minutes=attempt.time_taken_minutes, achieved_at=attempt.completed_at)
+            for user_id, attempt in best.items()
+        ])
+    return sum(counts)
+
+
+def user_best_score(quiz, user) -> Optional[float]:
+    """The user's best completed score, from the leaderboard when they are on it"""
+    entry = QuizLeaderboardEntry.objects.filter(quiz=quiz, user=user).first()
+    if entry:
+        return entry.best_score
+    return (QuizAttempt.objects
+            .filter(quiz=quiz, user=user, status='completed')
+            .order_by('-score_percentage')
+            .values_list('score_percentage', flat=True)
+            .first())
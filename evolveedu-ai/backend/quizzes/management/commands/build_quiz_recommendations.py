@@ -0,0 +1,25 @@
+# quizzes/management/commands/build_quiz_recommendations.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from quizzes.recommender import BatchQuizRecommender
+
+
+class Command(BaseCommand):
+    help = 'Recompute quiz recommendations for users with new completed attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild for every user, not only changed ones')
+        parser.add_argument('--top-n', type=int, default=5, help='Recommendations per user')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users scored per NumPy batch')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['all']:
+            user_ids = list(get_user_model().objects.values_list('id', flat=True))
+
+        recommender = BatchQuizRecommender(top_n=options['top_n'], batch_size=options['batch_size'])
+        report = recommender.run(user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {report['recommendations']} recommendations for {report['users']} users"
+        ))
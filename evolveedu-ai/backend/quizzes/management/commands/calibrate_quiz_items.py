@@ -0,0 +1,14 @@
+# quizzes/management/commands/calibrate_quiz_items.py
+from django.core.management.base import BaseCommand
+
+from quizzes.irt import ItemCalibrator
+
+
+class Command(BaseCommand):
+    help = 'Fold responses from newly completed attempts into IRT item parameters'
+
+    def handle(self, *args, **options):
+        report = ItemCalibrator().run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Calibrated {report['items']} questions from {report['responses']} new responses"
+        ))
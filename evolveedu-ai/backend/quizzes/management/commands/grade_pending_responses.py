@@ -0,0 +1,17 @@
+# quizzes/management/commands/grade_pending_responses.py
+from django.core.management.base import BaseCommand
+
+from quizzes.grading import regrade_pending_attempts
+
+
+class Command(BaseCommand):
+    help = 'Retry AI grading of free-text answers left pending review and update the attempt scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Maximum attempts to regrade in this run')
+
+    def handle(self, *args, **options):
+        report = regrade_pending_attempts(options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Regraded {report['attempts']} attempts, {report['graded']} fully graded"
+        ))
@@ -0,0 +1,33 @@
+# quizzes/management/commands/import_questions.py
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.importer import DEFAULT_CHUNK_SIZE, QuestionImporter, detect_format, iter_rows
+from quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Import questions into a quiz from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(id=options['quiz_id'])
+            fmt = detect_format(options['path'], options['format'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f"Quiz {options['quiz_id']} does not exist")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as handle:
+            report = QuestionImporter(quiz, chunk_size=options['chunk_size']).run(iter_rows(handle, fmt))
+
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {error['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} questions into '{quiz.title}', {report['failed']} rows failed"
+        ))
@@ -0,0 +1,38 @@
+# quizzes/management/commands/pregenerate_question_pool.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from quizzes.pregeneration import QuestionPoolScheduler
+
+
+class Command(BaseCommand):
+    help = 'Keep a warm pool of bank questions for the most requested quiz topics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, help='Number of popular topics to keep warm')
+        parser.add_argument('--pool-size', type=int, help='Unused questions to keep per topic')
+        parser.add_argument('--budget', type=int, help='Daily token budget for pre-generation')
+        parser.add_argument('--loop', action='store_true', help='Run forever as a background worker')
+        parser.add_argument('--interval', type=int, default=900, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        scheduler = QuestionPoolScheduler(
+            top_k=options['top_k'],
+            pool_size=options['pool_size'],
+            daily_token_budget=options['budget'],
+        )
+
+        while True:
+            report = scheduler.run_once()
+            self.stdout.write(self.style.SUCCESS(
+                f"Checked {report['topics_checked']} topics, topped up {report['topics_topped_up']}, "
+                f"added {report['questions_added']} questions "
+                f"({report['tokens_spent_today']} tokens spent today)"
+            ))
+            if report['budget_exhausted']:
+                self.stdout.write(self.style.WARNING('Daily token budget exhausted'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+# quizzes/management/commands/rebuild_quiz_leaderboards.py
+from django.core.management.base import BaseCommand
+
+from quizzes.leaderboard import rebuild_leaderboard
+from quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Recompute quiz score histograms and leaderboards from completed attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', dest='quiz_ids',
+                            help='Only rebuild the given quiz id (repeatable)')
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.all()
+        if options['quiz_ids']:
+            quizzes = quizzes.filter(id__in=options['quiz_ids'])
+
+        users = 0
+        for quiz in quizzes.iterator():
+            users += rebuild_leaderboard(quiz)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt leaderboards ranking {users} users'))
@@ -0,0 +1,16 @@
+# quizzes/management/commands/rebuild_quiz_rollups.py
+from django.core.management.base import BaseCommand
+
+from quizzes.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-user quiz analytics rollups from completed attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild the given user id (repeatable)')
+
+    def handle(self, *args, **options):
+        days = rebuild_rollups(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {days} daily rollups'))
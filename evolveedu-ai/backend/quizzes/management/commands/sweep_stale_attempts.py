@@ -0,0 +1,33 @@
+# quizzes/management/commands/sweep_stale_attempts.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from quizzes.sweeper import DEFAULT_ABANDON_AFTER_HOURS, DEFAULT_BATCH_SIZE, StaleAttemptSweeper
+
+
+class Command(BaseCommand):
+    help = 'Finalize expired timed quiz attempts and abandon stale ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--abandon-after', type=int, default=DEFAULT_ABANDON_AFTER_HOURS,
+                            help='Hours after which untimed in-progress attempts are abandoned')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Run forever as a background worker')
+        parser.add_argument('--interval', type=int, default=300, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        sweeper = StaleAttemptSweeper(
+            abandon_after_hours=options['abandon_after'],
+            batch_size=options['batch_size'],
+        )
+
+        while True:
+            report = sweeper.run()
+            self.stdout.write(self.style.SUCCESS(
+                f"Finalized {report['finalized']} expired attempts, abandoned {report['abandoned']}"
+            ))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
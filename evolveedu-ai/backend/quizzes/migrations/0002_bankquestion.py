@@ -0,0 +1,34 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=200)),
+                ('question_text', models.TextField()),
+                ('question_type', models.CharField(choices=[('multiple_choice', 'Multiple Choice'), ('true_false', 'True/False'), ('short_answer', 'Short Answer'), ('essay', 'Essay'), ('fill_blank', 'Fill in the Blank')], default='multiple_choice', max_length=20)),
+                ('difficulty_level', models.CharField(choices=[('beginner', 'Beginner'), ('intermediate', 'Intermediate'), ('advanced', 'Advanced')], default='intermediate', max_length=20)),
+                ('options', models.JSONField(blank=True, default=list)),
+                ('correct_answers', models.JSONField(default=list)),
+                ('explanation', models.TextField(blank=True)),
+                ('hint', models.TextField(blank=True)),
+                ('points', models.IntegerField(default=1)),
+                ('text_hash', models.CharField(max_length=64, unique=True)),
+                ('times_used', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['topic', 'difficulty_level', 'question_type', 'times_used'], name='bank_topic_pool_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0002_bankquestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AITokenUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('tokens_used', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TopicDemand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=200)),
+                ('difficulty_level', models.CharField(choices=[('beginner', 'Beginner'), ('intermediate', 'Intermediate'), ('advanced', 'Advanced')], max_length=20)),
+                ('request_count', models.IntegerField(default=0)),
+                ('last_requested_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-request_count'], name='topic_demand_count_idx')],
+                'unique_together': {('topic', 'difficulty_level')},
+            },
+        ),
+    ]
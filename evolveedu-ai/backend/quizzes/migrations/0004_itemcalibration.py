@@ -0,0 +1,30 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_topicdemand_aitokenusage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemCalibration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responses', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('sum_theta', models.FloatField(default=0.0)),
+                ('sum_theta_sq', models.FloatField(default=0.0)),
+                ('sum_theta_correct', models.FloatField(default=0.0)),
+                ('difficulty', models.FloatField(default=0.0)),
+                ('discrimination', models.FloatField(default=1.0)),
+                ('calibrated_through', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calibration', to='quizzes.question')),
+            ],
+        ),
+    ]
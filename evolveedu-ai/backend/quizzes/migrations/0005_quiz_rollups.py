@@ -0,0 +1,45 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quizzes', '0004_itemcalibration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizUserTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('passes', models.IntegerField(default=0)),
+                ('minutes', models.IntegerField(default=0)),
+                ('category_counts', models.JSONField(blank=True, default=dict)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyQuizRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('attempts', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('passes', models.IntegerField(default=0)),
+                ('minutes', models.IntegerField(default=0)),
+                ('category_counts', models.JSONField(blank=True, default=dict)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quizzes', '0005_quiz_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizScoreHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('counts', models.JSONField(blank=True, default=list)),
+                ('total', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score_histogram', to='quizzes.quiz')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuizLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_score', models.FloatField()),
+                ('time_taken_minutes', models.IntegerField(default=0)),
+                ('achieved_at', models.DateTimeField()),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='quizzes.quizattempt')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='quizzes.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-best_score', 'time_taken_minutes', 'achieved_at'],
+                'indexes': [models.Index(fields=['quiz', '-best_score', 'time_taken_minutes'], name='leaderboard_rank_idx')],
+                'unique_together': {('quiz', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0006_quiz_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['status', 'started_at'], name='attempt_status_started_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0007_attempt_status_started_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responses', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('time_spent_seconds', models.BigIntegerField(default=0)),
+                ('option_counts', models.JSONField(blank=True, default=dict)),
+                ('sum_score', models.FloatField(default=0.0)),
+                ('sum_score_sq', models.FloatField(default=0.0)),
+                ('sum_score_correct', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='quizzes.question')),
+            ],
+            options={
+                'verbose_name_plural': 'Question statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0008_questionstatistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresponse',
+            name='ai_feedback',
+            field=models.TextField(blank=True),
+        ),
+    ]
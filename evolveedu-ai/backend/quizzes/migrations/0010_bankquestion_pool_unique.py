@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0009_quizresponse_ai_feedback'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bankquestion',
+            name='text_hash',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AlterUniqueTogether(
+            name='bankquestion',
+            unique_together={('topic', 'difficulty_level', 'question_type', 'text_hash')},
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:53
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def mark_calibrated_attempts(apps, schema_editor):
+    """Attempts at or before the old completed_at watermark are already in the calibration sums"""
+    ItemCalibration = apps.get_model('quizzes', 'ItemCalibration')
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+    watermark = ItemCalibration.objects.aggregate(latest=Max('calibrated_through'))['latest']
+    if watermark:
+        QuizAttempt.objects.filter(status='completed', completed_at__lte=watermark).update(calibrated=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0010_bankquestion_pool_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='calibrated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['status', 'calibrated'], name='attempt_status_calibrated_idx'),
+        ),
+        migrations.RunPython(mark_calibrated_attempts, migrations.RunPython.noop),
+    ]
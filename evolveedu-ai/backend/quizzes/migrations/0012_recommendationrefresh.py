@@ -0,0 +1,36 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Max
+
+
+def backfill_refreshes(apps, schema_editor):
+    """Users with recommendations were last refreshed when their newest one was written"""
+    QuizRecommendation = apps.get_model('quizzes', 'QuizRecommendation')
+    RecommendationRefresh = apps.get_model('quizzes', 'RecommendationRefresh')
+    RecommendationRefresh.objects.bulk_create([
+        RecommendationRefresh(user_id=row['user_id'], refreshed_at=row['latest'])
+        for row in QuizRecommendation.objects.values('user_id').annotate(latest=Max('created_at'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quizzes', '0011_quizattempt_calibrated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('refreshed_at', models.DateTimeField()),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation_refresh', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_refreshes, migrations.RunPython.noop),
+    ]
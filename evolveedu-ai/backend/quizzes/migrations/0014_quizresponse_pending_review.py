@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-19 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0013_quizattempt_served_question'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresponse',
+            name='pending_review',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.6 on 2026-10-19 15:05
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def rebuild_histograms(apps, schema_editor):
+    """Histograms counted every attempt; recount them from each user's best score"""
+    QuizAttempt = apps.get_model('quizzes', 'QuizAttempt')
+    QuizScoreHistogram = apps.get_model('quizzes', 'QuizScoreHistogram')
+    width, size = 5, 20  # QuizScoreHistogram.BUCKET_WIDTH and BUCKET_COUNT
+    for histogram in QuizScoreHistogram.objects.all():
+        counts = [0] * size
+        best_scores = (QuizAttempt.objects
+                       .filter(quiz_id=histogram.quiz_id, status='completed', completed_at__isnull=False)
+                       .values('user_id').annotate(best=Max('score_percentage')).values_list('best', flat=True))
+        for score in best_scores:
+            counts[min(max(int(score // width), 0), size - 1)] += 1
+        histogram.counts, histogram.total = counts, sum(counts)
+        histogram.save(update_fields=['counts', 'total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0014_quizresponse_pending_review'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_histograms, migrations.RunPython.noop),
+    ]
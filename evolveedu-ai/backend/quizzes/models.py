@@ -1,6 +1,10 @@
 # quizzes/models.py
+from datetime import timedelta
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 import json
 
 User = get_user_model()
@@ -18,6 +22,20 @@ class QuizCategory(models.Model):
         verbose_name_plural = "Quiz Categories"
 
 
+class QuizQuerySet(models.QuerySet):
+    def with_user_stats(self, user):
+        """Annotate the user's attempt count and best completed score on every quiz row"""
+        attempts = QuizAttempt.objects.filter(quiz=models.OuterRef('pk'), user=user)
+        attempt_count = (attempts.order_by().values('quiz')
+                         .annotate(count=models.Count('id')).values('count'))
+        best_score = (attempts.filter(status='completed')
+                      .order_by('-score_percentage').values('score_percentage')[:1])
+        return self.annotate(
+            user_attempt_count=Coalesce(models.Subquery(attempt_count), 0),
+            user_best_score=models.Subquery(best_score),
+        )
+
+
 class Quiz(models.Model):
     DIFFICULTY_CHOICES = [
         ('beginner', 'Beginner'),
@@ -57,15 +75,19 @@ class Quiz(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = QuizQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
     def update_stats(self):
         """Update quiz statistics"""
-        attempts = self.attempts.all()
-        if attempts:
-            self.times_taken = attempts.count()
-            self.average_score = sum([a.score_percentage for a in attempts]) / attempts.count()
+        stats = self.attempts.filter(status='completed').aggregate(
+            count=models.Count('id'), average=models.Avg('score_percentage')
+        )
+        if stats['count']:
+            self.times_taken = stats['count']
+            self.average_score = stats['average']
             self.save(update_fields=['times_taken', 'average_score'])
 
 
@@ -135,11 +157,36 @@ class QuizAttempt(models.Model):
     passed = models.BooleanField(default=False)
     feedback = models.TextField(blank=True)
 
+    # Set once the attempt's responses are folded into ItemCalibration
+    calibrated = models.BooleanField(default=False)
+
+    # Question an adaptive attempt is waiting on; only this one accepts an answer
+    served_question = models.ForeignKey(Question, on_delete=models.SET_NULL, null=True, blank=True,
+                                        related_name='+')
+
+    TIME_LIMIT_GRACE_SECONDS = 30  # Allowance for network latency on the last answer
+
     def __str__(self):
         return f"{self.user.email} - {self.quiz.title} - {self.score_percentage}%"
 
+    @property
+    def deadline(self):
+        """Latest time responses are accepted, or None for untimed quizzes"""
+        if not self.quiz.time_limit_minutes:
+            return None
+        return self.started_at + timedelta(minutes=self.quiz.time_limit_minutes,
+                                           seconds=self.TIME_LIMIT_GRACE_SECONDS)
+
+    def is_expired(self, now=None) -> bool:
+        deadline = self.deadline
+        return deadline is not None and (now or timezone.now()) > deadline
+
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['status', 'started_at'], name='attempt_status_started_idx'),
+            models.Index(fields=['status', 'calibrated'], name='attempt_status_calibrated_idx'),
+        ]
 
 
 class QuizResponse(models.Model):
@@ -153,6 +200,8 @@ class QuizResponse(models.Model):
     # Scoring
     is_correct = models.BooleanField(default=False)
     points_earned = models.IntegerField(default=0)
+    ai_feedback = models.TextField(blank=True)  # Grader feedback for free-text answers
+    pending_review = models.BooleanField(default=False)  # AI grading failed; left out of the score until retried
 
     # Timing
     time_spent_seconds = models.IntegerField(default=0)
@@ -180,4 +229,205 @@ class QuizRecommendation(models.Model):
         return f"Recommend {self.quiz.title} to {self.user.email}"
 
     class Meta:
-        unique_together = ['user', 'quiz']
\ No newline at end of file
+        unique_together = ['user', 'quiz']
+
+
+class RecommendationRefresh(models.Model):
+    """When a user's recommendations were last rebuilt, whether or not any were found"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='recommendation_refresh')
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user.email} - {self.refreshed_at}"
+
+
+class BankQuestion(models.Model):
+    """Generated question kept for reuse by later quizzes on the same topic"""
+    topic = models.CharField(max_length=200)  # Normalized topic key
+    question_text = models.TextField()
+    question_type = models.CharField(max_length=20, choices=Question.QUESTION_TYPES, default='multiple_choice')
+    difficulty_level = models.CharField(max_length=20, choices=Quiz.DIFFICULTY_CHOICES, default='intermediate')
+
+    options = models.JSONField(default=list, blank=True)
+    correct_answers = models.JSONField(default=list)
+    explanation = models.TextField(blank=True)
+    hint = models.TextField(blank=True)
+    points = models.IntegerField(default=1)
+
+    # Dedup and rotation
+    text_hash = models.CharField(max_length=64)  # sha256 of normalized question text, unique per pool
+    times_used = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"[{self.topic}] {self.question_text[:60]}"
+
+    class Meta:
+        # The same question may live in several pools, but only once in each
+        unique_together = ['topic', 'difficulty_level', 'question_type', 'text_hash']
+        indexes = [
+            models.Index(fields=['topic', 'difficulty_level', 'question_type', 'times_used'],
+                         name='bank_topic_pool_idx'),
+        ]
+
+
+class TopicDemand(models.Model):
+    """How often a (topic, difficulty) pair is requested from AI generation"""
+    topic = models.CharField(max_length=200)  # Normalized topic key
+    difficulty_level = models.CharField(max_length=20, choices=Quiz.DIFFICULTY_CHOICES)
+    request_count = models.IntegerField(default=0)
+    last_requested_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.topic} ({self.difficulty_level}) x{self.request_count}"
+
+    class Meta:
+        unique_together = ['topic', 'difficulty_level']
+        indexes = [
+            models.Index(fields=['-request_count'], name='topic_demand_count_idx'),
+        ]
+
+
+class AITokenUsage(models.Model):
+    """Tokens spent per day by background question pre-generation"""
+    date = models.DateField(unique=True)
+    tokens_used = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date}: {self.tokens_used} tokens"
+
+
+class ItemCalibration(models.Model):
+    """2PL item response theory parameters for a question, with the running sums they come from"""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='calibration')
+
+    # Sufficient statistics over graded responses (theta = ability of the responding attempt)
+    responses = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    sum_theta = models.FloatField(default=0.0)
+    sum_theta_sq = models.FloatField(default=0.0)
+    sum_theta_correct = models.FloatField(default=0.0)
+
+    # Estimated parameters
+    difficulty = models.FloatField(default=0.0)  # b
+    discrimination = models.FloatField(default=1.0)  # a
+
+    calibrated_through = models.DateTimeField(null=True, blank=True)  # Latest attempt completion included
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.question} (a={self.discrimination:.2f}, b={self.difficulty:.2f})"
+
+
+class DailyQuizRollup(models.Model):
+    """Per-user per-day totals of completed attempts, backing quiz analytics"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_daily_rollups')
+    date = models.DateField()
+
+    attempts = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    passes = models.IntegerField(default=0)
+    minutes = models.IntegerField(default=0)
+    category_counts = models.JSONField(default=dict, blank=True)  # {category name: attempts}
+
+    def __str__(self):
+        return f"{self.user.email} - {self.date} - {self.attempts} attempts"
+
+    class Meta:
+        unique_together = ['user', 'date']
+        ordering = ['date']
+
+
+class QuizUserTotals(models.Model):
+    """Lifetime totals of completed attempts for a user, same fields as the daily rollup"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='quiz_totals')
+
+    attempts = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    passes = models.IntegerField(default=0)
+    minutes = models.IntegerField(default=0)
+    category_counts = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.user.email} - {self.attempts} attempts"
+
+
+class QuizScoreHistogram(models.Model):
+    """Fixed-width buckets of each user's best completed score, used for percentile ranks"""
+    BUCKET_WIDTH = 5  # Percentage points per bucket
+    BUCKET_COUNT = 20
+
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, related_name='score_histogram')
+    counts = models.JSONField(default=list, blank=True)  # Users per bucket, 100% falls in the last one
+    total = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.total} users"
+
+
+class QuizLeaderboardEntry(models.Model):
+    """Best completed attempt per user, kept for the top scorers of a quiz only"""
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_leaderboard_entries')
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='+')
+    best_score = models.FloatField()
+    time_taken_minutes = models.IntegerField(default=0)
+    achieved_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.quiz.title} - {self.user.email} - {self.best_score}%"
+
+    class Meta:
+        unique_together = ['quiz', 'user']
+        ordering = ['-best_score', 'time_taken_minutes', 'achieved_at']
+        indexes = [
+            models.Index(fields=['quiz', '-best_score', 'time_taken_minutes'], name='leaderboard_rank_idx'),
+        ]
+
+
+class QuestionStatistics(models.Model):
+    """Running item-analysis sums per question, updated when attempts are graded"""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='statistics')
+
+    responses = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    time_spent_seconds = models.BigIntegerField(default=0)
+    option_counts = models.JSONField(default=dict, blank=True)  # {option index: times selected}
+
+    # Point-biserial inputs, using the attempt's score (0-1) as the total score
+    sum_score = models.FloatField(default=0.0)
+    sum_score_sq = models.FloatField(default=0.0)
+    sum_score_correct = models.FloatField(default=0.0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.question} - {self.responses} responses"
+
+    @property
+    def difficulty_index(self):
+        """Proportion of correct responses (p-value)"""
+        return self.correct / self.responses if self.responses else None
+
+    @property
+    def mean_time_seconds(self):
+        return self.time_spent_seconds / self.responses if self.responses else None
+
+    @property
+    def discrimination(self):
+        """Point-biserial correlation between answering correctly and the attempt score"""
+        if not self.correct or self.correct == self.responses:
+            return None
+        n = self.responses
+        mean = self.sum_score / n
+        variance = self.sum_score_sq / n - mean ** 2
+        if variance <= 1e-12:
+            return None
+        p = self.correct / n
+        mean_correct = self.sum_score_correct / self.correct
+        return (mean_correct - mean) / variance ** 0.5 * (p / (1 - p)) ** 0.5
+
+    class Meta:
+        verbose_name_plural = "Question statistics"
@@ -0,0 +1,208 @@
+"""
+Note Context Selection
+Builds a compact prompt context for quizzes generated from several notes. Notes are
+split into chunks, chunks are ranked by TF-IDF similarity to and term coverage of
+each note's key points, and the best chunks are packed into a token budget round
+robin across notes so every note is represented. Questions are then spread over the
+notes in proportion to the context each contributes.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+CHUNK_WORDS = 150
+DEFAULT_TOKEN_BUDGET = 2500
+SIMILARITY_WEIGHT = 0.7
+COVERAGE_WEIGHT = 0.3
+
+STOPWORDS = {
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'any', 'can', 'had', 'her', 'was', 'one',
+    'our', 'out', 'has', 'his', 'how', 'its', 'may', 'new', 'now', 'see', 'two', 'who', 'did', 'get',
+    'that', 'with', 'have', 'this', 'will', 'your', 'from', 'they', 'been', 'were', 'which', 'their',
+    'there', 'what', 'about', 'would', 'these', 'other', 'into', 'more', 'some', 'than', 'then',
+    'them', 'also', 'such', 'when', 'where', 'each', 'only', 'very', 'just', 'like', 'over',
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in re.findall(r'[a-z0-9]+', (text or '').lower())
+            if len(word) > 2 and word not in STOPWORDS]
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS) -> List[str]:
+    """Split text into chunks of whole sentences or lines of roughly `chunk_words` words.
+
+    A sentence or line longer than `chunk_words` (a list with no full stops) is cut at
+    that many words, so no chunk is ever too big to pack.
+    """
+    pieces = []
+    for sentence in re.split(r'(?<=[.!?])\s+|\n+', (text or '').strip()):
+        words = sentence.split()
+        pieces += [words[i:i + chunk_words] for i in range(0, len(words), chunk_words)]
+
+    chunks, current = [], []
+    for words in pieces:
+        if current and len(current) + len(words) > chunk_words:
+            chunks.append(' '.join(current))
+            current = []
+        current += words
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+@dataclass
+class NoteSource:
+    """A note reduced to what context selection needs"""
+    title: str
+    content: str
+    key_points: List[str] = field(default_factory=list)
+    note_id: int = None
+
+    @classmethod
+    def from_note(cls, note) -> 'NoteSource':
+        if isinstance(note, str):
+            return cls(title='', content=note)
+        key_points = [str(point) for point in (note.key_points or [])] or [note.summary or '']
+        return cls(title=note.title, content=note.content, key_points=key_points, note_id=note.id)
+
+
+@dataclass
+class Chunk:
+    source: int
+    index: int
+    text: str
+    terms: Counter
+    score: float = 0.0
+
+
+def _tfidf(terms: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+    vector = {term: count * idf[term] for term, count in terms.items() if term in idf}
+    norm = math.sqrt(sum(weight ** 2 for weight in vector.values())) or 1.0
+    return {term: weight / norm for term, weight in vector.items()}
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+
+def rank_chunks(sources: List[NoteSource]) -> List[List[Chunk]]:
+    """Chunks of every source, best first"""
+    chunks = [
+        [Chunk(source=s, index=i, text=text, terms=Counter(tokenize(text)))
+         for i, text in enumerate(chunk_text(source.content))]
+        for s, source in enumerate(sources)
+    ]
+    all_chunks = [chunk for source_chunks in chunks for chunk in source_chunks]
+    document_frequency = Counter(term for chunk in all_chunks for term in chunk.terms)
+    total = len(all_chunks)
+    idf = {term: math.log((1 + total) / (1 + df)) + 1.0 for term, df in document_frequency.items()}
+
+    for source, source_chunks in zip(sources, chunks):
+        vectors = [_tfidf(chunk.terms, idf) for chunk in source_chunks]
+        query_terms = Counter(tokenize(' '.join([source.title] + source.key_points)))
+        if not query_terms:
+            # No key points: prefer the chunks most representative of the whole note
+            query_terms = sum((chunk.terms for chunk in source_chunks), Counter())
+        query = _tfidf(query_terms, idf)
+
+        for chunk, vector in zip(source_chunks, vectors):
+            coverage = sum(1 for term in query_terms if term in chunk.terms) / max(len(query_terms), 1)
+            chunk.score = SIMILARITY_WEIGHT * _cosine(vector, query) + COVERAGE_WEIGHT * coverage
+        source_chunks.sort(key=lambda chunk: chunk.score, reverse=True)
+    return chunks
+
+
+def pack_chunks(ranked: List[List[Chunk]], token_budget: int) -> List[List[Chunk]]:
+    """Take each source's next best chunk in turn until the budget is used up"""
+    selected = [[] for _ in ranked]
+    pending = [list(source_chunks) for source_chunks in ranked]
+    remaining = token_budget
+
+    while any(pending):
+        for s, source_chunks in enumerate(pending):
+            while source_chunks:
+                chunk = source_chunks.pop(0)
+                cost = estimate_tokens(chunk.text)
+                if cost <= remaining:
+                    selected[s].append(chunk)
+                    remaining -= cost
+                    break
+    for source_chunks in selected:
+        source_chunks.sort(key=lambda chunk: chunk.index)
+    return selected
+
+
+def allocate_questions(weights: List[int], question_count: int) -> List[int]:
+    """Largest-remainder split of questions, giving every weighted source at least one when possible"""
+    active = sorted((i for i, weight in enumerate(weights) if weight > 0), key=lambda i: -weights[i])
+    counts = [0] * len(weights)
+    if question_count <= 0 or not active:
+        return counts
+    if question_count <= len(active):
+        for i in active[:question_count]:
+            counts[i] = 1
+        return counts
+
+    for i in active:
+        counts[i] = 1
+    remaining = question_count - len(active)
+    total = sum(weights[i] for i in active)
+    shares = {i: remaining * weights[i] / total for i in active}
+    for i in active:
+        counts[i] += int(shares[i])
+    leftover = question_count - sum(counts)
+    for i in sorted(active, key=lambda i: shares[i] - int(shares[i]), reverse=True)[:leftover]:
+        counts[i] += 1
+    return counts
+
+
+@dataclass
+class NoteSection:
+    source: NoteSource
+    excerpt: str
+    question_count: int
+
+
+def build_note_sections(notes, question_count: int, token_budget: int = DEFAULT_TOKEN_BUDGET) -> List[NoteSection]:
+    """Select context from every note and decide how many questions each note gets"""
+    sources = [NoteSource.from_note(note) for note in notes]
+    selected = pack_chunks(rank_chunks(sources), token_budget)
+    excerpts = [' '.join(chunk.text for chunk in chunks) for chunks in selected]
+    counts = allocate_questions([estimate_tokens(excerpt) if excerpt else 0 for excerpt in excerpts],
+                                question_count)
+    return [
+        NoteSection(source=source, excerpt=excerpt, question_count=count)
+        for source, excerpt, count in zip(sources, excerpts, counts)
+        if excerpt and count
+    ]
+
+
+def build_notes_prompt(sections: List[NoteSection], difficulty: str) -> str:
+    total = sum(section.question_count for section in sections)
+    blocks = '\n\n'.join(
+        f'Source {i} "{section.source.title or f"Note {i}"}" ({section.question_count} questions):\n{section.excerpt}'
+        for i, section in enumerate(sections, start=1)
+    )
+    return f"""Generate {total} multiple choice quiz questions at {difficulty} difficulty from the study notes below.
+Take the stated number of questions from each source and base every answer only on that source's text.
+
+{blocks}
+
+Respond with JSON only:
+{{
+    "questions": [
+        {{"question_text": "Question?", "options": ["A", "B", "C", "D"], "correct_answers": [0], "explanation": "Why the answer is correct", "source": 1, "points": 1}}
+    ]
+}}
+Every question must test a different fact or idea. Answer indices are zero-based.
+"""
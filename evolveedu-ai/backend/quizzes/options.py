@@ -0,0 +1,25 @@
+"""
+Answer Options
+Maps stored or submitted answers onto question option indices; shared by grading
+and item analysis.
+"""
+
+from typing import Iterable, List, Set
+
+
+def option_indices(values: Iterable, options: List) -> Set[int]:
+    """Map answers given as indices, numeric strings or option text onto option indices"""
+    lowered = [str(option).strip().lower() for option in options or []]
+    indices = set()
+    for value in values or []:
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        if isinstance(value, int):
+            indices.add(value)
+            continue
+        text = str(value).strip().lower()
+        if text.lstrip('-').isdigit():
+            indices.add(int(text))
+        elif text in lowered:
+            indices.add(lowered.index(text))
+    return indices
@@ -0,0 +1,162 @@
+"""
+Background Question Pre-generation
+Tracks which (topic, difficulty) pairs users ask the AI for and keeps a warm pool
+of bank questions for the most popular ones, within a daily token budget.
+"""
+
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .generation import MAX_TOKENS_PER_BATCH, QUESTIONS_PER_BATCH, ChunkedQuizGenerator, split_by_type
+from .models import AITokenUsage, BankQuestion, TopicDemand
+from .question_bank import QuestionBank, normalize_topic
+
+DEFAULT_CONFIG = {
+    'TOP_K_TOPICS': 20,
+    'POOL_SIZE_PER_TOPIC': 30,
+    'DAILY_TOKEN_BUDGET': 200000,
+    'QUESTION_TYPES': ['multiple_choice', 'true_false'],
+    'DEMAND_WINDOW_DAYS': 30,
+}
+
+# Worst-case cost of one generated question: a full batch completion plus its prompt, per question
+PROMPT_TOKENS_PER_BATCH = 500
+TOKENS_PER_QUESTION = (MAX_TOKENS_PER_BATCH + PROMPT_TOKENS_PER_BATCH) // QUESTIONS_PER_BATCH
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, 'QUIZ_PREGENERATION', {})}
+
+
+def record_topic_request(topic: str, difficulty: str):
+    """Count one generation request for a topic; cheap enough for the request path"""
+    topic_key = normalize_topic(topic)
+    now = timezone.now()
+    demand = TopicDemand.objects.filter(topic=topic_key, difficulty_level=difficulty)
+
+    if demand.update(request_count=F('request_count') + 1, last_requested_at=now):
+        return
+    try:
+        with transaction.atomic():
+            TopicDemand.objects.create(topic=topic_key, difficulty_level=difficulty, request_count=1)
+    except IntegrityError:
+        # Another request created the row first
+        demand.update(request_count=F('request_count') + 1, last_requested_at=now)
+
+
+class QuestionPoolScheduler:
+    """Tops up the question bank for the top-K requested topics"""
+
+    def __init__(self, top_k: int = None, pool_size: int = None, daily_token_budget: int = None,
+                 service=None):
+        config = get_config()
+        self.top_k = top_k or config['TOP_K_TOPICS']
+        self.pool_size = pool_size or config['POOL_SIZE_PER_TOPIC']
+        self.daily_token_budget = daily_token_budget or config['DAILY_TOKEN_BUDGET']
+        self.question_types = config['QUESTION_TYPES']
+        self.demand_window = timedelta(days=config['DEMAND_WINDOW_DAYS'])
+        self._service = service
+
+    @property
+    def service(self):
+        if self._service is None:
+            from .ai_service import QuizAIService
+            self._service = QuizAIService()
+        return self._service
+
+    def popular_topics(self) -> List[TopicDemand]:
+        return list(
+            TopicDemand.objects
+            .filter(last_requested_at__gte=timezone.now() - self.demand_window)
+            .order_by('-request_count', '-last_requested_at')[:self.top_k]
+        )
+
+    def tokens_spent_today(self) -> int:
+        usage = AITokenUsage.objects.filter(date=timezone.now().date()).first()
+        return usage.tokens_used if usage else 0
+
+    def _charge(self, tokens: int):
+        if tokens <= 0:
+            return
+        usage, _ = AITokenUsage.objects.get_or_create(date=timezone.now().date())
+        AITokenUsage.objects.filter(id=usage.id).update(tokens_used=F('tokens_used') + tokens)
+
+    def pool_deficit(self, demand: TopicDemand) -> Dict[str, int]:
+        """Questions missing per type to reach the target pool size (unused questions only)"""
+        targets = split_by_type(self.pool_size, self.question_types)
+        deficit = {}
+        for question_type, target in targets.items():
+            unused = BankQuestion.objects.filter(
+                topic=demand.topic, difficulty_level=demand.difficulty_level,
+                question_type=question_type, times_used=0
+            ).count()
+            if unused < target:
+                deficit[question_type] = target - unused
+        return deficit
+
+    def top_up(self, demand: TopicDemand, token_budget: int = None) -> int:
+        """Generate and bank the missing questions for one topic, returning how many were added.
+
+        With a token budget only as many questions as it affords are requested, and
+        generation stops once the tokens actually spent reach it.
+        """
+        deficit = self.pool_deficit(demand)
+        if token_budget is not None:
+            affordable = split_by_type(token_budget // TOKENS_PER_QUESTION, list(deficit))
+            deficit = {question_type: min(count, affordable[question_type])
+                       for question_type, count in deficit.items() if affordable[question_type]}
+        if not deficit:
+            return 0
+
+        generator = ChunkedQuizGenerator(
+            topic=demand.topic,
+            difficulty=demand.difficulty_level,
+            question_count=sum(deficit.values()),
+            question_types=list(deficit),
+            service=self.service,
+            type_counts=deficit,
+        )
+        generator.seed(list(
+            BankQuestion.objects
+            .filter(topic=demand.topic, difficulty_level=demand.difficulty_level)
+            .order_by('-created_at')
+            .values_list('question_text', flat=True)[:200]
+        ))
+
+        tokens_before = self.service.tokens_used
+        added = 0
+        for batch in generator.stream():
+            added += QuestionBank.store(demand.topic, demand.difficulty_level, batch, times_used=0)
+            if token_budget is not None and self.service.tokens_used - tokens_before >= token_budget:
+                break
+        self._charge(self.service.tokens_used - tokens_before)
+        return added
+
+    def run_once(self) -> Dict:
+        """One scheduling pass over the most popular topics"""
+        report = {
+            'topics_checked': 0,
+            'topics_topped_up': 0,
+            'questions_added': 0,
+            'tokens_spent_today': self.tokens_spent_today(),
+            'budget_exhausted': False,
+        }
+
+        for demand in self.popular_topics():
+            if report['tokens_spent_today'] >= self.daily_token_budget:
+                report['budget_exhausted'] = True
+                break
+
+            report['topics_checked'] += 1
+            added = self.top_up(demand, self.daily_token_budget - report['tokens_spent_today'])
+            if added:
+                report['topics_topped_up'] += 1
+                report['questions_added'] += added
+            report['tokens_spent_today'] = self.tokens_spent_today()
+
+        return report
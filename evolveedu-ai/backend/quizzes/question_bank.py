@@ -0,0 +1,90 @@
+"""
+Question Bank
+Stores AI-generated questions by normalized text hash and hands them out again
+for later quizzes on the same topic, difficulty and question type.
+"""
+
+import hashlib
+from typing import Dict, List
+
+from django.db.models import F
+
+from .generation import normalize_question_text
+from .models import BankQuestion
+
+QUESTION_FIELDS = ('question_text', 'question_type', 'options', 'correct_answers',
+                   'explanation', 'hint', 'points', 'difficulty_level')
+
+
+def normalize_topic(topic: str) -> str:
+    """Topic key shared by 'Python Basics', 'python basics ' and 'Python  basics'"""
+    return ' '.join((topic or '').lower().split())[:200]
+
+
+def question_hash(question_text: str) -> str:
+    return hashlib.sha256(normalize_question_text(question_text).encode('utf-8')).hexdigest()
+
+
+class QuestionBank:
+    """Draws reusable questions per topic pool and stores newly generated ones"""
+
+    @classmethod
+    def available(cls, topic: str, difficulty: str, question_type: str = None) -> int:
+        queryset = BankQuestion.objects.filter(topic=normalize_topic(topic), difficulty_level=difficulty)
+        if question_type:
+            queryset = queryset.filter(question_type=question_type)
+        return queryset.count()
+
+    @classmethod
+    def draw(cls, topic: str, difficulty: str, type_counts: Dict[str, int]) -> List[Dict]:
+        """Take up to the requested number of questions per type, least used first"""
+        topic_key = normalize_topic(topic)
+        drawn = []
+        for question_type, count in type_counts.items():
+            if count <= 0:
+                continue
+            rows = list(
+                BankQuestion.objects
+                .filter(topic=topic_key, difficulty_level=difficulty, question_type=question_type)
+                .order_by('times_used', 'id')
+                .values('id', *QUESTION_FIELDS)[:count]
+            )
+            drawn.extend(rows)
+
+        if drawn:
+            BankQuestion.objects.filter(id__in=[row['id'] for row in drawn]).update(times_used=F('times_used') + 1)
+
+        return [{field: row[field] for field in QUESTION_FIELDS} for row in drawn]
+
+    @classmethod
+    def store(cls, topic: str, difficulty: str, questions: List[Dict], times_used: int = 1) -> int:
+        """Add generated questions to the bank, skipping ones already in the same pool"""
+        topic_key = normalize_topic(topic)
+        rows = {}
+        for question in questions:
+            text_hash = question_hash(question['question_text'])
+            rows[question['question_type'], text_hash] = BankQuestion(
+                topic=topic_key,
+                text_hash=text_hash,
+                times_used=times_used,
+                **{field: question[field] for field in QUESTION_FIELDS if field != 'difficulty_level'},
+                difficulty_level=difficulty,
+            )
+        if not rows:
+            return 0
+
+        existing = set(BankQuestion.objects
+                       .filter(topic=topic_key, difficulty_level=difficulty,
+                               text_hash__in=[text_hash for _, text_hash in rows])
+                       .values_list('question_type', 'text_hash'))
+        new_rows = [row for key, row in rows.items() if key not in existing]
+        BankQuestion.objects.bulk_create(new_rows, ignore_conflicts=True)
+        return len(new_rows)
+
+    @classmethod
+    def shortfall(cls, requested: Dict[str, int], drawn: List[Dict]) -> Dict[str, int]:
+        """Per-type counts still missing after a draw"""
+        missing = dict(requested)
+        for question in drawn:
+            missing[question['question_type']] = missing.get(question['question_type'], 0) - 1
+        return {question_type: count for question_type, count in missing.items() if count > 0}
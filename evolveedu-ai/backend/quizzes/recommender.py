@@ -0,0 +1,185 @@
+"""
+Batch Quiz Recommender
+Builds a user x category performance matrix with NumPy, scores every candidate quiz
+for a batch of users in one vectorized pass and stores the top-N recommendations.
+Runs offline (see `manage.py build_quiz_recommendations`) instead of on quiz submit.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+
+from .models import Quiz, QuizAttempt, QuizRecommendation, RecommendationRefresh
+
+User = get_user_model()
+
+DIFFICULTY_RANK = {'beginner': 0, 'intermediate': 1, 'advanced': 2}
+
+# Score weights
+CATEGORY_WEIGHT = 0.6
+DIFFICULTY_WEIGHT = 0.3
+POPULARITY_WEIGHT = 0.1
+EXPLORATION_SCORE = 0.3  # Category score for categories the user has not tried yet
+
+
+class BatchQuizRecommender:
+    """Vectorized quiz recommendations for many users at once"""
+
+    def __init__(self, top_n: int = 5, batch_size: int = 500):
+        self.top_n = top_n
+        self.batch_size = batch_size
+
+    @staticmethod
+    def users_needing_refresh() -> List[int]:
+        """Users with a completed attempt newer than their last refresh"""
+        return list(
+            User.objects
+            .annotate(
+                last_completed=Max('quiz_attempts__completed_at',
+                                   filter=Q(quiz_attempts__status='completed')),
+                last_refreshed=F('recommendation_refresh__refreshed_at'),
+            )
+            .filter(last_completed__isnull=False)
+            .filter(Q(last_refreshed__isnull=True) | Q(last_completed__gt=F('last_refreshed')))
+            .values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def _load_candidates():
+        rows = list(
+            Quiz.objects.filter(is_public=True)
+            .values_list('id', 'category_id', 'category__name', 'difficulty_level', 'times_taken')
+        )
+        if not rows:
+            return None
+
+        quiz_ids = np.array([row[0] for row in rows])
+        category_ids = sorted({row[1] for row in rows})
+        category_index = {category_id: i for i, category_id in enumerate(category_ids)}
+        return {
+            'quiz_ids': quiz_ids,
+            'quiz_index': {quiz_id: i for i, quiz_id in enumerate(quiz_ids.tolist())},
+            'quiz_category': np.array([category_index[row[1]] for row in rows]),
+            'quiz_difficulty': np.array([DIFFICULTY_RANK.get(row[3], 1) for row in rows]),
+            'popularity': np.log1p(np.array([row[4] for row in rows], dtype=float)),
+            'category_ids': category_ids,
+            'category_index': category_index,
+            'category_names': {row[1]: row[2] for row in rows},
+        }
+
+    def _score_batch(self, user_ids: List[int], candidates: Dict) -> Dict[int, List[Dict]]:
+        user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+        n_users, n_categories = len(user_ids), len(candidates['category_ids'])
+        n_quizzes = len(candidates['quiz_ids'])
+
+        # User x category performance matrix
+        mean_score = np.zeros((n_users, n_categories))
+        attempt_count = np.zeros((n_users, n_categories))
+        overall_sum = np.zeros(n_users)
+        overall_count = np.zeros(n_users)
+
+        stats = (QuizAttempt.objects
+                 .filter(user_id__in=user_ids, status='completed')
+                 .values('user_id', 'quiz__category_id')
+                 .annotate(avg_score=Avg('score_percentage'), attempts=Count('id')))
+        for row in stats:
+            u = user_index[row['user_id']]
+            overall_sum[u] += row['avg_score'] * row['attempts']
+            overall_count[u] += row['attempts']
+            c = candidates['category_index'].get(row['quiz__category_id'])
+            if c is not None:
+                mean_score[u, c] = row['avg_score']
+                attempt_count[u, c] = row['attempts']
+
+        # Quizzes already attempted or recommendations dismissed are never recommended again
+        excluded = np.zeros((n_users, n_quizzes), dtype=bool)
+        seen_pairs = set(QuizAttempt.objects.filter(user_id__in=user_ids)
+                         .values_list('user_id', 'quiz_id').distinct())
+        seen_pairs |= set(QuizRecommendation.objects.filter(user_id__in=user_ids, is_dismissed=True)
+                          .values_list('user_id', 'quiz_id'))
+        for user_id, quiz_id in seen_pairs:
+            q = candidates['quiz_index'].get(quiz_id)
+            if q is not None:
+                excluded[user_index[user_id], q] = True
+
+        # Weak categories score high, untried categories get a fixed exploration score
+        tried = attempt_count > 0
+        category_score = np.where(tried, (100.0 - mean_score) / 100.0, EXPLORATION_SCORE)
+
+        # Target difficulty from the user's overall average: <60 beginner, <80 intermediate, else advanced
+        overall_avg = np.divide(overall_sum, overall_count, out=np.zeros(n_users), where=overall_count > 0)
+        target_difficulty = np.digitize(overall_avg, [60.0, 80.0])
+        difficulty_fit = 1.0 - np.abs(candidates['quiz_difficulty'][None, :] - target_difficulty[:, None]) / 2.0
+
+        popularity = candidates['popularity']
+        if popularity.max() > 0:
+            popularity = popularity / popularity.max()
+
+        scores = (CATEGORY_WEIGHT * category_score[:, candidates['quiz_category']]
+                  + DIFFICULTY_WEIGHT * difficulty_fit
+                  + POPULARITY_WEIGHT * popularity[None, :])
+        scores[excluded] = -np.inf
+
+        top_n = min(self.top_n, n_quizzes)
+        top = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+
+        results = {}
+        for u, user_id in enumerate(user_ids):
+            picks = sorted(top[u], key=lambda q: -scores[u, q])
+            results[user_id] = []
+            for q in picks:
+                if not np.isfinite(scores[u, q]):
+                    continue
+                c = candidates['quiz_category'][q]
+                category_name = candidates['category_names'][candidates['category_ids'][c]]
+                if tried[u, c]:
+                    reason = f"Strengthen {category_name}: your average there is {mean_score[u, c]:.0f}%"
+                else:
+                    reason = f"Explore {category_name}, a category you have not tried yet"
+                results[user_id].append({
+                    'quiz_id': int(candidates['quiz_ids'][q]),
+                    'confidence_score': round(float(np.clip(scores[u, q], 0.0, 1.0)), 3),
+                    'reason': reason,
+                })
+        return results
+
+    def _write(self, results: Dict[int, List[Dict]], refreshed_at) -> int:
+        """Replace open recommendations and stamp every user as refreshed; returns rows inserted"""
+        user_ids = list(results)
+        with transaction.atomic():
+            recommendations = QuizRecommendation.objects.filter(user_id__in=user_ids)
+            recommendations.filter(is_dismissed=False, is_taken=False).delete()
+            # ignore_conflicts hides skipped rows from bulk_create's result, so count before and after
+            kept = recommendations.count()
+            QuizRecommendation.objects.bulk_create([
+                QuizRecommendation(user_id=user_id, quiz_id=pick['quiz_id'],
+                                   reason=pick['reason'], confidence_score=pick['confidence_score'])
+                for user_id, picks in results.items()
+                for pick in picks
+            ], ignore_conflicts=True)
+            RecommendationRefresh.objects.bulk_create(
+                [RecommendationRefresh(user_id=user_id, refreshed_at=refreshed_at) for user_id in user_ids],
+                update_conflicts=True, unique_fields=['user'], update_fields=['refreshed_at'],
+            )
+            return recommendations.count() - kept
+
+    def run(self, user_ids: Optional[List[int]] = None) -> Dict:
+        """Recompute recommendations for the given users, or for every user with new attempts"""
+        if user_ids is None:
+            user_ids = self.users_needing_refresh()
+
+        report = {'users': len(user_ids), 'recommendations': 0}
+        refreshed_at = timezone.now()  # Attempts completed while this runs are picked up next time
+        candidates = self._load_candidates()
+        if not user_ids:
+            return report
+
+        for start in range(0, len(user_ids), self.batch_size):
+            batch = user_ids[start:start + self.batch_size]
+            results = self._score_batch(batch, candidates) if candidates else {user_id: [] for user_id in batch}
+            report['recommendations'] += self._write(results, refreshed_at)
+        return report
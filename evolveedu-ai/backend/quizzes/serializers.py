@@ -1,4 +1,5 @@
 # quizzes/serializers.py
+from django.db import transaction
 from rest_framework import serializers
 from .models import Quiz, Question, QuizAttempt, QuizResponse, QuizCategory, QuizRecommendation
 
@@ -24,6 +25,22 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
         exclude = ['quiz', 'created_at']
 
 
+class QuestionImportSerializer(QuestionCreateSerializer):
+    """Stricter row checks for bulk imports, where rows come from hand-edited files"""
+
+    def validate(self, data):
+        question_type = data.get('question_type', 'multiple_choice')
+        if question_type in ('multiple_choice', 'true_false'):
+            if not data.get('options') and question_type == 'multiple_choice':
+                raise serializers.ValidationError({'options': 'Multiple choice questions need options'})
+            if not data.get('correct_answers'):
+                raise serializers.ValidationError({'correct_answers': 'Choice questions need a correct answer'})
+        for field in ('options', 'correct_answers'):
+            if field in data and not isinstance(data[field], list):
+                raise serializers.ValidationError({field: 'Must be a list'})
+        return data
+
+
 class QuizSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -57,12 +74,16 @@ class QuizListSerializer(serializers.ModelSerializer):
                   'created_at']
 
     def get_user_attempts(self, obj):
+        if hasattr(obj, 'user_attempt_count'):
+            return obj.user_attempt_count
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.attempts.filter(user=request.user).count()
         return 0
 
     def get_user_best_score(self, obj):
+        if hasattr(obj, 'user_attempt_count'):
+            return obj.user_best_score
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             best_attempt = obj.attempts.filter(user=request.user, status='completed').order_by(
@@ -79,16 +100,16 @@ class QuizCreateSerializer(serializers.ModelSerializer):
         exclude = ['created_by', 'created_at', 'updated_at', 'total_questions',
                    'average_score', 'times_taken']
 
+    @transaction.atomic
     def create(self, validated_data):
         questions_data = validated_data.pop('questions_data', [])
+        validated_data['total_questions'] = len(questions_data)
         quiz = Quiz.objects.create(**validated_data)
 
-        for i, question_data in enumerate(questions_data):
-            question_data['order'] = i + 1
-            Question.objects.create(quiz=quiz, **question_data)
-
-        quiz.total_questions = len(questions_data)
-        quiz.save()
+        Question.objects.bulk_create([
+            Question(quiz=quiz, **{**question_data, 'order': i + 1})
+            for i, question_data in enumerate(questions_data)
+        ])
 
         return quiz
 
@@ -97,7 +118,7 @@ class QuizResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizResponse
         fields = '__all__'
-        read_only_fields = ['attempt', 'is_correct', 'points_earned', 'answered_at']
+        read_only_fields = ['attempt', 'is_correct', 'points_earned', 'ai_feedback', 'pending_review', 'answered_at']
 
 
 class QuizAttemptSerializer(serializers.ModelSerializer):
@@ -145,4 +166,12 @@ class GenerateQuizRequestSerializer(serializers.Serializer):
         default=['multiple_choice']
     )
     category_id = serializers.IntegerField(required=False)
-    time_limit = serializers.IntegerField(required=False, min_value=1)  # in minutes
\ No newline at end of file
+    time_limit = serializers.IntegerField(required=False, min_value=1)  # in minutes
+
+
+class GenerateQuizFromNotesSerializer(serializers.Serializer):
+    note_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=50)
+    difficulty = serializers.ChoiceField(choices=Quiz.DIFFICULTY_CHOICES, default='intermediate')
+    question_count = serializers.IntegerField(min_value=1, max_value=50, default=10)
+    category_id = serializers.IntegerField(required=False)
+    time_limit = serializers.IntegerField(required=False, min_value=1)  # in minutes
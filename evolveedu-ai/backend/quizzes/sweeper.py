@@ -0,0 +1,78 @@
+"""
+Stale Attempt Sweeper
+Closes attempts nobody will finish: expired timed attempts with answers are graded
+as of their deadline, everything else that expired or went stale is abandoned.
+Works in batches with one UPDATE per batch.
+"""
+
+from datetime import timedelta
+from typing import Dict, List
+
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .grading import finalize_attempts
+from .models import QuizAttempt, QuizResponse
+
+DEFAULT_ABANDON_AFTER_HOURS = 24
+DEFAULT_BATCH_SIZE = 500
+
+
+class StaleAttemptSweeper:
+    """Finalizes or abandons in-progress attempts past their deadline"""
+
+    def __init__(self, abandon_after_hours: int = DEFAULT_ABANDON_AFTER_HOURS,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.abandon_after = timedelta(hours=abandon_after_hours)
+        self.batch_size = batch_size
+
+    def classify(self, now) -> Dict[str, Dict[int, object]]:
+        """Split expired attempts into {id: completion time} maps to finalize or abandon"""
+        grace = timedelta(seconds=QuizAttempt.TIME_LIMIT_GRACE_SECONDS)
+        in_progress = QuizAttempt.objects.filter(status='in_progress')
+
+        # Quizzes use a handful of time limits, so each gets its own started_at cutoff and
+        # the database returns only attempts past their deadline
+        limits = (in_progress.filter(quiz__time_limit_minutes__gt=0).order_by()
+                  .values_list('quiz__time_limit_minutes', flat=True).distinct())
+        past_deadline = Q(pk__in=[])
+        for limit in limits:
+            past_deadline |= Q(quiz__time_limit_minutes=limit,
+                               started_at__lt=now - timedelta(minutes=limit) - grace)
+        expired = (in_progress.filter(past_deadline)
+                   .annotate(answered=Exists(QuizResponse.objects.filter(attempt=OuterRef('pk'))))
+                   .order_by('started_at')
+                   .values_list('id', 'started_at', 'quiz__time_limit_minutes', 'answered'))
+
+        # Timed attempts close at their deadline, graded if anything was answered
+        finalize, abandon = {}, {}
+        for attempt_id, started_at, limit, answered in expired.iterator():
+            (finalize if answered else abandon)[attempt_id] = started_at + timedelta(minutes=limit) + grace
+
+        # Anything else left open past abandon_after is abandoned now
+        stale = (in_progress.filter(started_at__lt=now - self.abandon_after).exclude(past_deadline)
+                 .order_by('started_at').values_list('id', flat=True))
+        for attempt_id in stale.iterator():
+            abandon[attempt_id] = now
+        return {'finalize': finalize, 'abandon': abandon}
+
+    def _batches(self, ids: List[int]):
+        for start in range(0, len(ids), self.batch_size):
+            yield ids[start:start + self.batch_size]
+
+    def run(self, now=None) -> Dict:
+        now = now or timezone.now()
+        expired = self.classify(now)
+        report = {'finalized': 0, 'abandoned': 0}
+
+        for batch in self._batches(list(expired['abandon'])):
+            report['abandoned'] += (QuizAttempt.objects
+                                    .filter(id__in=batch, status='in_progress')
+                                    .update(status='abandoned'))
+
+        for batch in self._batches(list(expired['finalize'])):
+            attempts = list(QuizAttempt.objects
+                            .filter(id__in=batch, status='in_progress')
+                            .select_related('quiz__category', 'user'))
+            report['finalized'] += finalize_attempts(attempts, expired['finalize'])
+        return report
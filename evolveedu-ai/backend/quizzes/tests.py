@@ -1 +1,930 @@
 # tests.py for quizzes
+import csv
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from quizzes.ai_service import QuizAIService
+from quizzes.answer_matching import AMBIGUOUS, CORRECT, INCORRECT, match_answer
+from quizzes.analytics import rebuild_rollups, user_quiz_analytics
+from quizzes.generation import QuestionDeduplicator, plan_batches
+from quizzes.grading import BatchFreeTextGrader, finalize_attempt, finalize_attempts, grade_attempt
+from quizzes.importer import QuestionImporter, iter_rows
+from notes.models import Note
+from quizzes.irt import AdaptiveQuizEngine, ItemCalibrator
+from quizzes.note_context import allocate_questions, build_note_sections, chunk_text
+from quizzes.leaderboard import rebuild_leaderboard, record_attempt_score, score_percentile, top_entries
+from quizzes.models import (
+    AITokenUsage, BankQuestion, DailyQuizRollup, Question, Quiz, QuizAttempt, QuizCategory, QuizRecommendation,
+    QuizResponse, QuizUserTotals, TopicDemand
+)
+from quizzes.pregeneration import QuestionPoolScheduler, record_topic_request
+from quizzes.question_bank import QuestionBank
+from quizzes.recommender import BatchQuizRecommender
+from quizzes.sweeper import StaleAttemptSweeper
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="tester", email="tester@example.com", password="pass123")
+
+
+@pytest.fixture
+def fake_ai(monkeypatch):
+    """Replace the OpenAI call with a canned multiple choice batch generator"""
+    calls = []
+
+    def fake_call(self, prompt, max_tokens=1000):
+        calls.append(prompt)
+        self.tokens_used += 100
+        count = int(prompt.split()[1])
+        questions = [
+            {"question_text": f"Distinct fact number {len(calls)}-{i} about sorting {'x' * (len(calls) * 10 + i)}?",
+             "options": ["A", "B", "C", "D"], "correct_answers": [0]}
+            for i in range(count)
+        ]
+        return json.dumps({"questions": questions})
+
+    monkeypatch.setattr("quizzes.ai_service.OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(QuizAIService, "_call_openai", fake_call)
+    return calls
+
+
+# ------------------
+# Chunked Generation
+# ------------------
+
+def test_plan_batches_splits_by_type_and_size():
+    batches = plan_batches(23, ['multiple_choice', 'true_false'], 'beginner', batch_size=5)
+    assert sum(b['count'] for b in batches) == 23
+    assert max(b['count'] for b in batches) <= 5
+    assert {b['question_type'] for b in batches} == {'multiple_choice', 'true_false'}
+
+
+def test_deduplicator_rejects_near_identical_wording():
+    dedup = QuestionDeduplicator()
+    assert dedup.add("What is the capital of France?")
+    assert not dedup.add("what is the capital of France")
+    assert dedup.add("Which river flows through Paris?")
+
+
+@pytest.mark.django_db
+def test_create_quiz_from_ai_generates_all_questions_in_batches(user, fake_ai):
+    quiz = QuizAIService.create_quiz_from_ai(user=user, topic="Sorting", question_count=20)
+
+    assert Quiz.objects.filter(id=quiz.id).exists()
+    assert quiz.total_questions == 20
+    assert quiz.questions.count() == 20
+    assert len(fake_ai) == 4
+
+
+# ------------------
+# Question Bank
+# ------------------
+
+@pytest.mark.django_db
+def test_question_bank_serves_repeat_topics_without_ai(user, fake_ai):
+    QuizAIService.create_quiz_from_ai(user=user, topic="Python Basics", question_count=10)
+    assert BankQuestion.objects.filter(topic="python basics").count() == 10
+    calls_after_first = len(fake_ai)
+
+    quiz = QuizAIService.create_quiz_from_ai(user=user, topic="python  basics", question_count=10)
+    assert quiz.total_questions == 10
+    assert len(fake_ai) == calls_after_first
+
+
+@pytest.mark.django_db
+def test_question_bank_store_skips_duplicate_hashes():
+    question = {"question_text": "What is 2 + 2?", "question_type": "multiple_choice",
+                "options": ["3", "4"], "correct_answers": [1], "explanation": "", "hint": "",
+                "points": 1, "difficulty_level": "beginner"}
+    assert QuestionBank.store("Math", "beginner", [question]) == 1
+    assert QuestionBank.store("Math", "beginner", [dict(question, question_text="WHAT is 2+2 ?")]) == 0
+    assert QuestionBank.store("Math", "beginner", [dict(question, question_text="What is 3 + 3?")]) == 1
+
+    # The same text still lands in other pools
+    assert QuestionBank.store("Math", "intermediate", [question]) == 1
+    assert QuestionBank.store("Arithmetic", "beginner", [question]) == 1
+    assert QuestionBank.store("Math", "beginner", [dict(question, question_type="short_answer")]) == 1
+
+
+# ------------------
+# Pre-generation Pool
+# ------------------
+
+@pytest.mark.django_db
+def test_record_topic_request_counts_normalized_topics():
+    record_topic_request("Photosynthesis", "beginner")
+    record_topic_request("  photosynthesis ", "beginner")
+    assert TopicDemand.objects.get(topic="photosynthesis", difficulty_level="beginner").request_count == 2
+
+
+@pytest.mark.django_db
+def test_scheduler_fills_pool_for_popular_topics_within_budget(fake_ai):
+    record_topic_request("Photosynthesis", "beginner")
+    scheduler = QuestionPoolScheduler(top_k=5, pool_size=10, daily_token_budget=10 ** 6,
+                                      service=QuizAIService())
+
+    report = scheduler.run_once()
+    assert report['questions_added'] == 10
+    assert BankQuestion.objects.filter(topic="photosynthesis", times_used=0).count() == 10
+    assert AITokenUsage.objects.get().tokens_used > 0
+
+    # Pool is already warm, so a second pass costs nothing
+    calls = len(fake_ai)
+    assert scheduler.run_once()['questions_added'] == 0
+    assert len(fake_ai) == calls
+
+
+@pytest.mark.django_db
+def test_scheduler_stops_when_budget_is_spent(fake_ai):
+    record_topic_request("Photosynthesis", "beginner")
+    AITokenUsage.objects.create(date=timezone.now().date(), tokens_used=500)
+
+    report = QuestionPoolScheduler(daily_token_budget=100, service=QuizAIService()).run_once()
+    assert report['budget_exhausted']
+    assert fake_ai == []
+
+
+@pytest.mark.django_db
+def test_scheduler_sizes_top_up_to_the_remaining_budget(fake_ai):
+    from quizzes.pregeneration import TOKENS_PER_QUESTION
+
+    record_topic_request("Photosynthesis", "beginner")
+    AITokenUsage.objects.create(date=timezone.now().date(), tokens_used=1000)
+    scheduler = QuestionPoolScheduler(pool_size=30, daily_token_budget=1000 + 4 * TOKENS_PER_QUESTION,
+                                      service=QuizAIService())
+
+    report = scheduler.run_once()
+    assert report['questions_added'] == 4
+    assert sum(int(prompt.split()[1]) for prompt in fake_ai) == 4
+
+
+# ------------------
+# Batch Recommender
+# ------------------
+
+@pytest.mark.django_db
+def test_batch_recommender_prefers_weak_categories_and_runs_incrementally(user):
+    weak = QuizCategory.objects.create(name="Algebra")
+    strong = QuizCategory.objects.create(name="History")
+    quizzes = {
+        name: Quiz.objects.create(title=name, description="", category=category, created_by=user, is_public=True)
+        for name, category in [("algebra-1", weak), ("algebra-2", weak), ("history-1", strong), ("history-2", strong)]
+    }
+    for name, score in [("algebra-1", 40.0), ("history-1", 95.0)]:
+        QuizAttempt.objects.create(user=user, quiz=quizzes[name], status='completed',
+                                   score_percentage=score, completed_at=timezone.now())
+
+    recommender = BatchQuizRecommender(top_n=2)
+    assert recommender.run()['users'] == 1
+
+    recommended = list(QuizRecommendation.objects.filter(user=user).order_by('-confidence_score'))
+    assert [r.quiz.title for r in recommended] == ["algebra-2", "history-2"]
+    assert "Algebra" in recommended[0].reason
+
+    # Nothing changed since the last run
+    assert recommender.run()['users'] == 0
+
+    # A run that finds nothing left to recommend still counts as a refresh
+    for name in ("algebra-2", "history-2"):
+        QuizAttempt.objects.create(user=user, quiz=quizzes[name], status='completed',
+                                   score_percentage=70.0, completed_at=timezone.now())
+    assert recommender.run() == {'users': 1, 'recommendations': 0}
+    assert recommender.run()['users'] == 0
+
+
+# ------------------
+# Adaptive (IRT) Engine
+# ------------------
+
+@pytest.fixture
+def quiz(user):
+    category = QuizCategory.objects.create(name="Physics")
+    return Quiz.objects.create(title="Physics", description="", category=category, created_by=user,
+                               quiz_type='adaptive', is_public=True)
+
+
+def _add_questions(quiz, levels):
+    return [
+        Question.objects.create(quiz=quiz, question_text=f"Q{i}", options=["A", "B"], correct_answers=[0],
+                                difficulty_level=level, order=i)
+        for i, level in enumerate(levels)
+    ]
+
+
+@pytest.mark.django_db
+def test_calibrator_orders_items_by_observed_difficulty(user, quiz):
+    easy, hard = _add_questions(quiz, ['intermediate', 'intermediate'])
+    for i in range(30):
+        attempt = QuizAttempt.objects.create(user=user, quiz=quiz, status='completed', completed_at=timezone.now())
+        QuizResponse.objects.create(attempt=attempt, question=easy, is_correct=i % 10 != 0)
+        QuizResponse.objects.create(attempt=attempt, question=hard, is_correct=i % 3 == 0)
+
+    assert ItemCalibrator().run()['responses'] == 60
+    assert easy.calibration.difficulty < hard.calibration.difficulty
+    assert ItemCalibrator().run()['responses'] == 0
+
+    # An attempt completed later but stamped with an earlier time (its deadline) is still picked up
+    late = QuizAttempt.objects.create(user=user, quiz=quiz, status='completed',
+                                      completed_at=timezone.now() - timedelta(hours=1))
+    QuizResponse.objects.create(attempt=late, question=easy, is_correct=True)
+    assert ItemCalibrator().run()['responses'] == 1
+    easy.calibration.refresh_from_db()
+    assert easy.calibration.responses == 31
+
+
+@pytest.mark.django_db
+def test_adaptive_engine_moves_towards_harder_items_after_correct_answers(quiz):
+    beginner, intermediate, advanced = _add_questions(quiz, ['beginner', 'intermediate', 'advanced'])
+    engine = AdaptiveQuizEngine(quiz)
+
+    assert engine.next_question_id({}) == intermediate.id
+    assert engine.next_question_id({intermediate.id: True}) == advanced.id
+    assert engine.next_question_id({intermediate.id: False}) == beginner.id
+    assert engine.state({q.id: True for q in (beginner, intermediate, advanced)})['done']
+
+
+@pytest.mark.django_db
+def test_adaptive_attempt_only_accepts_the_served_question(user, quiz):
+    beginner, intermediate, advanced = _add_questions(quiz, ['beginner', 'intermediate', 'advanced'])
+    client = APIClient()
+    client.force_authenticate(user)
+
+    started = client.post(f'/api/quizzes/{quiz.id}/start/')
+    attempt_id = started.data['attempt_id']
+    assert [q['id'] for q in started.data['questions']] == [intermediate.id]
+
+    def respond(question):
+        return client.post(f'/api/quizzes/attempts/{attempt_id}/questions/{question.id}/respond/',
+                           {'selected_options': [0]}, format='json')
+
+    assert respond(beginner).status_code == 400
+    assert respond(intermediate).status_code == 200
+    # Answering again, or answering ahead of the engine, is rejected until the next question is served
+    assert respond(intermediate).status_code == 400
+    assert respond(advanced).status_code == 400
+
+    served = client.get(f'/api/quizzes/attempts/{attempt_id}/next/')
+    assert served.data['question']['id'] == advanced.id
+    assert respond(advanced).status_code == 200
+    assert QuizResponse.objects.filter(attempt_id=attempt_id).count() == 2
+
+
+@pytest.mark.django_db
+def test_adaptive_score_reflects_the_difficulty_of_the_served_items(user, quiz):
+    beginner, intermediate, advanced = _add_questions(quiz, ['beginner', 'intermediate', 'advanced'])
+
+    def score(question):
+        attempt = QuizAttempt.objects.create(user=user, quiz=quiz)
+        QuizResponse.objects.create(attempt=attempt, question=question, selected_options=[0])
+        return grade_attempt(attempt)['score_percentage']
+
+    # One correct answer each, so percent correct would be 100 for both
+    assert score(beginner) < score(advanced) < 100.0
+
+
+# ------------------
+# Analytics Rollups
+# ------------------
+
+def _submit(user, quiz, answers):
+    attempt = QuizAttempt.objects.create(user=user, quiz=quiz)
+    for question, answer in zip(quiz.questions.order_by('order'), answers):
+        QuizResponse.objects.create(attempt=attempt, question=question, selected_options=[answer])
+    return QuizAIService.evaluate_quiz_attempt(attempt)
+
+
+@pytest.mark.django_db
+def test_evaluate_attempt_grades_and_updates_rollups(user):
+    category = QuizCategory.objects.create(name="Chemistry")
+    quiz = Quiz.objects.create(title="Chemistry", description="", category=category, created_by=user)
+    _add_questions(quiz, ['beginner', 'beginner'])
+
+    result = _submit(user, quiz, [0, 0])
+    assert result['score_percentage'] == 100.0 and result['passed']
+    assert _submit(user, quiz, [0, 1])['score_percentage'] == 50.0
+
+    totals = QuizUserTotals.objects.get(user=user)
+    assert (totals.attempts, totals.passes, totals.category_counts) == (2, 1, {"Chemistry": 2})
+    assert DailyQuizRollup.objects.get(user=user).attempts == 2
+
+    analytics = user_quiz_analytics(user)
+    assert analytics['average_score'] == 75.0
+    assert analytics['success_rate'] == 50.0
+    assert analytics['favorite_categories'] == [{'quiz__category__name': "Chemistry", 'count': 2}]
+    assert analytics['performance_trend'][0]['attempts'] == 2
+
+    quiz.refresh_from_db()
+    assert quiz.times_taken == 2
+
+
+@pytest.mark.django_db
+def test_rebuild_rollups_matches_incremental_updates(user):
+    category = QuizCategory.objects.create(name="Biology")
+    quiz = Quiz.objects.create(title="Biology", description="", category=category, created_by=user)
+    _add_questions(quiz, ['beginner', 'beginner'])
+    _submit(user, quiz, [0, 1])
+    _submit(user, quiz, [1, 1])
+    incremental = user_quiz_analytics(user)
+
+    assert rebuild_rollups() == 1
+    assert user_quiz_analytics(user) == incremental
+
+
+# ------------------
+# Quiz List
+# ------------------
+
+@pytest.mark.django_db
+def test_quiz_list_reads_user_stats_in_constant_queries(user):
+    category = QuizCategory.objects.create(name="Geography")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    def list_queries():
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/quizzes/')
+        assert response.status_code == 200
+        return len(context.captured_queries), response.data['results']
+
+    quizzes = [Quiz.objects.create(title=f"Geo {i}", description="", category=category, created_by=user)
+               for i in range(2)]
+    small_count, _ = list_queries()
+
+    quizzes += [Quiz.objects.create(title=f"Geo {i}", description="", category=category, created_by=user)
+                for i in range(2, 8)]
+    for score, status in [(40.0, 'completed'), (85.0, 'completed'), (99.0, 'in_progress')]:
+        QuizAttempt.objects.create(user=user, quiz=quizzes[0], status=status, score_percentage=score)
+    large_count, results = list_queries()
+
+    assert large_count == small_count
+    first = next(row for row in results if row['id'] == quizzes[0].id)
+    assert (first['user_attempts'], first['user_best_score']) == (3, 85.0)
+    assert all(row['user_attempts'] == 0 and row['user_best_score'] is None
+               for row in results if row['id'] != quizzes[0].id)
+
+
+# ------------------
+# Leaderboards
+# ------------------
+
+@pytest.mark.django_db
+def test_leaderboard_keeps_best_score_per_user_within_size(user):
+    category = QuizCategory.objects.create(name="Music")
+    quiz = Quiz.objects.create(title="Music", description="", category=category, created_by=user, is_public=True)
+    users = [user] + [User.objects.create_user(username=f"u{i}", email=f"u{i}@example.com", password="x")
+                      for i in range(3)]
+
+    for student, score in [(users[0], 50.0), (users[1], 70.0), (users[0], 90.0), (users[2], 60.0),
+                           (users[3], 80.0), (users[0], 40.0)]:
+        attempt = QuizAttempt.objects.create(user=student, quiz=quiz, status='completed',
+                                             score_percentage=score, completed_at=timezone.now())
+        record_attempt_score(attempt, size=3)
+
+    assert [(row['username'], row['best_score']) for row in top_entries(quiz)] == [
+        ("tester", 90.0), ("u2", 80.0), ("u0", 70.0)
+    ]
+    # 4 users ranked by their best: 60, 70 and 80 sit below the 90% bucket, the retries do not count
+    assert score_percentile(quiz, 90.0) == round((3 + 0.5) / 4 * 100, 1)
+    assert score_percentile(quiz, 70.0) == round((1 + 0.5) / 4 * 100, 1)
+
+    rebuild_leaderboard(quiz, size=3)
+    assert [row['best_score'] for row in top_entries(quiz)] == [90.0, 80.0, 70.0]
+    assert quiz.score_histogram.total == 4 and sum(quiz.score_histogram.counts) == 4
+    assert score_percentile(quiz, 90.0) == round((3 + 0.5) / 4 * 100, 1)
+
+
+@pytest.mark.django_db
+def test_percentile_endpoint_uses_callers_best_score(user):
+    category = QuizCategory.objects.create(name="Art")
+    quiz = Quiz.objects.create(title="Art", description="", category=category, created_by=user)
+    client = APIClient()
+    client.force_authenticate(user)
+    assert client.get(f'/api/quizzes/{quiz.id}/percentile/').status_code == 404
+
+    attempt = QuizAttempt.objects.create(user=user, quiz=quiz, status='completed',
+                                         score_percentage=100.0, completed_at=timezone.now())
+    record_attempt_score(attempt)
+    response = client.get(f'/api/quizzes/{quiz.id}/percentile/')
+    assert response.data['best_score'] == 100.0 and response.data['percentile'] == 50.0
+    assert client.get(f'/api/quizzes/{quiz.id}/leaderboard/').data['entries'][0]['rank'] == 1
+
+
+# ------------------
+# Time Limits
+# ------------------
+
+def _started(user, quiz, minutes_ago):
+    attempt = QuizAttempt.objects.create(user=user, quiz=quiz)
+    QuizAttempt.objects.filter(id=attempt.id).update(started_at=timezone.now() - timedelta(minutes=minutes_ago))
+    attempt.refresh_from_db()
+    return attempt
+
+
+@pytest.mark.django_db
+def test_responses_after_the_deadline_are_rejected(user):
+    category = QuizCategory.objects.create(name="Timed")
+    quiz = Quiz.objects.create(title="Timed", description="", category=category, created_by=user,
+                               time_limit_minutes=10)
+    question, = _add_questions(quiz, ['beginner'])
+    client = APIClient()
+    client.force_authenticate(user)
+
+    on_time = _started(user, quiz, minutes_ago=5)
+    url = f'/api/quizzes/attempts/{on_time.id}/questions/{question.id}/respond/'
+    assert client.post(url, {'selected_options': [0]}, format='json').status_code == 200
+
+    late = _started(user, quiz, minutes_ago=11)
+    url = f'/api/quizzes/attempts/{late.id}/questions/{question.id}/respond/'
+    assert client.post(url, {'selected_options': [0]}, format='json').status_code == 400
+
+
+@pytest.mark.django_db
+def test_sweeper_finalizes_expired_and_abandons_stale_attempts(user):
+    category = QuizCategory.objects.create(name="Sweep")
+    timed = Quiz.objects.create(title="Timed", description="", category=category, created_by=user,
+                                time_limit_minutes=10)
+    untimed = Quiz.objects.create(title="Untimed", description="", category=category, created_by=user)
+    question, = _add_questions(timed, ['beginner'])
+
+    answered = _started(user, timed, minutes_ago=30)
+    QuizResponse.objects.create(attempt=answered, question=question, selected_options=[0])
+    unanswered = _started(user, timed, minutes_ago=30)
+    stale = _started(user, untimed, minutes_ago=60 * 25)
+    running = _started(user, untimed, minutes_ago=30)
+    long_quiz = Quiz.objects.create(title="Long", description="", category=category, created_by=user,
+                                    time_limit_minutes=120)
+    within_limit = _started(user, long_quiz, minutes_ago=30)
+
+    sweeper = StaleAttemptSweeper(batch_size=1)
+    expired = sweeper.classify(timezone.now())
+    assert set(expired['finalize']) == {answered.id}
+    assert set(expired['abandon']) == {unanswered.id, stale.id}
+    assert sweeper.run() == {'finalized': 1, 'abandoned': 2}
+
+    answered.refresh_from_db()
+    assert answered.status == 'completed' and answered.score_percentage == 100.0
+    assert answered.completed_at == answered.deadline
+    statuses = dict(QuizAttempt.objects.values_list('id', 'status'))
+    assert statuses[unanswered.id] == statuses[stale.id] == 'abandoned'
+    assert statuses[running.id] == statuses[within_limit.id] == 'in_progress'
+    assert QuizUserTotals.objects.get(user=user).attempts == 1
+
+
+@pytest.mark.django_db
+def test_swept_attempts_log_activity_when_the_learner_last_answered(user):
+    from accounts.models import LearningActivity
+
+    category = QuizCategory.objects.create(name="Walked away")
+    quiz = Quiz.objects.create(title="Timed", description="", category=category, created_by=user,
+                               time_limit_minutes=10)
+    question, = _add_questions(quiz, ['beginner'])
+    attempt = _started(user, quiz, minutes_ago=60 * 24 * 3)
+    response = QuizResponse.objects.create(attempt=attempt, question=question, selected_options=[0])
+    answered_at = attempt.started_at + timedelta(minutes=2)
+    QuizResponse.objects.filter(id=response.id).update(answered_at=answered_at)
+
+    assert StaleAttemptSweeper().run()['finalized'] == 1
+    activity = LearningActivity.objects.get(user=user, activity_type='quiz')
+    assert activity.date == timezone.localdate(answered_at) and activity.last_at == answered_at
+    assert user.progress.last_active_date == timezone.localdate(answered_at)
+
+
+@pytest.mark.django_db
+def test_attempts_are_completed_only_once(user):
+    category = QuizCategory.objects.create(name="Race")
+    quiz = Quiz.objects.create(title="Timed", description="", category=category, created_by=user,
+                               time_limit_minutes=10)
+    question, = _add_questions(quiz, ['beginner'])
+    attempt = _started(user, quiz, minutes_ago=30)
+    QuizResponse.objects.create(attempt=attempt, question=question, selected_options=[0])
+
+    # A submit and the sweeper both hold the in-progress row; only the first to claim it completes it
+    stale_copy = QuizAttempt.objects.get(id=attempt.id)
+    assert 'error' not in finalize_attempt(attempt)
+    # The loser of the claim does not regrade the responses either
+    QuizResponse.objects.filter(attempt=attempt).update(points_earned=7)
+    assert finalize_attempt(stale_copy) == {'error': 'This attempt has already been submitted'}
+    assert QuizResponse.objects.get(attempt=attempt).points_earned == 7
+    assert finalize_attempts([QuizAttempt.objects.select_related('quiz').get(id=attempt.id)],
+                             {attempt.id: attempt.deadline}) == 0
+
+    quiz.refresh_from_db()
+    assert quiz.times_taken == 1
+    assert QuizUserTotals.objects.get(user=user).attempts == 1
+    assert question.statistics.responses == 1
+
+
+@pytest.mark.django_db
+def test_sweep_side_effects_are_grouped_by_quiz_and_user(user):
+    from accounts.models import LearningActivity
+
+    category = QuizCategory.objects.create(name="Bulk")
+    quiz = Quiz.objects.create(title="Timed", description="", category=category, created_by=user,
+                               time_limit_minutes=10, max_attempts=20)
+    question, = _add_questions(quiz, ['beginner'])
+
+    def sweep(count):
+        for _ in range(count):
+            attempt = _started(user, quiz, minutes_ago=30)
+            QuizResponse.objects.create(attempt=attempt, question=question, selected_options=[0])
+        with CaptureQueriesContext(connection) as queries:
+            assert StaleAttemptSweeper().run()['finalized'] == count
+        return len(queries)
+
+    # The statement count does not grow with the number of swept attempts
+    assert sweep(2) == sweep(6)
+    quiz.refresh_from_db()
+    assert quiz.times_taken == 8
+    assert QuizUserTotals.objects.get(user=user).attempts == 8
+    assert question.statistics.responses == 8
+    assert LearningActivity.objects.get(user=user, activity_type='quiz').count == 8
+
+
+@pytest.mark.django_db
+def test_failed_grading_releases_the_claim(user, monkeypatch):
+    import quizzes.grading
+
+    category = QuizCategory.objects.create(name="Outage")
+    quiz = Quiz.objects.create(title="Quiz", description="", category=category, created_by=user)
+    _add_questions(quiz, ['beginner'])
+    attempt = _started(user, quiz, minutes_ago=5)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('grader down')
+
+    monkeypatch.setattr(quizzes.grading, 'grade_attempt', fail)
+    with pytest.raises(RuntimeError):
+        finalize_attempt(attempt)
+    with pytest.raises(RuntimeError):
+        finalize_attempts([attempt], {attempt.id: timezone.now()})
+    attempt.refresh_from_db()
+    assert attempt.status == 'in_progress'
+
+
+# ------------------
+# Item Analysis
+# ------------------
+
+@pytest.mark.django_db
+def test_item_analysis_accumulates_on_grading(user):
+    category = QuizCategory.objects.create(name="Items")
+    quiz = Quiz.objects.create(title="Items", description="", category=category, created_by=user, max_attempts=20)
+    easy, tricky = _add_questions(quiz, ['beginner', 'beginner'])
+    tricky.options = ["A", "B", "C"]
+    tricky.save()
+
+    # Strong students answer both correctly, weak ones fall for option 2 on the tricky item
+    for i in range(12):
+        strong = i < 4
+        _submit(user, quiz, [0, 0 if strong else 2])
+
+    easy.statistics.refresh_from_db()
+    assert easy.statistics.responses == 12 and easy.statistics.difficulty_index == 1.0
+
+    client = APIClient()
+    client.force_authenticate(user)
+    report = client.get(f'/api/quizzes/{quiz.id}/item-analysis/').data['questions']
+    tricky_row = report[1]
+    assert tricky_row['option_counts'] == {'0': 4, '2': 8}
+    assert tricky_row['discrimination'] > 0.9
+    assert 'misleading_distractor' in tricky_row['flags']
+    assert 'too_easy' in report[0]['flags']
+
+    other = User.objects.create_user(username="other", email="other@example.com", password="x")
+    client.force_authenticate(other)
+    assert client.get(f'/api/quizzes/{quiz.id}/item-analysis/').status_code == 403
+
+
+# ------------------
+# Free-text Grading
+# ------------------
+
+class FakeGradingService:
+    """Awards full marks to answers mentioning 'photosynthesis', half marks otherwise"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def _call_openai(self, prompt, max_tokens=1000):
+        self.prompts.append(prompt)
+        items = json.loads(prompt.split("Items:\n", 1)[1].split("\n\nRespond", 1)[0])
+        grades = [{"id": item["id"], "score": 1.0 if "photosynthesis" in item["student_answer"] else 0.5,
+                   "feedback": f"Feedback {item['id']}"} for item in items]
+        grades.append({"id": 999999, "score": 1.0, "feedback": "not in this batch"})
+        return json.dumps({"grades": grades})
+
+
+@pytest.mark.django_db
+def test_free_text_answers_are_graded_in_one_batched_call(user):
+    category = QuizCategory.objects.create(name="Plants")
+    quiz = Quiz.objects.create(title="Plants", description="", category=category, created_by=user)
+    attempt = QuizAttempt.objects.create(user=user, quiz=quiz)
+    answers = [
+        ('short_answer', ["chlorophyll"], "Chlorophyll"),          # exact match, graded locally
+        ('short_answer', ["photosynthesis"], "it is photosynthesis"),
+        ('essay', ["Plants convert light to energy"], "They grow"),
+        ('essay', ["Plants convert light to energy"], "Light drives photosynthesis"),
+    ]
+    for order, (question_type, correct, answer) in enumerate(answers):
+        question = Question.objects.create(quiz=quiz, question_text=f"Q{order}", question_type=question_type,
+                                           correct_answers=correct, points=4, order=order)
+        QuizResponse.objects.create(attempt=attempt, question=question, text_answer=answer)
+
+    service = FakeGradingService()
+    summary = grade_attempt(attempt, BatchFreeTextGrader(service=service))
+
+    assert len(service.prompts) == 1
+    assert summary['earned_points'] == 4 + 4 + 2 + 4
+    graded = list(attempt.responses.order_by('question__order'))
+    assert [r.is_correct for r in graded] == [True, True, True, True]
+    assert graded[0].ai_feedback == "" and graded[2].ai_feedback.startswith("Feedback")
+
+
+class FailingGradingService:
+    def _call_openai(self, prompt, max_tokens=1000):
+        return "Error calling OpenAI API: timed out"
+
+
+@pytest.mark.django_db
+def test_failed_ai_grading_leaves_essays_pending_until_retried(user, monkeypatch):
+    from quizzes.grading import regrade_pending_attempts
+
+    category = QuizCategory.objects.create(name="Essays")
+    quiz = Quiz.objects.create(title="Essays", description="", category=category, created_by=user)
+    attempt = QuizAttempt.objects.create(user=user, quiz=quiz)
+    mcq = Question.objects.create(quiz=quiz, question_text="Q0", options=["A", "B"], correct_answers=[0],
+                                  points=2, order=0)
+    essay = Question.objects.create(quiz=quiz, question_text="Q1", question_type='essay',
+                                    correct_answers=["Plants convert light to energy"], points=4, order=1)
+    QuizResponse.objects.create(attempt=attempt, question=mcq, selected_options=[0])
+    QuizResponse.objects.create(attempt=attempt, question=essay, text_answer="Light drives photosynthesis")
+
+    monkeypatch.setattr(BatchFreeTextGrader, 'service', FailingGradingService())
+    result = finalize_attempt(attempt)
+    assert (result['pending_review'], result['total_points'], result['score_percentage']) == (1, 2, 100.0)
+    assert attempt.responses.get(question=essay).pending_review
+
+    monkeypatch.setattr(BatchFreeTextGrader, 'service', FakeGradingService())
+    assert regrade_pending_attempts() == {'attempts': 1, 'graded': 1}
+    attempt.refresh_from_db()
+    assert (attempt.total_points, attempt.earned_points, attempt.score_percentage) == (6, 6, 100.0)
+    response = attempt.responses.get(question=essay)
+    assert not response.pending_review and response.ai_feedback.startswith("Feedback")
+    assert regrade_pending_attempts() == {'attempts': 0, 'graded': 0}
+
+
+def test_batch_grader_packs_by_budget_and_validates_output():
+    grader = BatchFreeTextGrader(max_prompt_tokens=60)
+    items = [{"id": i, "student_answer": "x" * 100} for i in range(3)]
+    assert [len(batch) for batch in grader.pack(items)] == [1, 1, 1]
+
+    response = '{"grades": [{"id": 1, "score": 7}, {"id": "2", "score": "bad"}, {"id": 5, "score": 1}]}'
+    assert grader.parse_grades(response, {1, 2}) == {1: {"score": 1.0, "feedback": ""}}
+    assert grader.parse_grades("Error calling OpenAI API", {1}) == {}
+
+
+@pytest.mark.parametrize("answer, accepted, verdict", [
+    ("The Mitochondria.", ["mitochondria"], CORRECT),
+    ("Photosynthsis", ["photosynthesis"], CORRECT),
+    ("paulo sao", ["São Paulo"], AMBIGUOUS),
+    ("1/2", ["0.5"], CORRECT),
+    ("50%", ["0.5"], CORRECT),
+    ("3.14", ["3.14159"], CORRECT),
+    ("3.7", ["4"], INCORRECT),
+    ("1939", ["1945"], INCORRECT),
+    ("1950", ["1945"], INCORRECT),
+    ("99", ["100"], INCORRECT),
+    ("mitochondria is not the powerhouse of the cell", ["The mitochondria is the powerhouse of the cell"], AMBIGUOUS),
+    ("mitochondria isn't the powerhouse of the cell", ["The mitochondria is the powerhouse of the cell"], AMBIGUOUS),
+    ("the cell powerhouse is mitochondria", ["mitochondria is the cell powerhouse"], AMBIGUOUS),
+    ("banana", ["photosynthesis"], INCORRECT),
+    ("cell wall membrane", ["cell membrane"], AMBIGUOUS),
+    ("", ["anything"], INCORRECT),
+])
+def test_match_answer_verdicts(answer, accepted, verdict):
+    assert match_answer(answer, accepted).verdict == verdict
+
+
+def test_match_answer_per_question_tolerance():
+    assert match_answer("9.8", ["9.81"], tolerance=0.001).verdict == INCORRECT
+    assert match_answer("9.8", ["9.81"], tolerance=0.05).verdict == CORRECT
+
+
+@pytest.mark.django_db
+def test_only_ambiguous_short_answers_reach_the_ai_grader(user):
+    category = QuizCategory.objects.create(name="Cells")
+    quiz = Quiz.objects.create(title="Cells", description="", category=category, created_by=user)
+    attempt = QuizAttempt.objects.create(user=user, quiz=quiz)
+    for order, answer in enumerate(["Mitochondrion", "ribosome", "the mitochondria of photosynthesis"]):
+        question = Question.objects.create(quiz=quiz, question_text=f"Q{order}", question_type='fill_blank',
+                                           correct_answers=["mitochondria", "mitochondrion"], order=order)
+        QuizResponse.objects.create(attempt=attempt, question=question, text_answer=answer)
+
+    service = FakeGradingService()
+    summary = grade_attempt(attempt, BatchFreeTextGrader(service=service))
+
+    assert (summary['text_answers'], summary['text_answers_resolved_locally']) == (3, 2)
+    assert len(service.prompts) == 1 and "ribosome" not in service.prompts[0]
+    assert summary['correct_answers'] == 2
+
+
+# ------------------
+# Question Import
+# ------------------
+
+@pytest.mark.django_db
+def test_csv_import_reports_bad_rows_without_aborting(user):
+    category = QuizCategory.objects.create(name="Import")
+    quiz = Quiz.objects.create(title="Import", description="", category=category, created_by=user)
+    content = (
+        "question_text,question_type,options,correct_answers,points\n"
+        "Capital of France?,multiple_choice,Paris|Rome|Berlin,0,2\n"
+        "Missing answer?,multiple_choice,A|B,,1\n"
+        "\"Sky is blue, right?\",true_false,True|False,0,1\n"
+        "Explain gravity,essay,,,5\n"
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.post(f'/api/quizzes/{quiz.id}/import/',
+                           {'file': SimpleUploadedFile("bank.csv", content.encode())}, format='multipart')
+
+    assert response.status_code == 201
+    assert (response.data['created'], response.data['failed']) == (3, 1)
+    assert response.data['errors'][0]['row'] == 3
+    quiz.refresh_from_db()
+    assert quiz.total_questions == 3
+    first = quiz.questions.get(order=1)
+    assert (first.options, first.correct_answers, first.points) == (["Paris", "Rome", "Berlin"], [0], 2)
+
+
+@pytest.mark.django_db
+def test_jsonl_import_in_chunks_appends_after_existing_questions(user):
+    category = QuizCategory.objects.create(name="Jsonl")
+    quiz = Quiz.objects.create(title="Jsonl", description="", category=category, created_by=user)
+    _add_questions(quiz, ['beginner'])
+    lines = [json.dumps({"question_text": f"Q{i}?", "options": ["A", "B"], "correct_answers": [1]})
+             for i in range(5)]
+    lines.insert(2, "{not json")
+
+    report = QuestionImporter(quiz, chunk_size=2).run(iter_rows(lines, 'jsonl'))
+
+    assert (report['created'], report['failed']) == (5, 1)
+    assert report['errors'][0]['row'] == 3
+    assert sorted(quiz.questions.values_list('order', flat=True)) == [0, 1, 2, 3, 4, 5]
+
+
+@pytest.mark.django_db
+def test_import_reports_rows_imported_before_a_decoding_error(user):
+    category = QuizCategory.objects.create(name="Encoding")
+    quiz = Quiz.objects.create(title="Encoding", description="", category=category, created_by=user)
+    rows = [json.dumps({"question_text": f"Q{i}?", "options": ["A", "B"], "correct_answers": [0]})
+            for i in range(2500)]
+    content = ("\n".join(rows) + "\n").encode() + b'{"question_text": "Caf\xe9?"}\n'
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.post(f'/api/quizzes/{quiz.id}/import/',
+                           {'file': SimpleUploadedFile("bank.jsonl", content)}, format='multipart')
+
+    assert response.status_code == 400
+    assert response.data['created'] == 2500 == quiz.questions.count()
+    assert response.data['error'].endswith('after row 2500')
+
+    # The stricter row checks apply to imports only, not to the question create API
+    from quizzes.serializers import QuestionCreateSerializer
+    assert QuestionCreateSerializer(data={'question_text': "Open?", 'options': ["A"]}).is_valid()
+
+
+@pytest.mark.django_db
+def test_quiz_create_bulk_inserts_questions(user):
+    category = QuizCategory.objects.create(name="Create")
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.post('/api/quizzes/create/', {
+        'title': "Created", 'description': "Bulk", 'category': category.id,
+        'questions_data': [{'question_text': f"Q{i}", 'options': ["A", "B"], 'correct_answers': [0]}
+                           for i in range(3)],
+    }, format='json')
+
+    assert response.status_code == 201
+    quiz = Quiz.objects.get(title="Created")
+    assert quiz.total_questions == 3
+    assert list(quiz.questions.order_by('order').values_list('order', flat=True)) == [1, 2, 3]
+
+
+# ------------------
+# Attempt Export
+# ------------------
+
+@pytest.mark.django_db
+def test_export_streams_one_row_per_response(user):
+    category = QuizCategory.objects.create(name="Export")
+    quiz = Quiz.objects.create(title="Export", description="", category=category, created_by=user, max_attempts=5)
+    _add_questions(quiz, ['beginner', 'beginner'])
+    _submit(user, quiz, [0, 1])
+    _submit(user, quiz, [1, 1])
+    QuizAttempt.objects.create(user=user, quiz=quiz)  # Started, nothing answered
+
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.get('/api/quizzes/attempts/export/', {'quiz': quiz.id})
+    assert response.status_code == 200 and response.streaming
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0].startswith("attempt_id,participant")
+    assert len(lines) == 1 + 2 + 2 + 1
+    assert user.email not in "".join(lines)
+    assert len({line.split(",")[1] for line in lines[1:]}) == 1
+
+    response = client.get('/api/quizzes/attempts/export/', {'category': category.id, 'export_format': 'jsonl'})
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+    assert rows[0]['selected_options'] == [0] and rows[0]['is_correct'] is True
+
+    # Free text that a spreadsheet would evaluate is quoted in CSV
+    QuizResponse.objects.filter(attempt__quiz=quiz).update(text_answer='=HYPERLINK("http://evil")')
+    response = client.get('/api/quizzes/attempts/export/', {'quiz': quiz.id})
+    rows = list(csv.DictReader(b"".join(response.streaming_content).decode().splitlines()))
+    assert rows[0]['text_answer'] == '\'=HYPERLINK("http://evil")'
+
+    other = User.objects.create_user(username="other", email="other@example.com", password="x")
+    client.force_authenticate(other)
+    assert client.get('/api/quizzes/attempts/export/', {'quiz': quiz.id}).status_code == 404
+    assert client.get('/api/quizzes/attempts/export/', {'quiz': 'abc'}).status_code == 400
+    assert client.get('/api/quizzes/attempts/export/', {'category': 'abc'}).status_code == 400
+
+
+# ------------------
+# Quizzes From Notes
+# ------------------
+
+def _note(user, title, key_points, paragraphs):
+    return Note.objects.create(user=user, title=title, source_type='text', key_points=key_points,
+                               content="\n\n".join(paragraphs))
+
+
+def _filler(word, sentences=40):
+    return " ".join(f"Sentence {i} repeats {word} background material." for i in range(sentences))
+
+
+@pytest.mark.django_db
+def test_note_sections_pick_key_point_chunks_from_every_note(user):
+    biology = _note(user, "Cells", ["Mitochondria produce ATP energy"],
+                    [_filler("history"), "Mitochondria produce ATP, the energy currency of cells.", _filler("trivia")])
+    physics = _note(user, "Motion", ["Newton laws of motion"],
+                    [_filler("anecdote"), "Newton stated three laws of motion about force and mass."])
+
+    sections = build_note_sections([biology, physics], question_count=5, token_budget=600)
+
+    assert [section.source.note_id for section in sections] == [biology.id, physics.id]
+    assert "Mitochondria produce ATP" in sections[0].excerpt
+    assert "Newton stated three laws" in sections[1].excerpt
+    assert sum(len(section.excerpt) for section in sections) // 4 <= 600
+    assert sum(section.question_count for section in sections) == 5
+
+
+@pytest.mark.django_db
+def test_note_sections_split_long_lists_without_full_stops(user):
+    bullets = "\n".join(f"- item {i} covers topic {i % 7} in some detail" for i in range(600))
+    outline = _note(user, "Outline", ["topic 3"], [bullets])
+
+    sections = build_note_sections([outline], question_count=3, token_budget=600)
+    assert len(sections) == 1 and sections[0].question_count == 3
+    assert 0 < len(sections[0].excerpt) // 4 <= 600
+    assert all(len(chunk.split()) <= 150 for chunk in chunk_text(bullets + " " + "word " * 400))
+
+
+def test_allocate_questions_spreads_over_sources():
+    assert allocate_questions([100, 50, 0, 10], 10) == [5, 3, 0, 2]
+    assert allocate_questions([5, 9, 1], 2) == [1, 1, 0]
+
+
+@pytest.mark.django_db
+def test_generate_quiz_from_notes_endpoint(user, fake_ai):
+    notes = [_note(user, f"Topic {i}", [f"Point {i}"], [f"Point {i} is explained here in detail."])
+             for i in range(2)]
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.post('/api/quizzes/generate/from-notes/',
+                           {'note_ids': [note.id for note in notes], 'question_count': 4}, format='json')
+
+    assert response.status_code == 201
+    assert len(response.data['questions']) == 4
+    assert "Topic 0" in fake_ai[0] and "Topic 1" in fake_ai[0]
+    assert client.post('/api/quizzes/generate/from-notes/', {'note_ids': [999]}, format='json').status_code == 404
+
+    # Several long note titles still give a title that fits the column
+    long_notes = [_note(user, f"{i} " + "Long title " * 17, ["Point"], ["Point is explained here."]) for i in range(3)]
+    response = client.post('/api/quizzes/generate/from-notes/',
+                           {'note_ids': [note.id for note in long_notes], 'question_count': 2}, format='json')
+    assert response.status_code == 201
+    assert len(response.data['title']) <= 200
@@ -10,17 +10,22 @@ urlpatterns = [
     path('', views.QuizListView.as_view(), name='quiz_list'),
     path('create/', views.QuizCreateView.as_view(), name='quiz_create'),
     path('<int:pk>/', views.QuizDetailView.as_view(), name='quiz_detail'),
+    path('<int:quiz_id>/import/', views.import_quiz_questions, name='import_quiz_questions'),
 
     # AI Quiz Generation
     path('generate/', views.generate_quiz_with_ai, name='generate_quiz'),
+    path('generate/stream/', views.generate_quiz_with_ai_stream, name='generate_quiz_stream'),
+    path('generate/from-notes/', views.generate_quiz_from_notes, name='generate_quiz_from_notes'),
 
     # Quiz Attempts
     path('<int:quiz_id>/start/', views.start_quiz_attempt, name='start_quiz_attempt'),
     path('attempts/<int:attempt_id>/submit/', views.submit_quiz_attempt, name='submit_quiz_attempt'),
     path('attempts/<int:attempt_id>/questions/<int:question_id>/respond/', views.submit_quiz_response,
          name='submit_quiz_response'),
+    path('attempts/<int:attempt_id>/next/', views.adaptive_next_question, name='adaptive_next_question'),
     path('attempts/<int:attempt_id>/results/', views.quiz_attempt_results, name='quiz_attempt_results'),
     path('attempts/', views.user_quiz_attempts, name='user_quiz_attempts'),
+    path('attempts/export/', views.export_quiz_attempts, name='export_quiz_attempts'),
 
     # Recommendations
     path('recommendations/', views.quiz_recommendations, name='quiz_recommendations'),
@@ -29,4 +34,9 @@ urlpatterns = [
 
     # Analytics
     path('analytics/', views.quiz_analytics, name='quiz_analytics'),
+    path('<int:quiz_id>/item-analysis/', views.quiz_item_analysis_view, name='quiz_item_analysis'),
+
+    # Leaderboards
+    path('<int:quiz_id>/leaderboard/', views.quiz_leaderboard, name='quiz_leaderboard'),
+    path('<int:quiz_id>/percentile/', views.quiz_percentile, name='quiz_percentile'),
 ]
\ No newline at end of file
@@ -1,19 +1,30 @@
 # quizzes/views.py
+import codecs
+import json
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Q, Avg, Count
-from datetime import timedelta
+from django.db.models import Q
+from notes.models import Note
 from .models import Quiz, Question, QuizAttempt, QuizResponse, QuizCategory, QuizRecommendation
 from .serializers import (
     QuizSerializer, QuizListSerializer, QuizCreateSerializer, QuestionSerializer,
     QuizAttemptSerializer, QuizAttemptCreateSerializer, QuizResponseSerializer,
     QuizCategorySerializer, QuizRecommendationSerializer, GenerateQuizRequestSerializer,
-    QuizSubmissionSerializer
+    GenerateQuizFromNotesSerializer, QuizSubmissionSerializer
 )
 from .ai_service import QuizAIService
+from .analytics import user_quiz_analytics
+from .grading import OBJECTIVE_TYPES, is_objective_answer_correct
+from .exporter import EXPORT_FORMATS, stream_export
+from .importer import QuestionImporter, detect_format, iter_rows
+from .irt import AdaptiveQuizEngine
+from .item_analysis import quiz_item_analysis
+from .leaderboard import score_percentile, top_entries, user_best_score
+from .pregeneration import record_topic_request
 
 
 class QuizCategoryListView(generics.ListCreateAPIView):
@@ -29,7 +40,7 @@ class QuizListView(generics.ListAPIView):
     def get_queryset(self):
         queryset = Quiz.objects.filter(
             Q(created_by=self.request.user) | Q(is_public=True)
-        ).select_related('category', 'created_by')
+        ).select_related('category', 'created_by').with_user_stats(self.request.user)
 
         # Filter by category
         category = self.request.query_params.get('category')
@@ -114,6 +125,7 @@ def generate_quiz_with_ai(request):
             if category_id:
                 category = get_object_or_404(QuizCategory, id=category_id)
 
+            record_topic_request(topic, difficulty)
             quiz = QuizAIService.create_quiz_from_ai(
                 user=request.user,
                 topic=topic,
@@ -132,6 +144,82 @@ def generate_quiz_with_ai(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def generate_quiz_from_notes(request):
+    serializer = GenerateQuizFromNotesSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    notes_by_id = Note.objects.filter(Q(user=request.user) | Q(is_public=True)).in_bulk(data['note_ids'])
+    missing = [note_id for note_id in data['note_ids'] if note_id not in notes_by_id]
+    if missing:
+        return Response({'error': f'Notes not found: {missing}'}, status=status.HTTP_404_NOT_FOUND)
+
+    category = None
+    if data.get('category_id'):
+        category = get_object_or_404(QuizCategory, id=data['category_id'])
+
+    try:
+        quiz = QuizAIService.create_quiz_from_notes(
+            user=request.user,
+            notes=[notes_by_id[note_id] for note_id in dict.fromkeys(data['note_ids'])],
+            difficulty=data['difficulty'],
+            question_count=data['question_count'],
+            category=category,
+            time_limit=data.get('time_limit')
+        )
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(QuizSerializer(quiz).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def generate_quiz_with_ai_stream(request):
+    """Same as generate_quiz_with_ai, but streams each finished batch as a JSON line"""
+    serializer = GenerateQuizRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    category = None
+    if data.get('category_id'):
+        category = get_object_or_404(QuizCategory, id=data['category_id'])
+
+    record_topic_request(data['topic'], data['difficulty'])
+    try:
+        quiz = QuizAIService.start_ai_quiz(
+            user=request.user,
+            topic=data['topic'],
+            difficulty=data['difficulty'],
+            question_count=data['question_count'],
+            category=category,
+            time_limit=data.get('time_limit')
+        )
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def event_stream():
+        yield json.dumps({'event': 'started', 'quiz_id': quiz.id}) + '\n'
+        try:
+            for questions in QuizAIService.stream_quiz_questions(
+                quiz, data['topic'], data['difficulty'], data['question_count'], data['question_types']
+            ):
+                yield json.dumps({
+                    'event': 'questions',
+                    'questions': QuestionSerializer(questions, many=True).data
+                }, default=str) + '\n'
+        except Exception as e:
+            yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+        yield json.dumps({'event': 'completed', 'quiz_id': quiz.id,
+                          'total_questions': quiz.total_questions}) + '\n'
+
+    return StreamingHttpResponse(event_stream(), content_type='application/x-ndjson')
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def start_quiz_attempt(request, quiz_id):
@@ -141,8 +229,8 @@ def start_quiz_attempt(request, quiz_id):
     if not quiz.is_public and quiz.created_by != request.user:
         return Response({'error': 'Quiz not accessible'}, status=status.HTTP_403_FORBIDDEN)
 
-    # Check max attempts
-    user_attempts = QuizAttempt.objects.filter(user=request.user, quiz=quiz).count()
+    # Check max attempts (abandoned attempts do not count)
+    user_attempts = QuizAttempt.objects.filter(user=request.user, quiz=quiz).exclude(status='abandoned').count()
     if user_attempts >= quiz.max_attempts:
         return Response({'error': 'Maximum attempts exceeded'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -154,19 +242,17 @@ def start_quiz_attempt(request, quiz_id):
     )
 
     # Return quiz questions (without correct answers)
-    questions_data = []
-    for question in quiz.questions.all():
-        question_data = {
-            'id': question.id,
-            'question_text': question.question_text,
-            'question_type': question.question_type,
-            'options': question.options,
-            'hint': question.hint if request.query_params.get('show_hints') == 'true' else '',
-            'points': question.points,
-            'order': question.order,
-            'image': question.image.url if question.image else None
-        }
-        questions_data.append(question_data)
+    show_hints = request.query_params.get('show_hints') == 'true'
+    questions = quiz.questions.all()
+
+    # Adaptive quizzes reveal one question at a time, chosen by the IRT engine
+    if quiz.quiz_type == 'adaptive':
+        next_question_id = AdaptiveQuizEngine(quiz).next_question_id({})
+        questions = questions.filter(id=next_question_id)
+        attempt.served_question_id = next_question_id
+        attempt.save(update_fields=['served_question'])
+
+    questions_data = [_question_payload(question, show_hints) for question in questions]
 
     return Response({
         'attempt_id': attempt.id,
@@ -176,19 +262,74 @@ def start_quiz_attempt(request, quiz_id):
             'description': quiz.description,
             'time_limit_minutes': quiz.time_limit_minutes,
             'total_questions': quiz.total_questions,
-            'shuffle_questions': quiz.shuffle_questions
+            'shuffle_questions': quiz.shuffle_questions,
+            'quiz_type': quiz.quiz_type
         },
         'questions': questions_data,
         'started_at': attempt.started_at
     })
 
 
+def _question_payload(question, show_hints=False):
+    """Question data safe to send while an attempt is running (no answers)"""
+    return {
+        'id': question.id,
+        'question_text': question.question_text,
+        'question_type': question.question_type,
+        'options': question.options,
+        'hint': question.hint if show_hints else '',
+        'points': question.points,
+        'order': question.order,
+        'image': question.image.url if question.image else None
+    }
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def adaptive_next_question(request, attempt_id):
+    attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user, status='in_progress')
+    if attempt.quiz.quiz_type != 'adaptive':
+        return Response({'error': 'Quiz is not adaptive'}, status=status.HTTP_400_BAD_REQUEST)
+
+    answered = {}
+    for response in attempt.responses.select_related('question'):
+        if response.question.question_type in OBJECTIVE_TYPES:
+            answered[response.question_id] = is_objective_answer_correct(response.question, response.selected_options)
+        else:
+            answered[response.question_id] = response.is_correct
+
+    state = AdaptiveQuizEngine(attempt.quiz).state(answered)
+    if attempt.served_question_id != state['next_question_id']:
+        attempt.served_question_id = state['next_question_id']
+        attempt.save(update_fields=['served_question'])
+
+    question = None
+    if state['next_question_id']:
+        question = _question_payload(
+            Question.objects.get(id=state['next_question_id']),
+            request.query_params.get('show_hints') == 'true'
+        )
+
+    return Response({**state, 'question': question})
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def submit_quiz_response(request, attempt_id, question_id):
     attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user, status='in_progress')
     question = get_object_or_404(Question, id=question_id, quiz=attempt.quiz)
 
+    if attempt.is_expired():
+        return Response({'error': 'Time limit exceeded, submit the attempt to see your results'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    # Adaptive attempts only take an answer to the question the engine served
+    if attempt.quiz.quiz_type == 'adaptive':
+        served = QuizAttempt.objects.filter(id=attempt.id, served_question=question).update(served_question=None)
+        if not served:
+            return Response({'error': 'This question was not served to this attempt'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
     # Create or update response
     response_data = {
         'selected_options': request.data.get('selected_options', []),
@@ -216,19 +357,21 @@ def submit_quiz_response(request, attempt_id, question_id):
 def submit_quiz_attempt(request, attempt_id):
     attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user, status='in_progress')
 
-    # Calculate time taken
-    time_taken = timezone.now() - attempt.started_at
+    # Calculate time taken; late submissions are closed at the deadline
+    completed_at = timezone.now()
+    if attempt.is_expired(completed_at):
+        completed_at = attempt.deadline
+    time_taken = completed_at - attempt.started_at
     attempt.time_taken_minutes = int(time_taken.total_seconds() / 60)
-    attempt.completed_at = timezone.now()
+    attempt.completed_at = completed_at
 
-    # Evaluate the attempt using AI
+    # Grade the attempt and update statistics and analytics rollups
     evaluation_result = QuizAIService.evaluate_quiz_attempt(attempt)
 
     if 'error' in evaluation_result:
         return Response(evaluation_result, status=status.HTTP_400_BAD_REQUEST)
 
-    # Generate new recommendations
-    QuizAIService.generate_recommendations_for_user(request.user)
+    # Recommendations are rebuilt offline by `manage.py build_quiz_recommendations`
 
     return Response({
         'attempt_id': attempt.id,
@@ -237,6 +380,7 @@ def submit_quiz_attempt(request, attempt_id):
         'passed': evaluation_result['passed'],
         'correct_answers': evaluation_result['correct_answers'],
         'total_questions': evaluation_result['total_questions'],
+        'pending_review': evaluation_result['pending_review'],
         'time_taken_minutes': attempt.time_taken_minutes,
         'feedback': evaluation_result['feedback'],
         'show_results_immediately': attempt.quiz.show_results_immediately
@@ -267,6 +411,8 @@ def quiz_attempt_results(request, attempt_id):
             'points_earned': response.points_earned,
             'max_points': question.points,
             'explanation': question.explanation,
+            'ai_feedback': response.ai_feedback,
+            'pending_review': response.pending_review,
             'options': question.options if question.question_type in ['multiple_choice', 'true_false'] else []
         }
         detailed_results.append(result_data)
@@ -327,53 +473,109 @@ def dismiss_recommendation(request, recommendation_id):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def quiz_analytics(request):
-    user = request.user
-
-    # Get user's quiz statistics
-    attempts = QuizAttempt.objects.filter(user=user, status='completed')
-
-    total_attempts = attempts.count()
-    if total_attempts == 0:
-        return Response({
-            'total_attempts': 0,
-            'average_score': 0,
-            'success_rate': 0,
-            'study_time_hours': 0,
-            'favorite_categories': [],
-            'performance_trend': []
-        })
-
-    average_score = attempts.aggregate(avg_score=Avg('score_percentage'))['avg_score'] or 0
-    passed_attempts = attempts.filter(passed=True).count()
-    success_rate = (passed_attempts / total_attempts) * 100 if total_attempts > 0 else 0
-
-    total_study_time = attempts.aggregate(total_time=models.Sum('time_taken_minutes'))['total_time'] or 0
-    study_time_hours = total_study_time / 60
-
-    # Favorite categories
-    category_stats = (attempts
-                      .values('quiz__category__name')
-                      .annotate(count=Count('id'))
-                      .order_by('-count')[:5])
-
-    # Performance trend (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_attempts = (attempts
-                       .filter(completed_at__gte=thirty_days_ago)
-                       .order_by('completed_at'))
-
-    trend_data = []
-    for attempt in recent_attempts:
-        trend_data.append({
-            'date': attempt.completed_at.date(),
-            'score': attempt.score_percentage
-        })
+    # Served from the per-user rollups maintained on attempt completion
+    return Response(user_quiz_analytics(request.user))
+
+
+def _accessible_quiz(request, quiz_id):
+    return get_object_or_404(Quiz.objects.filter(Q(created_by=request.user) | Q(is_public=True)), id=quiz_id)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def quiz_leaderboard(request, quiz_id):
+    quiz = _accessible_quiz(request, quiz_id)
+    try:
+        limit = max(1, int(request.query_params.get('limit', 10)))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
 
     return Response({
-        'total_attempts': total_attempts,
-        'average_score': round(average_score, 1),
-        'success_rate': round(success_rate, 1),
-        'study_time_hours': round(study_time_hours, 1),
-        'favorite_categories': list(category_stats),
-        'performance_trend': trend_data
-    })
\ No newline at end of file
+        'quiz_id': quiz.id,
+        'quiz_title': quiz.title,
+        'entries': top_entries(quiz, limit)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def quiz_percentile(request, quiz_id):
+    quiz = _accessible_quiz(request, quiz_id)
+    best_score = user_best_score(quiz, request.user)
+    if best_score is None:
+        return Response({'error': 'No completed attempts for this quiz'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'quiz_id': quiz.id,
+        'best_score': best_score,
+        'percentile': score_percentile(quiz, best_score)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def quiz_item_analysis_view(request, quiz_id):
+    quiz = get_object_or_404(Quiz, id=quiz_id)
+    if quiz.created_by != request.user:
+        return Response({'error': 'Only the quiz author can view item analysis'}, status=status.HTTP_403_FORBIDDEN)
+
+    return Response({
+        'quiz_id': quiz.id,
+        'quiz_title': quiz.title,
+        'times_taken': quiz.times_taken,
+        'questions': quiz_item_analysis(quiz)
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_quiz_questions(request, quiz_id):
+    quiz = get_object_or_404(Quiz, id=quiz_id)
+    if quiz.created_by != request.user:
+        return Response({'error': 'Only the quiz author can import questions'}, status=status.HTTP_403_FORBIDDEN)
+
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({'error': 'Upload a CSV or JSONL file as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        fmt = detect_format(upload.name, request.data.get('format'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # A decoding error stops the import; the report keeps what was imported before it
+    report = QuestionImporter(quiz).run(iter_rows(codecs.iterdecode(upload, 'utf-8-sig'), fmt))
+    succeeded = report['created'] and 'error' not in report
+    return Response(report, status=status.HTTP_201_CREATED if succeeded else status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_quiz_attempts(request):
+    """Stream attempts and responses of the caller's quizzes, filtered by ?quiz= or ?category="""
+    quizzes = Quiz.objects.filter(created_by=request.user)
+    quiz_id = request.query_params.get('quiz')
+    category_id = request.query_params.get('category')
+    if not quiz_id and not category_id:
+        return Response({'error': 'Pass a quiz or category id'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        quiz_id = int(quiz_id) if quiz_id else None
+        category_id = int(category_id) if category_id else None
+    except ValueError:
+        return Response({'error': 'quiz and category must be integer ids'}, status=status.HTTP_400_BAD_REQUEST)
+    if quiz_id:
+        quizzes = quizzes.filter(id=quiz_id)
+    if category_id:
+        quizzes = quizzes.filter(category_id=category_id)
+
+    fmt = request.query_params.get('export_format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return Response({'error': f"export_format must be one of: {', '.join(EXPORT_FORMATS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not quizzes.exists():
+        return Response({'error': 'No quizzes of yours match this export'}, status=status.HTTP_404_NOT_FOUND)
+
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(stream_export(quizzes, fmt), content_type=content_type)
+    filename = f"quiz-{quiz_id}" if quiz_id else f"category-{category_id}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}-attempts.{fmt}"'
+    return response
@@ -0,0 +1,36 @@
+from django import forms
+from django.contrib import admin, messages
+from .models import Skill
+from .skill_graph import PrerequisiteCycleError, check_prerequisite_edges
+
+
+class SkillAdminForm(forms.ModelForm):
+    class Meta:
+        model = Skill
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        prerequisites = cleaned_data.get('prerequisites')
+        if self.instance.pk and prerequisites:
+            try:
+                check_prerequisite_edges((self.instance.pk, prerequisite.pk) for prerequisite in prerequisites)
+            except PrerequisiteCycleError as error:
+                self.add_error('prerequisites', error)
+        return cleaned_data
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    form = SkillAdminForm
+    list_display = ('name', 'category', 'difficulty_level', 'estimated_hours', 'market_demand', 'is_trending')
+    list_filter = ('category', 'difficulty_level', 'is_trending')
+    search_fields = ('name', 'description')
+    filter_horizontal = ('prerequisites',)
+
+    def save_related(self, request, form, formsets, change):
+        try:
+            super().save_related(request, form, formsets, change)
+        except PrerequisiteCycleError as error:
+            # Another edit closed the cycle after the form was validated
+            self.message_user(request, error.messages[0], level=messages.ERROR)
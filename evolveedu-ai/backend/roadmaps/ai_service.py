@@ -0,0 +1,215 @@
+"""
+Roadmap Service
+Builds and maintains personalized roadmaps with the local planner. Plans, gap
+analysis, progress and resource recommendations never wait on a provider; OpenAI
+is only asked, on request, to write the roadmap's introduction.
+"""
+
+import os
+from datetime import timedelta
+from typing import Dict, List
+
+import requests
+from django.db.models import F, Sum
+from django.utils import timezone
+from dotenv import load_dotenv
+
+from .models import CareerPath, Skill
+from .planner import (
+    LEVEL_RANK, create_planned_roadmap, known_skill_credit, level_credit, plan_skills, skill_ids_named
+)
+from .resource_ranking import recommend_resources
+from .skill_graph import get_skill_graph
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+
+DAYS_PER_MONTH = 30
+
+
+def _find_career_path(career_goal: str):
+    return (CareerPath.objects.filter(title__iexact=career_goal).first()
+            or CareerPath.objects.filter(title__icontains=career_goal).order_by('-is_popular', 'id').first())
+
+
+class RoadmapAIService:
+    """Roadmap planning with optional AI-written prose"""
+
+    def __init__(self):
+        self.api_key = OPENAI_API_KEY
+        self.model = OPENAI_MODEL
+        self.api_url = "https://api.openai.com/v1/chat/completions"
+
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY not configured in .env file")
+
+    def _call_openai(self, prompt: str, max_tokens: int = 400) -> str:
+        """Call OpenAI API with given prompt"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a career coach writing short, encouraging learning plan summaries."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.7
+        }
+        response = requests.post(self.api_url, json=payload, headers=headers, timeout=30)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    @classmethod
+    def describe_roadmap(cls, career_goal: str, skill_names: List[str], weeks: int, learning_style: str) -> str:
+        """AI introduction for a roadmap, or '' when the provider is unavailable"""
+        try:
+            service = cls()
+            prompt = (f"Write a 3-4 sentence introduction for a {weeks}-week learning roadmap towards "
+                      f"'{career_goal}' covering, in order: {', '.join(skill_names)}. "
+                      f"The learner prefers {learning_style} learning.")
+            return service._call_openai(prompt)
+        except Exception:
+            return ''
+
+    @classmethod
+    def generate_personalized_roadmap(cls, user, career_goal: str, current_skills: List[str] = None,
+                                      experience_level: str = 'beginner', time_commitment: int = 10,
+                                      target_months: int = 12, learning_style: str = 'mixed',
+                                      focus_areas: List[str] = None, ai_summary: bool = False):
+        """Plan and save a roadmap towards a career path or a list of named skills"""
+        career_path = _find_career_path(career_goal)
+        target_skill_ids = skill_ids_named(focus_areas or [])
+        if career_path:
+            target_skill_ids += career_path.required_skills.values_list('id', flat=True)
+        else:
+            target_skill_ids += skill_ids_named([career_goal])
+        target_skill_ids = sorted(set(target_skill_ids))
+        if not target_skill_ids:
+            raise ValueError(f"No career path or skill matches '{career_goal}'")
+
+        credit = known_skill_credit(user, current_skills or [])
+        start_date = timezone.now().date()
+        target_date = start_date + timedelta(days=target_months * DAYS_PER_MONTH)
+        plan = plan_skills(target_skill_ids, credit, time_commitment, start_date)
+
+        recommendations = []
+        if plan.completion_date > target_date:
+            needed = -(-plan.total_hours * 7 // max(1, (target_date - start_date).days))
+            recommendations.append(
+                f"This plan needs {plan.total_hours} hours; about {needed} hours per week "
+                f"would finish it within {target_months} months."
+            )
+        if LEVEL_RANK.get(experience_level, 1) > 1 and not credit:
+            recommendations.append("Add skill assessments so skills you already know are left out of the plan.")
+
+        description = (f"{len(plan.milestones)} milestones, {plan.total_hours} hours at "
+                       f"{time_commitment} hours per week.")
+        if ai_summary:
+            names = dict(Skill.objects.filter(id__in=[m.skill_id for m in plan.milestones]).values_list('id', 'name'))
+            prose = cls.describe_roadmap(career_goal, [names[m.skill_id] for m in plan.milestones],
+                                         len(plan.weekly_goals), learning_style)
+            description = prose or description
+
+        return create_planned_roadmap(
+            user,
+            title=f"{career_path.title if career_path else career_goal} Roadmap",
+            target_skill_ids=target_skill_ids,
+            plan=plan,
+            description=description,
+            career_path=career_path,
+            hours_per_week=time_commitment,
+            start_date=start_date,
+            target_completion_date=max(target_date, plan.completion_date),
+            current_skill_level={str(skill_id): share for skill_id, share in credit.items()},
+            recommendations=recommendations,
+        )
+
+    @classmethod
+    def analyze_skill_gaps(cls, user, target_career_path_id: int, current_skills_assessment: Dict[str, str]) -> Dict:
+        """Compare stated skill levels (skill name or id -> level) with a career path's requirements"""
+        career_path = CareerPath.objects.get(id=target_career_path_id)
+        required = list(career_path.required_skills.values('id', 'name', 'difficulty_level', 'estimated_hours'))
+        required_ids = {skill['id'] for skill in required}
+
+        graph = get_skill_graph()
+        lookup = {str(key).strip().lower(): level for key, level in current_skills_assessment.items()}
+        levels, known = {}, []
+        candidates = Skill.objects.filter(id__in=graph.unlock_path(required_ids)).values('id', 'name', 'difficulty_level')
+        for skill in candidates:
+            level = lookup.get(str(skill['id'])) or lookup.get(skill['name'].lower())
+            if level:
+                levels[skill['id']] = level
+                if level_credit(level, skill['difficulty_level']) >= 1.0:
+                    known.append(skill['id'])
+
+        missing, partial, met = [], [], []
+        for skill in required:
+            level = levels.get(skill['id'])
+            entry = {'skill_id': skill['id'], 'name': skill['name'], 'required_level': skill['difficulty_level']}
+            if not level:
+                missing.append(entry)
+                continue
+            share = level_credit(level, skill['difficulty_level'])
+            entry.update(current_level=level, remaining_hours=round(skill['estimated_hours'] * (1 - share)))
+            (met if share >= 1.0 else partial).append(entry)
+
+        path = graph.unlock_path([entry['skill_id'] for entry in missing + partial], known_ids=known)
+        names = dict(Skill.objects.filter(id__in=path).values_list('id', 'name'))
+
+        return {
+            'career_path': {'id': career_path.id, 'title': career_path.title},
+            'readiness_percentage': round(len(met) / len(required) * 100, 1) if required else 100.0,
+            'met_skills': met,
+            'partial_skills': partial,
+            'missing_skills': missing,
+            'learning_path': [{'skill_id': skill_id, 'name': names.get(skill_id, '')} for skill_id in path],
+            'estimated_hours': sum(graph.hours[graph.index[skill_id]] for skill_id in path),
+            'success': True
+        }
+
+    @classmethod
+    def update_roadmap_progress(cls, roadmap) -> Dict:
+        """Recompute overall progress as the estimated-hours weighted milestone progress"""
+        milestones = roadmap.milestones.all()
+        totals = milestones.aggregate(
+            weighted=Sum(F('progress_percentage') * F('estimated_hours')),
+            hours=Sum('estimated_hours'),
+        )
+        completed = list(milestones.filter(status='completed').values_list('id', flat=True))
+        total = milestones.count()
+
+        progress = round((totals['weighted'] or 0) / totals['hours']) if totals['hours'] else 0
+        roadmap.overall_progress_percentage = min(100, progress)
+        roadmap.completed_milestones = completed
+        if total and len(completed) == total:
+            roadmap.status = 'completed'
+        elif roadmap.status in ('draft', 'completed'):
+            roadmap.status = 'active'
+        roadmap.save(update_fields=['overall_progress_percentage', 'completed_milestones', 'status', 'updated_at'])
+
+        return {
+            'overall_progress_percentage': roadmap.overall_progress_percentage,
+            'completed_milestones': len(completed),
+            'total_milestones': total,
+            'status': roadmap.status
+        }
+
+    @classmethod
+    def recommend_learning_resources(cls, user, skill_ids: List[int], learning_style: str = 'mixed',
+                                     difficulty_level: str = 'intermediate', limit: int = 10,
+                                     offset: int = 0) -> Dict:
+        """Best resources for the skills from the precomputed ranking, skipping finished ones"""
+        recommendations, total = recommend_resources(user, skill_ids, learning_style, difficulty_level,
+                                                     limit, offset)
+        return {
+            'recommendations': recommendations,
+            'total': total,
+            'learning_style': learning_style,
+            'difficulty_level': difficulty_level,
+            'success': True
+        }
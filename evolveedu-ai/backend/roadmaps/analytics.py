@@ -0,0 +1,86 @@
+"""
+Roadmap Analytics
+Milestone aggregates for the roadmap dashboard, computed with one grouped
+conditional-aggregation query and cached per roadmap until a milestone changes.
+"""
+
+from typing import Dict
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import RoadmapMilestone
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def _cache_key(roadmap_id: int) -> str:
+    return f'roadmaps:analytics:{roadmap_id}'
+
+
+def milestone_aggregates(roadmap_id: int) -> Dict:
+    """Milestone counts and hours per skill category, plus their totals"""
+    rows = (RoadmapMilestone.objects
+            .filter(roadmap_id=roadmap_id)
+            .values('skill__category__name')
+            .annotate(
+                total=Count('id'),
+                completed=Count('id', filter=Q(status='completed')),
+                in_progress=Count('id', filter=Q(status='in_progress')),
+                estimated_hours=Sum('estimated_hours'),
+                actual_hours=Sum('actual_hours_spent'),
+            )
+            .order_by('skill__category__name'))
+
+    totals = {'total': 0, 'completed': 0, 'in_progress': 0, 'estimated_hours': 0, 'actual_hours': 0}
+    categories = {}
+    for row in rows:
+        for key in totals:
+            totals[key] += row[key] or 0
+        categories[row['skill__category__name']] = {'completed': row['completed'], 'total': row['total']}
+    totals['categories'] = categories
+    return totals
+
+
+def cached_milestone_aggregates(roadmap_id: int) -> Dict:
+    key = _cache_key(roadmap_id)
+    aggregates = cache.get(key)
+    if aggregates is None:
+        aggregates = milestone_aggregates(roadmap_id)
+        cache.set(key, aggregates, CACHE_TIMEOUT)
+    return aggregates
+
+
+def invalidate_roadmap_analytics(roadmap_id: int):
+    cache.delete(_cache_key(roadmap_id))
+
+
+def roadmap_dashboard(roadmap) -> Dict:
+    """Dashboard payload; only the date arithmetic is done per request"""
+    aggregates = cached_milestone_aggregates(roadmap.id)
+    total, completed, in_progress = aggregates['total'], aggregates['completed'], aggregates['in_progress']
+    estimated, actual = aggregates['estimated_hours'], aggregates['actual_hours']
+    today = timezone.now().date()
+
+    return {
+        'roadmap_id': roadmap.id,
+        'title': roadmap.title,
+        'overall_progress': roadmap.overall_progress_percentage,
+        'completion_rate': round(completed / total * 100, 1) if total > 0 else 0,
+        'milestones': {
+            'total': total,
+            'completed': completed,
+            'in_progress': in_progress,
+            'not_started': total - completed - in_progress
+        },
+        'time_tracking': {
+            'estimated_hours': estimated,
+            'actual_hours': actual,
+            'days_since_start': (today - roadmap.start_date).days,
+            'days_remaining': max(0, (roadmap.target_completion_date - today).days),
+            'efficiency_ratio': round(actual / estimated, 2) if estimated > 0 else 0
+        },
+        'skill_categories_progress': aggregates['categories'],
+        'status': roadmap.status
+    }
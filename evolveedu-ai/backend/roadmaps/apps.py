@@ -0,0 +1,9 @@
+# roadmaps/apps.py
+from django.apps import AppConfig
+
+
+class RoadmapsConfig(AppConfig):
+    name = 'roadmaps'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,94 @@
+"""
+Reference Data Catalog
+Skill categories, skills, career paths and learning resources change rarely and are
+read on every catalog page. The catalog serializes all of them once, with counts
+annotated, into plain dicts keyed by id and keeps them in process memory as a
+VersionedCache that model signals invalidate. Catalog endpoints read rows from here
+and use a digest of the catalog's content as their ETag, which every process that
+built the same catalog agrees on. The ids on each list page are cached too, keyed by
+the catalog version and the request's query parameters.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List
+
+from django.db.models import Count
+
+from .models import CareerPath, LearningResource, Skill, SkillCategory
+from .serializers import (
+    CareerPathListSerializer, CareerPathSerializer, LearningResourceSerializer,
+    SkillCategorySerializer, SkillListSerializer, SkillSerializer
+)
+from .versioning import LOCAL_MAX_AGE, VersionedCache, cache_is_shared
+
+PAGE_CACHE_SECONDS = 10 * 60
+
+
+def _plain(data) -> List[Dict]:
+    return [dict(row) for row in data]
+
+
+def _by_id(rows: List[Dict]) -> Dict[int, Dict]:
+    return {row['id']: row for row in rows}
+
+
+@dataclass
+class Catalog:
+    categories: Dict[int, Dict]         # SkillCategorySerializer rows
+    skills: Dict[int, Dict]             # SkillSerializer rows
+    skill_rows: Dict[int, Dict]         # SkillListSerializer rows
+    career_paths: Dict[int, Dict]       # CareerPathSerializer rows
+    career_path_rows: Dict[int, Dict]   # CareerPathListSerializer rows
+    resources: Dict[int, Dict]          # LearningResourceSerializer rows without user progress
+    digest: str = ''
+
+    @classmethod
+    def load(cls) -> 'Catalog':
+        categories = SkillCategory.objects.annotate(skills_total=Count('skills')).order_by('name')
+        skills = list(Skill.objects.select_related('category').prefetch_related('prerequisites'))
+        career_paths = list(
+            CareerPath.objects
+            .select_related('category')
+            .prefetch_related('required_skills__category', 'recommended_skills__category')
+            .annotate(required_skills_total=Count('required_skills', distinct=True))
+        )
+        resources = LearningResource.objects.prefetch_related('skills__category')
+
+        catalog = cls(
+            categories=_by_id(_plain(SkillCategorySerializer(categories, many=True).data)),
+            skills=_by_id(_plain(SkillSerializer(skills, many=True).data)),
+            skill_rows=_by_id(_plain(SkillListSerializer(skills, many=True).data)),
+            career_paths=_by_id(_plain(CareerPathSerializer(career_paths, many=True).data)),
+            career_path_rows=_by_id(_plain(CareerPathListSerializer(career_paths, many=True).data)),
+            resources=_by_id(_plain(LearningResourceSerializer(resources, many=True).data)),
+        )
+        content = json.dumps([catalog.categories, catalog.skills, catalog.career_paths, catalog.resources],
+                             sort_keys=True, default=str)
+        catalog.digest = hashlib.sha1(content.encode()).hexdigest()
+        return catalog
+
+
+catalog_cache = VersionedCache('roadmaps:catalog_version', Catalog.load)
+
+
+def get_catalog() -> Catalog:
+    return catalog_cache.get()
+
+
+def invalidate_catalog():
+    catalog_cache.invalidate()
+
+
+def catalog_version() -> int:
+    return catalog_cache.own_version()
+
+
+def page_cache_seconds() -> int:
+    # A per-process cache only hears about this process's edits, like the catalog itself
+    return PAGE_CACHE_SECONDS if cache_is_shared() else LOCAL_MAX_AGE
+
+
+def catalog_etag(request, *args, **kwargs) -> str:
+    return f'catalog-{get_catalog().digest}'
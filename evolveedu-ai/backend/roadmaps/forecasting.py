@@ -0,0 +1,249 @@
+"""
+Roadmap Forecasting
+Predicts when a roadmap will be finished from the remaining milestone hours, the
+learner's observed pace (actual against estimated hours on finished milestones) and
+their weekly hours. Milestones depend on each other through skill prerequisites; the
+longest remaining-hours chain through that DAG is reported as the critical path.
+
+The dependency state is cached per roadmap. A milestone update only recomputes the
+longest-path values of that milestone's dependents instead of rebuilding the state.
+Each update moves the roadmap's revision and is folded in only when the cached state
+is at the revision just before it; when updates race, the state is left behind its
+revision and the next read rebuilds it from the database.
+"""
+
+import heapq
+import math
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import RoadmapMilestone
+from .skill_graph import get_skill_graph, graph_version
+from .versioning import current_version
+
+CACHE_TIMEOUT = 60 * 60 * 24
+MIN_VELOCITY_FACTOR = 0.5
+MAX_VELOCITY_FACTOR = 3.0
+DONE_STATUSES = ('completed', 'skipped')
+MILESTONE_FIELDS = ('id', 'title', 'skill_id', 'status', 'estimated_hours', 'actual_hours_spent',
+                    'progress_percentage', 'planned_end_date', 'order')
+
+
+def _cache_key(roadmap_id: int) -> str:
+    return f'roadmaps:forecast:{roadmap_id}'
+
+
+def _revision_key(roadmap_id: int) -> str:
+    return f'roadmaps:forecast:{roadmap_id}:revision'
+
+
+def _remaining_hours(row: Dict) -> float:
+    if row['status'] in DONE_STATUSES:
+        return 0.0
+    return max(0, row['estimated_hours']) * (1 - min(100, max(0, row['progress_percentage'])) / 100)
+
+
+@dataclass
+class ForecastState:
+    """Milestone rows, dependency lists and longest-path values of one roadmap"""
+    version: str                              # Digest of the skill graph it was built from
+    rows: Dict[int, Dict]
+    sequence: List[int]                       # Milestone ids in a dependency-respecting study order
+    predecessors: Dict[int, List[int]]
+    successors: Dict[int, List[int]]
+    remaining: Dict[int, float] = field(default_factory=dict)
+    longest: Dict[int, float] = field(default_factory=dict)
+    best_predecessor: Dict[int, Optional[int]] = field(default_factory=dict)
+    revision: int = 0                         # Roadmap revision the state is current for
+
+    @classmethod
+    def build(cls, roadmap_id: int) -> 'ForecastState':
+        graph = get_skill_graph()
+        version = graph.digest
+        rows = {row['id']: row for row in
+                RoadmapMilestone.objects.filter(roadmap_id=roadmap_id).values(*MILESTONE_FIELDS)}
+
+        by_skill: Dict[int, List[int]] = {}
+        for milestone_id, row in rows.items():
+            by_skill.setdefault(row['skill_id'], []).append(milestone_id)
+
+        predecessors = {milestone_id: [] for milestone_id in rows}
+        successors = {milestone_id: [] for milestone_id in rows}
+        for milestone_id, row in rows.items():
+            for skill_id in graph.ids_of(graph.ancestor_mask(row['skill_id'])):
+                for prerequisite_id in by_skill.get(skill_id, ()):
+                    predecessors[milestone_id].append(prerequisite_id)
+                    successors[prerequisite_id].append(milestone_id)
+
+        state = cls(version=version, rows=rows, sequence=cls._study_order(rows, predecessors, successors),
+                    predecessors=predecessors, successors=successors)
+        for milestone_id in state.sequence:
+            state.remaining[milestone_id] = _remaining_hours(rows[milestone_id])
+            state._relax(milestone_id)
+        return state
+
+    @staticmethod
+    def _study_order(rows, predecessors, successors) -> List[int]:
+        """Kahn's algorithm taking the lowest milestone order first"""
+        pending = {milestone_id: len(preds) for milestone_id, preds in predecessors.items()}
+        ready = [(rows[m]['order'], m) for m, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        sequence = []
+        while ready:
+            _, milestone_id = heapq.heappop(ready)
+            sequence.append(milestone_id)
+            for dependent in successors[milestone_id]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, (rows[dependent]['order'], dependent))
+        # Milestones caught in a prerequisite cycle are appended in their own order
+        placed = set(sequence)
+        leftover = sorted((m for m in rows if m not in placed), key=lambda m: rows[m]['order'])
+        return sequence + leftover
+
+    def _relax(self, milestone_id: int) -> bool:
+        """Recompute the longest chain ending at a milestone; True when it changed"""
+        best, best_predecessor = 0.0, None
+        for predecessor in self.predecessors[milestone_id]:
+            if self.longest.get(predecessor, 0.0) > best:
+                best, best_predecessor = self.longest[predecessor], predecessor
+        value = best + self.remaining[milestone_id]
+        changed = (self.longest.get(milestone_id) != value
+                   or self.best_predecessor.get(milestone_id) != best_predecessor)
+        self.longest[milestone_id] = value
+        self.best_predecessor[milestone_id] = best_predecessor
+        return changed
+
+    def update(self, row: Dict):
+        """Apply a changed milestone and propagate through its dependents only"""
+        milestone_id = row['id']
+        self.rows[milestone_id] = row
+        self.remaining[milestone_id] = _remaining_hours(row)
+
+        position = {m: i for i, m in enumerate(self.sequence)}
+        queue = [(position[milestone_id], milestone_id)]
+        queued = {milestone_id}
+        while queue:
+            _, current = heapq.heappop(queue)
+            if self._relax(current) or current == milestone_id:
+                for dependent in self.successors[current]:
+                    if dependent not in queued:
+                        queued.add(dependent)
+                        heapq.heappush(queue, (position[dependent], dependent))
+
+    def velocity_factor(self) -> float:
+        """Actual over estimated hours on finished milestones, 1.0 before there is evidence"""
+        finished = [row for row in self.rows.values()
+                    if row['status'] == 'completed' and row['actual_hours_spent'] > 0 and row['estimated_hours'] > 0]
+        if not finished:
+            return 1.0
+        factor = sum(row['actual_hours_spent'] for row in finished) / sum(row['estimated_hours'] for row in finished)
+        return min(MAX_VELOCITY_FACTOR, max(MIN_VELOCITY_FACTOR, factor))
+
+    def critical_path(self) -> List[int]:
+        milestone_id, best = None, 0.0
+        for candidate in self.sequence:
+            if self.longest[candidate] > best:
+                milestone_id, best = candidate, self.longest[candidate]
+        path = []
+        while milestone_id is not None:
+            path.append(milestone_id)
+            milestone_id = self.best_predecessor[milestone_id]
+        return path[::-1]
+
+
+def _date_after(today: date, hours: float, hours_per_week: int) -> date:
+    return today + timedelta(days=math.ceil(hours * 7 / max(1, hours_per_week)))
+
+
+def forecast_state(roadmap_id: int) -> ForecastState:
+    revision = current_version(_revision_key(roadmap_id))
+    state = cache.get(_cache_key(roadmap_id))
+    if state is None or state.version != graph_version() or state.revision != revision:
+        state = ForecastState.build(roadmap_id)
+        state.revision = revision
+        cache.set(_cache_key(roadmap_id), state, CACHE_TIMEOUT)
+    return state
+
+
+def apply_milestone_update(milestone):
+    """Fold a committed milestone change into the cached state, if it is the only change since.
+
+    Moving the revision is the compare-and-set: when another update got in between,
+    the cached state stays behind the revision and is rebuilt on the next read.
+    """
+    key = _cache_key(milestone.roadmap_id)
+    try:
+        revision = cache.incr(_revision_key(milestone.roadmap_id))
+    except ValueError:
+        # No revision yet, so nothing can be cached against one
+        return
+    state = cache.get(key)
+    if (state is None or state.revision != revision - 1 or state.version != graph_version()
+            or milestone.id not in state.rows or state.rows[milestone.id]['skill_id'] != milestone.skill_id):
+        return
+    state.update({name: getattr(milestone, name) for name in MILESTONE_FIELDS})
+    state.revision = revision
+    cache.set(key, state, CACHE_TIMEOUT)
+
+
+def invalidate_forecast(roadmap_id: int):
+    cache.delete(_cache_key(roadmap_id))
+
+
+def forecast_roadmap(roadmap, today: date = None) -> Dict:
+    """Forecast completion and at-risk milestones of a roadmap"""
+    today = today or timezone.now().date()
+    state = forecast_state(roadmap.id)
+    factor = state.velocity_factor()
+    hours_per_week = roadmap.estimated_hours_per_week
+
+    remaining = sum(state.remaining.values())
+    adjusted = remaining * factor
+    completion = _date_after(today, adjusted, hours_per_week)
+    late = completion > roadmap.target_completion_date
+    critical = state.critical_path()
+    critical_set = set(critical)
+
+    at_risk, elapsed = [], 0.0
+    for milestone_id in state.sequence:
+        row = state.rows[milestone_id]
+        if row['status'] in DONE_STATUSES:
+            continue
+        elapsed += state.remaining[milestone_id] * factor
+        projected_end = _date_after(today, elapsed, hours_per_week)
+        reasons = []
+        if row['planned_end_date'] and projected_end > row['planned_end_date']:
+            reasons.append('behind_plan')
+        if late and milestone_id in critical_set:
+            reasons.append('critical_path')
+        if reasons:
+            at_risk.append({
+                'milestone_id': milestone_id,
+                'title': row['title'],
+                'planned_end_date': row['planned_end_date'],
+                'projected_end_date': projected_end,
+                'reasons': reasons,
+            })
+
+    return {
+        'roadmap_id': roadmap.id,
+        'remaining_hours': round(remaining, 1),
+        'velocity_factor': round(factor, 2),
+        'adjusted_remaining_hours': round(adjusted, 1),
+        'hours_per_week': hours_per_week,
+        'forecast_completion_date': completion,
+        'target_completion_date': roadmap.target_completion_date,
+        'on_track': not late,
+        'days_late': max(0, (completion - roadmap.target_completion_date).days),
+        'critical_path': [
+            {'milestone_id': m, 'title': state.rows[m]['title'], 'remaining_hours': round(state.remaining[m], 1)}
+            for m in critical
+        ],
+        'critical_path_hours': round(state.longest[critical[-1]], 1) if critical else 0,
+        'at_risk_milestones': at_risk,
+    }
@@ -0,0 +1,150 @@
+"""
+Career Gap Engine
+Ranks every career path by how close a learner is to it. Career paths are rows of
+path x skill matrices over the skill catalog (required skills together with their
+prerequisites, and recommended skills); a learner is a coverage vector built from
+their skill assessments. Gap scores, missing hours and salary impact per hour for
+all paths come out of a few matrix products.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from .models import CareerPath, Skill, SkillAssessment
+from .planner import LEVEL_RANK
+from .skill_graph import skill_graph_cache, get_skill_graph
+from .versioning import VersionedCache
+
+REQUIRED_WEIGHT = 1.0
+RECOMMENDED_WEIGHT = 0.3
+MISSING_SKILLS_SHOWN = 5
+SORT_KEYS = ('readiness', 'hours', 'salary')
+
+
+@dataclass
+class CareerMatrix:
+    skill_ids: List[int]
+    skill_names: List[str]
+    hours: np.ndarray               # (skills,)
+    salary_impact: np.ndarray       # (skills,)
+    difficulty: np.ndarray          # (skills,) LEVEL_RANK of each skill
+    path_ids: List[int]
+    path_titles: List[str]
+    salary_mid: np.ndarray          # (paths,)
+    required: np.ndarray            # (paths, skills) required skills only
+    required_closure: np.ndarray    # (paths, skills) required skills and all their prerequisites
+    weights: np.ndarray             # (paths, skills) REQUIRED_WEIGHT / RECOMMENDED_WEIGHT per cell
+
+    @classmethod
+    def load(cls) -> 'CareerMatrix':
+        graph = get_skill_graph()
+        n_skills = len(graph)
+        hours = np.array(graph.hours, dtype=float)
+        salary_impact = np.zeros(n_skills)
+        difficulty = np.ones(n_skills)
+        names = [''] * n_skills
+        for skill_id, name, impact, level in Skill.objects.values_list('id', 'name', 'avg_salary_impact',
+                                                                         'difficulty_level'):
+            if skill_id in graph:
+                i = graph.index[skill_id]
+                names[i], salary_impact[i], difficulty[i] = name, impact, LEVEL_RANK.get(level, 1)
+
+        paths = list(CareerPath.objects.order_by('id').values_list(
+            'id', 'title', 'average_salary_min', 'average_salary_max'))
+        path_index = {row[0]: i for i, row in enumerate(paths)}
+        required = np.zeros((len(paths), n_skills), dtype=bool)
+        recommended = np.zeros((len(paths), n_skills), dtype=bool)
+        for matrix, through in ((required, CareerPath.required_skills.through),
+                                (recommended, CareerPath.recommended_skills.through)):
+            for path_id, skill_id in through.objects.values_list('careerpath_id', 'skill_id'):
+                if skill_id in graph:
+                    matrix[path_index[path_id], graph.index[skill_id]] = True
+
+        # Skill x ancestor matrix from the graph's bitsets, so prerequisites count as required
+        ancestors = np.zeros((n_skills, n_skills), dtype=bool)
+        for i, mask in enumerate(graph.ancestors):
+            if mask:
+                ancestors[i, graph.indices_of(mask)] = True
+        required_closure = required | ((required.astype(np.float32) @ ancestors.astype(np.float32)) > 0)
+
+        weights = np.where(required_closure, REQUIRED_WEIGHT, np.where(recommended, RECOMMENDED_WEIGHT, 0.0))
+        return cls(
+            skill_ids=list(graph.ids),
+            skill_names=names,
+            hours=hours,
+            salary_impact=salary_impact,
+            difficulty=difficulty,
+            path_ids=[row[0] for row in paths],
+            path_titles=[row[1] for row in paths],
+            salary_mid=np.array([(row[2] + row[3]) / 2 for row in paths], dtype=float),
+            required=required,
+            required_closure=required_closure,
+            weights=weights,
+        )
+
+    def coverage(self, levels: Dict[int, str]) -> np.ndarray:
+        """Share of each skill a learner already covers, from skill id -> assessed level"""
+        current = np.zeros(len(self.skill_ids))
+        index = {skill_id: i for i, skill_id in enumerate(self.skill_ids)}
+        for skill_id, level in levels.items():
+            if skill_id in index:
+                current[index[skill_id]] = LEVEL_RANK.get(level, 0)
+        return np.minimum(1.0, current / self.difficulty)
+
+
+_matrix_cache = VersionedCache('roadmaps:career_matrix_version', CareerMatrix.load, depends_on=[skill_graph_cache])
+
+
+def invalidate_career_matrix():
+    _matrix_cache.invalidate()
+
+
+def get_career_matrix() -> CareerMatrix:
+    return _matrix_cache.get()
+
+
+def rank_career_paths(levels: Dict[int, str], sort: str = 'readiness', limit: int = 10) -> List[Dict]:
+    """Career paths ordered by closeness to a learner with the given assessed levels"""
+    matrix = get_career_matrix()
+    if not matrix.path_ids:
+        return []
+
+    gap = 1.0 - matrix.coverage(levels)
+    weighted = matrix.weights * matrix.hours
+    total = weighted.sum(axis=1)
+    gap_score = np.divide(weighted @ gap, total, out=np.zeros_like(total), where=total > 0)
+
+    closure = matrix.required_closure.astype(float)
+    missing_hours = closure @ (matrix.hours * gap)
+    salary_per_hour = np.divide(closure @ (matrix.salary_impact * gap), missing_hours,
+                                out=np.zeros_like(missing_hours), where=missing_hours > 0)
+    missing_required = matrix.required & (gap > 0)
+
+    if sort == 'hours':
+        order = np.lexsort((gap_score, missing_hours))
+    elif sort == 'salary':
+        order = np.lexsort((missing_hours, -salary_per_hour))
+    else:
+        order = np.lexsort((missing_hours, gap_score))
+
+    ranked = []
+    for row in order[:limit]:
+        missing = np.flatnonzero(missing_required[row])
+        ranked.append({
+            'career_path_id': matrix.path_ids[row],
+            'title': matrix.path_titles[row],
+            'readiness_percentage': round(float(1.0 - gap_score[row]) * 100, 1),
+            'gap_score': round(float(gap_score[row]), 3),
+            'missing_hours': round(float(missing_hours[row]), 1),
+            'salary_impact_per_hour': round(float(salary_per_hour[row]), 2),
+            'average_salary': round(float(matrix.salary_mid[row])),
+            'missing_required_skills': int(missing.size),
+            'top_missing_skills': [matrix.skill_names[i] for i in missing[:MISSING_SKILLS_SHOWN]],
+        })
+    return ranked
+
+
+def user_skill_levels(user) -> Dict[int, str]:
+    return dict(SkillAssessment.objects.filter(user=user).values_list('skill_id', 'current_level'))
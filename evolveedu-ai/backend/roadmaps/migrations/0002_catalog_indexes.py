@@ -0,0 +1,57 @@
+# Generated by Django 4.2.6 on 2026-10-19 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roadmaps', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='careerpath',
+            index=models.Index(fields=['category', 'difficulty_level', 'title'], name='career_category_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='careerpath',
+            index=models.Index(fields=['average_salary_min'], name='career_salary_min_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='careerpath',
+            index=models.Index(fields=['-average_salary_max', 'title'], name='career_salary_max_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='careerpath',
+            index=models.Index(fields=['-job_growth_rate', 'title'], name='career_growth_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learningresource',
+            index=models.Index(fields=['resource_type', 'difficulty_level', 'cost'], name='resource_type_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learningresource',
+            index=models.Index(fields=['difficulty_level', 'cost'], name='resource_difficulty_cost_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learningresource',
+            index=models.Index(fields=['-rating', 'title'], name='resource_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learningresource',
+            index=models.Index(fields=['is_recommended', '-content_quality_score'], name='resource_recommended_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['category', 'difficulty_level', 'name'], name='skill_category_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['difficulty_level', 'name'], name='skill_difficulty_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['-market_demand', 'name'], name='skill_demand_idx'),
+        ),
+    ]
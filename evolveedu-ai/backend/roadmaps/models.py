@@ -48,8 +48,23 @@ class Skill(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def difficulty_rank(cls, field: str = 'difficulty_level'):
+        """Ordinal of a DIFFICULTY_LEVELS column, so difficulty can be sorted in the database"""
+        return models.Case(
+            *[models.When(**{field: level}, then=models.Value(rank))
+              for rank, (level, _) in enumerate(cls.DIFFICULTY_LEVELS)],
+            default=models.Value(len(cls.DIFFICULTY_LEVELS)),
+            output_field=models.IntegerField(),
+        )
+
     class Meta:
         unique_together = ['name', 'category']
+        indexes = [
+            models.Index(fields=['category', 'difficulty_level', 'name'], name='skill_category_difficulty_idx'),
+            models.Index(fields=['difficulty_level', 'name'], name='skill_difficulty_name_idx'),
+            models.Index(fields=['-market_demand', 'name'], name='skill_demand_idx'),
+        ]
 
 
 class CareerPath(models.Model):
@@ -75,6 +90,14 @@ class CareerPath(models.Model):
     def __str__(self):
         return self.title
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'difficulty_level', 'title'], name='career_category_difficulty_idx'),
+            models.Index(fields=['average_salary_min'], name='career_salary_min_idx'),
+            models.Index(fields=['-average_salary_max', 'title'], name='career_salary_max_idx'),
+            models.Index(fields=['-job_growth_rate', 'title'], name='career_growth_idx'),
+        ]
+
 
 class PersonalizedRoadmap(models.Model):
     STATUS_CHOICES = [
@@ -226,6 +249,14 @@ class LearningResource(models.Model):
     def __str__(self):
         return self.title
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['resource_type', 'difficulty_level', 'cost'], name='resource_type_difficulty_idx'),
+            models.Index(fields=['difficulty_level', 'cost'], name='resource_difficulty_cost_idx'),
+            models.Index(fields=['-rating', 'title'], name='resource_rating_idx'),
+            models.Index(fields=['is_recommended', '-content_quality_score'], name='resource_recommended_idx'),
+        ]
+
 
 class UserProgress(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='learning_progress')
@@ -257,4 +288,20 @@ class UserProgress(models.Model):
         return f"{self.user.email} - {self.resource.title} - {self.progress_percentage}%"
 
     class Meta:
-        unique_together = ['user', 'resource']
\ No newline at end of file
+        unique_together = ['user', 'resource']
+
+
+class DailyStudyTime(models.Model):
+    """Minutes a user spent on a resource, one row per (local) day"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_study_time')
+    resource = models.ForeignKey(LearningResource, on_delete=models.CASCADE, related_name='daily_study_time')
+    date = models.DateField()
+    minutes = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.email} - {self.resource.title} - {self.date}: {self.minutes}m"
+
+    class Meta:
+        # The unique index also serves per-user date range scans
+        unique_together = ['user', 'date', 'resource']
+        ordering = ['-date']
@@ -0,0 +1,170 @@
+"""
+Roadmap Planner
+Deterministic roadmap construction: target skills are expanded with their missing
+prerequisites from the skill graph (skipping known skills and what they imply), put
+in learning order and laid end to end over the learner's weekly hour budget, filling
+each week before the next. Milestones get planned dates from that schedule and are
+inserted with a single bulk_create.
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import PersonalizedRoadmap, RoadmapMilestone, Skill, SkillAssessment
+from .skill_graph import get_skill_graph
+
+LEVEL_RANK = {'beginner': 1, 'intermediate': 2, 'advanced': 3, 'expert': 4}
+MIN_MILESTONE_HOURS = 1
+
+
+def level_credit(current_level: str, skill_level: str) -> float:
+    """Share of a skill already covered by a learner at current_level (1.0 means nothing left)"""
+    current, required = LEVEL_RANK.get(current_level, 0), LEVEL_RANK.get(skill_level, 1)
+    return min(1.0, current / required)
+
+
+def skill_ids_named(names: Iterable[str]) -> List[int]:
+    """Ids of skills whose name matches any of the names, ignoring case"""
+    names = {name.strip() for name in names if name and name.strip()}
+    if not names:
+        return []
+    query = Q()
+    for name in names:
+        query |= Q(name__iexact=name)
+    return list(Skill.objects.filter(query).values_list('id', flat=True))
+
+
+def known_skill_credit(user, skill_names: Iterable[str] = ()) -> Dict[int, float]:
+    """Credit per skill id from the user's assessments and skills they name as already known"""
+    credit = {}
+    assessments = SkillAssessment.objects.filter(user=user).values_list(
+        'skill_id', 'current_level', 'skill__difficulty_level'
+    )
+    for skill_id, current_level, skill_level in assessments:
+        credit[skill_id] = level_credit(current_level, skill_level)
+
+    for skill_id in skill_ids_named(skill_names):
+        credit[skill_id] = 1.0
+    return credit
+
+
+@dataclass
+class PlannedMilestone:
+    skill_id: int
+    hours: int
+    order: int
+    start_date: date
+    end_date: date
+
+
+@dataclass
+class RoadmapPlan:
+    milestones: List[PlannedMilestone] = field(default_factory=list)
+    weekly_goals: List[Dict] = field(default_factory=list)
+    total_hours: int = 0
+    completion_date: Optional[date] = None
+
+
+def _day_offset(hours: float, hours_per_week: int) -> int:
+    return int(hours * 7 / hours_per_week)
+
+
+def schedule(skill_hours: List[tuple], hours_per_week: int, start_date: date) -> RoadmapPlan:
+    """
+    Lay (skill_id, hours) pairs end to end in the given order. Each week takes
+    hours_per_week of work; a skill that does not fit in the rest of a week spills
+    into the following ones, so weeks are filled completely before the next starts.
+    """
+    hours_per_week = max(1, hours_per_week)
+    plan = RoadmapPlan()
+    cursor = 0
+    weeks: Dict[int, Dict] = {}
+
+    for order, (skill_id, hours) in enumerate(skill_hours, start=1):
+        hours = max(MIN_MILESTONE_HOURS, int(math.ceil(hours)))
+        start, end = cursor, cursor + hours
+        plan.milestones.append(PlannedMilestone(
+            skill_id=skill_id,
+            hours=hours,
+            order=order,
+            start_date=start_date + timedelta(days=_day_offset(start, hours_per_week)),
+            end_date=start_date + timedelta(days=max(0, math.ceil(end * 7 / hours_per_week) - 1)),
+        ))
+
+        position = start
+        while position < end:
+            week = position // hours_per_week
+            chunk = min(end, (week + 1) * hours_per_week) - position
+            goal = weeks.setdefault(week, {'week': week + 1, 'hours': 0, 'skill_ids': []})
+            goal['hours'] += chunk
+            goal['skill_ids'].append(skill_id)
+            position += chunk
+        cursor = end
+
+    plan.total_hours = cursor
+    plan.weekly_goals = [weeks[week] for week in sorted(weeks)]
+    for goal in plan.weekly_goals:
+        goal['start_date'] = (start_date + timedelta(weeks=goal['week'] - 1)).isoformat()
+    plan.completion_date = plan.milestones[-1].end_date if plan.milestones else start_date
+    return plan
+
+
+def plan_skills(target_skill_ids: Iterable[int], credit: Dict[int, float], hours_per_week: int,
+                start_date: date) -> RoadmapPlan:
+    """Plan the targets and their missing prerequisites, skipping fully known skills and their prerequisites"""
+    graph = get_skill_graph()
+    known = [skill_id for skill_id, share in credit.items() if share >= 1.0]
+    ordered = graph.unlock_path(target_skill_ids, known_ids=known)
+    skill_hours = [
+        (skill_id, graph.hours[graph.index[skill_id]] * (1.0 - credit.get(skill_id, 0.0)))
+        for skill_id in ordered
+    ]
+    return schedule(skill_hours, hours_per_week, start_date)
+
+
+def create_planned_roadmap(user, title: str, target_skill_ids: List[int], plan: RoadmapPlan, *,
+                           description: str = '', career_path=None, hours_per_week: int = 10,
+                           start_date: date = None, target_completion_date: date = None,
+                           current_skill_level: Dict = None, recommendations: List = None) -> PersonalizedRoadmap:
+    """Persist a plan as a roadmap with one milestone per planned skill"""
+    skills = Skill.objects.in_bulk([milestone.skill_id for milestone in plan.milestones])
+    names = {skill_id: skill.name for skill_id, skill in skills.items()}
+    for goal in plan.weekly_goals:
+        goal['skills'] = [names[skill_id] for skill_id in goal['skill_ids'] if skill_id in names]
+
+    with transaction.atomic():
+        roadmap = PersonalizedRoadmap.objects.create(
+            user=user,
+            title=title,
+            description=description,
+            target_career_path=career_path,
+            current_skill_level=current_skill_level or {},
+            start_date=start_date,
+            target_completion_date=target_completion_date or plan.completion_date,
+            estimated_hours_per_week=hours_per_week,
+            status='active',
+            personalized_recommendations=recommendations or [],
+            weekly_goals=plan.weekly_goals,
+        )
+        roadmap.target_skills.set(target_skill_ids)
+        RoadmapMilestone.objects.bulk_create([
+            RoadmapMilestone(
+                roadmap=roadmap,
+                skill_id=milestone.skill_id,
+                title=f"Learn {skills[milestone.skill_id].name}",
+                description=skills[milestone.skill_id].description,
+                learning_resources=skills[milestone.skill_id].learning_resources,
+                practice_tasks=skills[milestone.skill_id].practice_projects,
+                estimated_hours=milestone.hours,
+                planned_start_date=milestone.start_date,
+                planned_end_date=milestone.end_date,
+                order=milestone.order,
+            )
+            for milestone in plan.milestones
+        ])
+    return roadmap
@@ -0,0 +1,162 @@
+"""
+Resource Progress Tracking
+Applies time and progress reported by clients to UserProgress without read-modify-write
+races: minutes are added with F() expressions inside the UPDATE, so heartbeats arriving
+from several tabs at once are all counted. A batch of heartbeats costs one statement
+per kind of change whatever its size, and minutes are also rolled up per day in
+DailyStudyTime for analytics.
+
+Heartbeat minutes are bounded by the wall clock: the part of a session that fits since
+local midnight counts for today, the rest for yesterday, and no resource gets more
+minutes in a day than that day's elapsed time. The rollup rows are locked while this
+is worked out, and UserProgress is credited exactly what the rollup accepted.
+
+Every change moves a per-user progress version, which list ETags use instead of
+aggregating the user's progress on each request.
+"""
+
+import math
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import DailyStudyTime, LearningResource, UserProgress
+from .versioning import bump_version, current_version
+
+DAY_MINUTES = 24 * 60
+
+
+def _version_key(user_id: int) -> str:
+    return f'roadmaps:progress_version:{user_id}'
+
+
+def progress_version(user_id: int) -> int:
+    return current_version(_version_key(user_id))
+
+
+def touch_progress(user_id: int):
+    """Mark the user's progress as changed (see progress_version)"""
+    bump_version(_version_key(user_id))
+
+
+def _per_resource(values: Dict[int, int]) -> Case:
+    """CASE resource_id WHEN ... THEN value ... ELSE 0 for one bulk UPDATE"""
+    return Case(*(When(resource_id=resource_id, then=Value(value)) for resource_id, value in values.items()),
+                default=Value(0), output_field=IntegerField())
+
+
+def _minutes_since_midnight(when) -> int:
+    """Minutes between local midnight and `when`, rounded up"""
+    local = timezone.localtime(when)
+    midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return math.ceil((local - midnight).total_seconds() / 60)
+
+
+def _credit_days(user, minutes: Dict[int, int], when) -> Dict[int, int]:
+    """
+    Add heartbeat minutes to DailyStudyTime within each day's wall-clock bound and return
+    the minutes credited per resource. Runs inside the caller's transaction.
+    """
+    today = timezone.localdate(when)
+    elapsed = _minutes_since_midnight(when)
+    # (day, minutes reported for it, most minutes that day can hold)
+    parts = [
+        (today, {resource_id: min(value, elapsed) for resource_id, value in minutes.items()}, elapsed),
+        (today - timedelta(days=1), {resource_id: value - elapsed for resource_id, value in minutes.items()},
+         DAY_MINUTES),
+    ]
+
+    credited: Dict[int, int] = {}
+    for day, reported, cap in parts:
+        reported = {resource_id: value for resource_id, value in reported.items() if value > 0}
+        if not reported:
+            continue
+        DailyStudyTime.objects.bulk_create(
+            [DailyStudyTime(user=user, resource_id=resource_id, date=day) for resource_id in reported],
+            ignore_conflicts=True,
+        )
+        # Locked, so concurrent batches see each other's minutes before adding their own
+        rows = list(DailyStudyTime.objects.select_for_update().filter(user=user, date=day, resource_id__in=reported))
+        for row in rows:
+            accepted = max(0, min(reported[row.resource_id], cap - row.minutes))
+            row.minutes += accepted
+            credited[row.resource_id] = credited.get(row.resource_id, 0) + accepted
+        DailyStudyTime.objects.bulk_update(rows, ['minutes'])
+    return {resource_id: value for resource_id, value in credited.items() if value > 0}
+
+
+def _roll_up(user, minutes: Dict[int, int], when):
+    day = timezone.localdate(when)
+    # Rows are created first and then incremented in place, so a concurrent insert is skipped, not lost
+    DailyStudyTime.objects.bulk_create(
+        [DailyStudyTime(user=user, resource_id=resource_id, date=day) for resource_id in minutes],
+        ignore_conflicts=True,
+    )
+    DailyStudyTime.objects.filter(user=user, date=day, resource_id__in=minutes).update(
+        minutes=F('minutes') + _per_resource(minutes))
+
+
+def add_study_time(user, minutes: Dict[int, int], when=None):
+    """
+    Add minutes per resource id, as reported, to the user's existing UserProgress rows
+    and the day's rollup. Used for the time entered on the progress endpoint, which is
+    not bounded like heartbeats.
+    """
+    minutes = {resource_id: value for resource_id, value in minutes.items() if value > 0}
+    if not minutes:
+        return
+    when = when or timezone.now()
+    with transaction.atomic():
+        UserProgress.objects.filter(user=user, resource_id__in=minutes).update(
+            time_spent_minutes=F('time_spent_minutes') + _per_resource(minutes), last_accessed=when)
+        _roll_up(user, minutes, when)
+        touch_progress(user.id)
+
+
+def apply_heartbeats(user, heartbeats: Iterable[Dict], when=None) -> List[int]:
+    """
+    Apply {resource_id, time_spent_minutes, progress_percentage} deltas and return the
+    resource ids that were updated. Minutes add up within the wall-clock bound of the
+    day they fall on, progress only moves forward and unknown resources are skipped.
+    """
+    when = when or timezone.now()
+    minutes: Dict[int, int] = {}
+    progress: Dict[int, int] = {}
+    for beat in heartbeats:
+        resource_id = beat['resource_id']
+        minutes[resource_id] = minutes.get(resource_id, 0) + beat.get('time_spent_minutes', 0)
+        if beat.get('progress_percentage') is not None:
+            progress[resource_id] = max(progress.get(resource_id, 0), beat['progress_percentage'])
+
+    known = sorted(LearningResource.objects.filter(id__in=minutes).values_list('id', flat=True))
+    if not known:
+        return []
+    minutes = {resource_id: minutes[resource_id] for resource_id in known if minutes[resource_id] > 0}
+    progress = {resource_id: progress[resource_id] for resource_id in known if resource_id in progress}
+
+    with transaction.atomic():
+        minutes = _credit_days(user, minutes, when)
+        UserProgress.objects.bulk_create(
+            [UserProgress(user=user, resource_id=resource_id) for resource_id in known], ignore_conflicts=True)
+        rows = UserProgress.objects.filter(user=user, resource_id__in=known)
+        rows.filter(status='not_started').update(status='in_progress', started_at=when)
+        rows.update(
+            time_spent_minutes=F('time_spent_minutes') + _per_resource(minutes),
+            progress_percentage=Greatest(F('progress_percentage'), _per_resource(progress)),
+            last_accessed=when,
+        )
+        touch_progress(user.id)
+    return known
+
+
+def daily_study_minutes(user, days: int = 30, today: date = None) -> Dict[str, int]:
+    """Minutes studied per day over the last `days` days, days without study included as 0"""
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    totals = dict(DailyStudyTime.objects.filter(user=user, date__gte=start, date__lte=today)
+                  .values('date').annotate(total=Sum('minutes')).values_list('date', 'total'))
+    return {(start + timedelta(days=i)).isoformat(): totals.get(start + timedelta(days=i), 0) for i in range(days)}
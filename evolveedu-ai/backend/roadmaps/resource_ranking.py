@@ -0,0 +1,209 @@
+"""
+Learning Resource Ranking
+Content-based resource recommendations without an AI call. Every resource gets a
+precomputed base score from its rating, quality and relevance scores and its
+completion rate in UserProgress. Per-skill candidate lists sorted by that score are
+kept in memory. A request merges the lists of the requested skills with a heap,
+adjusts each candidate for the learner (distance to their assessed level, match
+with their learning style) and stops as soon as no remaining candidate can enter
+the top k. The catalog's recommended sort computes the same base score in SQL so it
+can order and page in the database.
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from django.db.models import Count, F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .catalog import catalog_cache
+from .models import LearningResource, SkillAssessment, UserProgress
+from .planner import LEVEL_RANK
+from .versioning import VersionedCache
+
+# Base score weights (each component is scaled to 0-1)
+RATING_WEIGHT = 0.3
+QUALITY_WEIGHT = 0.25
+RELEVANCE_WEIGHT = 0.25
+COMPLETION_WEIGHT = 0.2
+
+# Per-learner adjustments
+STYLE_WEIGHT = 0.15
+DIFFICULTY_WEIGHT = 0.3
+MAX_LEVEL_DISTANCE = len(LEVEL_RANK) - 1
+
+# Completion rate smoothing towards PRIOR_COMPLETION_RATE for resources few people started
+PRIOR_STARTS = 5
+PRIOR_COMPLETION_RATE = 0.5
+
+REFRESH_SECONDS = 10 * 60  # Completion rates may lag by this much
+
+LEARNING_STYLE_TYPES = {
+    'visual': ('video', 'course'),
+    'hands_on': ('project', 'practice', 'tutorial'),
+    'reading': ('article', 'book', 'documentation'),
+}
+
+
+@dataclass
+class RankedResource:
+    id: int
+    title: str
+    url: str
+    resource_type: str
+    difficulty_level: str
+    rating: float
+    completion_rate: float
+    base_score: float
+
+
+def completion_rate(started: int, completed: int) -> float:
+    return (completed + PRIOR_STARTS * PRIOR_COMPLETION_RATE) / (started + PRIOR_STARTS)
+
+
+def base_score(rating: float, quality: int, relevance: int, completion: float) -> float:
+    return (RATING_WEIGHT * min(5.0, max(0.0, rating)) / 5
+            + QUALITY_WEIGHT * quality / 100
+            + RELEVANCE_WEIGHT * relevance / 100
+            + COMPLETION_WEIGHT * completion)
+
+
+def _progress_count(**filters):
+    counts = (UserProgress.objects.filter(resource=OuterRef('pk'), **filters).order_by()
+              .values('resource').annotate(total=Count('id')).values('total'))
+    return Coalesce(Subquery(counts), 0)
+
+
+def base_score_expression():
+    """base_score() as a database expression over LearningResource, so lists can sort and page by it in SQL"""
+    started = _progress_count(status__in=('in_progress', 'completed'))
+    completed = _progress_count(status='completed')
+    return (RATING_WEIGHT / 5 * Least(Greatest(F('rating'), Value(0.0)), Value(5.0))
+            + QUALITY_WEIGHT / 100 * F('content_quality_score')
+            + RELEVANCE_WEIGHT / 100 * F('relevance_score')
+            + COMPLETION_WEIGHT * (completed + PRIOR_STARTS * PRIOR_COMPLETION_RATE) / (started + PRIOR_STARTS * 1.0))
+
+
+class ResourceIndex:
+    """Resources with base scores and, per skill, (-base score, resource id) lists sorted best first"""
+
+    def __init__(self, resources: Dict[int, RankedResource], skill_links: Iterable[tuple]):
+        self.resources = resources
+        self.by_skill: Dict[int, List[tuple]] = {}
+        for resource_id, skill_id in skill_links:
+            if resource_id in resources:
+                self.by_skill.setdefault(skill_id, []).append((-resources[resource_id].base_score, resource_id))
+        for candidates in self.by_skill.values():
+            candidates.sort()
+
+    @classmethod
+    def load(cls) -> 'ResourceIndex':
+        progress = {
+            row['resource_id']: row for row in
+            UserProgress.objects.values('resource_id').annotate(
+                started=Count('id', filter=Q(status__in=('in_progress', 'completed'))),
+                completed=Count('id', filter=Q(status='completed')),
+            )
+        }
+        resources = {}
+        for row in LearningResource.objects.values('id', 'title', 'url', 'resource_type', 'difficulty_level',
+                                                   'rating', 'content_quality_score', 'relevance_score'):
+            counts = progress.get(row['id'], {'started': 0, 'completed': 0})
+            completion = completion_rate(counts['started'], counts['completed'])
+            resources[row['id']] = RankedResource(
+                id=row['id'],
+                title=row['title'],
+                url=row['url'],
+                resource_type=row['resource_type'],
+                difficulty_level=row['difficulty_level'],
+                rating=row['rating'],
+                completion_rate=completion,
+                base_score=base_score(row['rating'], row['content_quality_score'], row['relevance_score'], completion),
+            )
+        links = LearningResource.skills.through.objects.values_list('learningresource_id', 'skill_id')
+        return cls(resources, links)
+
+
+_index_cache = VersionedCache('roadmaps:resource_index_version', ResourceIndex.load,
+                              depends_on=[catalog_cache], max_age=REFRESH_SECONDS)
+
+
+def get_resource_index() -> ResourceIndex:
+    return _index_cache.get()
+
+
+def learner_adjustment(resource: RankedResource, level: str, learning_style: str) -> float:
+    distance = abs(LEVEL_RANK.get(resource.difficulty_level, 1) - LEVEL_RANK.get(level, 1))
+    style = STYLE_WEIGHT if resource.resource_type in LEARNING_STYLE_TYPES.get(learning_style, ()) else 0.0
+    return style - DIFFICULTY_WEIGHT * distance / MAX_LEVEL_DISTANCE
+
+
+def recommend_resources(user, skill_ids: List[int], learning_style: str = 'mixed',
+                        difficulty_level: str = 'intermediate', limit: int = 10,
+                        offset: int = 0) -> Tuple[List[Dict], int]:
+    """
+    The page of resources ranked offset to offset + limit for the skills, each scored
+    against the learner's level in that skill, and the number of candidates overall.
+    The merge only ranks as far as the end of the requested page.
+    """
+    index = get_resource_index()
+    finished = set(UserProgress.objects.filter(user=user, status='completed').values_list('resource_id', flat=True))
+    total = len({resource_id for skill_id in skill_ids
+                 for _, resource_id in index.by_skill.get(skill_id, ())} - finished)
+    if limit <= 0 or offset >= total:
+        return [], total
+    window = offset + limit
+    levels = dict(SkillAssessment.objects.filter(user=user, skill_id__in=skill_ids)
+                  .values_list('skill_id', 'current_level'))
+    max_bonus = STYLE_WEIGHT if learning_style in LEARNING_STYLE_TYPES else 0.0
+
+    streams = [
+        ((negative_score, resource_id, skill_id) for negative_score, resource_id in index.by_skill.get(skill_id, ()))
+        for skill_id in dict.fromkeys(skill_ids)
+    ]
+    best: Dict[int, tuple] = {}      # Resource id -> (best score, skill it was scored for)
+    top: List[tuple] = []            # Min-heap of (score, -resource id); entries not in `kept` are stale
+    kept: Dict[int, float] = {}      # Resource ids currently in the top `window` with their scores
+
+    def drop_stale_root():
+        while top and kept.get(-top[0][1]) != top[0][0]:
+            heapq.heappop(top)
+
+    for negative_score, resource_id, skill_id in heapq.merge(*streams):
+        # Candidates arrive by falling base score; once even the largest bonus cannot
+        # lift the next one past the current window's last, nothing later can either
+        if len(kept) >= window and -negative_score + max_bonus <= top[0][0]:
+            break
+        if resource_id in finished:
+            continue
+        resource = index.resources[resource_id]
+        score = resource.base_score + learner_adjustment(resource, levels.get(skill_id, difficulty_level),
+                                                         learning_style)
+        if resource_id in best and best[resource_id][0] >= score:
+            continue
+
+        best[resource_id] = (score, skill_id)
+        kept[resource_id] = score
+        heapq.heappush(top, (score, -resource_id))
+        while len(kept) > window:
+            evicted_score, negative_id = heapq.heappop(top)
+            if kept.get(-negative_id) == evicted_score:
+                del kept[-negative_id]
+        drop_stale_root()
+
+    ranked = sorted(kept.items(), key=lambda item: (-item[1], item[0]))[offset:]
+    return [
+        {
+            'id': resource_id,
+            'title': index.resources[resource_id].title,
+            'url': index.resources[resource_id].url,
+            'resource_type': index.resources[resource_id].resource_type,
+            'difficulty_level': index.resources[resource_id].difficulty_level,
+            'rating': index.resources[resource_id].rating,
+            'completion_rate': round(index.resources[resource_id].completion_rate, 3),
+            'skill_id': best[resource_id][1],
+            'score': round(score, 3),
+        }
+        for resource_id, score in ranked
+    ], total
@@ -4,15 +4,21 @@ from .models import (
     SkillCategory, Skill, CareerPath, PersonalizedRoadmap,
     RoadmapMilestone, SkillAssessment, LearningResource, UserProgress
 )
+from .skill_graph import PrerequisiteCycleError, check_prerequisite_edges
 
 
 class SkillCategorySerializer(serializers.ModelSerializer):
-    skills_count = serializers.IntegerField(source='skills.count', read_only=True)
+    skills_count = serializers.SerializerMethodField()
 
     class Meta:
         model = SkillCategory
         fields = '__all__'
 
+    def get_skills_count(self, obj):
+        if hasattr(obj, 'skills_total'):
+            return obj.skills_total
+        return obj.skills.count()
+
 
 class SkillSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -22,6 +28,22 @@ class SkillSerializer(serializers.ModelSerializer):
         model = Skill
         fields = '__all__'
 
+    def validate(self, attrs):
+        prerequisites = attrs.get('prerequisites')
+        if self.instance is not None and prerequisites:
+            try:
+                check_prerequisite_edges((self.instance.pk, prerequisite.pk) for prerequisite in prerequisites)
+            except PrerequisiteCycleError as error:
+                raise serializers.ValidationError({'prerequisites': error.messages})
+        return attrs
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except PrerequisiteCycleError as error:
+            # Another write closed the cycle after validation
+            raise serializers.ValidationError({'prerequisites': error.messages})
+
 
 class SkillListSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -44,7 +66,7 @@ class CareerPathSerializer(serializers.ModelSerializer):
 
 class CareerPathListSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
-    required_skills_count = serializers.IntegerField(source='required_skills.count', read_only=True)
+    required_skills_count = serializers.SerializerMethodField()
 
     class Meta:
         model = CareerPath
@@ -52,6 +74,11 @@ class CareerPathListSerializer(serializers.ModelSerializer):
                   'average_salary_max', 'job_growth_rate', 'total_estimated_months',
                   'difficulty_level', 'is_popular', 'required_skills_count']
 
+    def get_required_skills_count(self, obj):
+        if hasattr(obj, 'required_skills_total'):
+            return obj.required_skills_total
+        return obj.required_skills.count()
+
 
 class RoadmapMilestoneSerializer(serializers.ModelSerializer):
     skill_name = serializers.CharField(source='skill.name', read_only=True)
@@ -178,8 +205,19 @@ class GenerateRoadmapRequestSerializer(serializers.Serializer):
         default='mixed'
     )
     focus_areas = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    ai_summary = serializers.BooleanField(default=False)
 
 
 class SkillGapAnalysisSerializer(serializers.Serializer):
     target_career_path_id = serializers.IntegerField()
-    current_skills_assessment = serializers.DictField(child=serializers.CharField())
\ No newline at end of file
+    current_skills_assessment = serializers.DictField(child=serializers.CharField())
+
+
+class ResourceHeartbeatSerializer(serializers.Serializer):
+    resource_id = serializers.IntegerField()
+    time_spent_minutes = serializers.IntegerField(min_value=0, max_value=24 * 60, default=0)
+    progress_percentage = serializers.IntegerField(min_value=0, max_value=100, required=False)
+
+
+class ResourceHeartbeatBatchSerializer(serializers.Serializer):
+    heartbeats = serializers.ListField(child=ResourceHeartbeatSerializer(), allow_empty=False, max_length=200)
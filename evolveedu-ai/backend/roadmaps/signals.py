@@ -0,0 +1,84 @@
+# roadmaps/signals.py
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .analytics import invalidate_roadmap_analytics
+from .catalog import invalidate_catalog
+from .forecasting import apply_milestone_update, invalidate_forecast
+from .gap_engine import invalidate_career_matrix
+from .models import CareerPath, LearningResource, RoadmapMilestone, Skill, SkillCategory, UserProgress
+from .progress import touch_progress
+from .skill_graph import check_prerequisite_edges, invalidate_skill_graph
+
+
+@receiver(m2m_changed, sender=Skill.prerequisites.through)
+def skill_prerequisites_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_add':
+        # Serializers and admin forms validate first; this guards other writers and races
+        # From the reverse side (skill.unlocks.add) the instance is the prerequisite
+        check_prerequisite_edges((pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_skill_graph()
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def skill_changed(sender, **kwargs):
+    invalidate_skill_graph()
+
+
+@receiver(post_save, sender=RoadmapMilestone)
+def milestone_saved(sender, instance, created, **kwargs):
+    invalidate_roadmap_analytics(instance.roadmap_id)
+    if created:
+        invalidate_forecast(instance.roadmap_id)
+    else:
+        # After commit, so a concurrent rebuild cannot read the row from before this change
+        transaction.on_commit(lambda: apply_milestone_update(instance))
+
+
+@receiver(post_delete, sender=RoadmapMilestone)
+def milestone_deleted(sender, instance, **kwargs):
+    invalidate_roadmap_analytics(instance.roadmap_id)
+    invalidate_forecast(instance.roadmap_id)
+
+
+@receiver(m2m_changed, sender=CareerPath.required_skills.through)
+@receiver(m2m_changed, sender=CareerPath.recommended_skills.through)
+def career_path_skills_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_career_matrix()
+
+
+@receiver(post_save, sender=CareerPath)
+@receiver(post_delete, sender=CareerPath)
+def career_path_changed(sender, **kwargs):
+    invalidate_career_matrix()
+
+
+@receiver(post_save, sender=SkillCategory)
+@receiver(post_delete, sender=SkillCategory)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=CareerPath)
+@receiver(post_delete, sender=CareerPath)
+@receiver(post_save, sender=LearningResource)
+@receiver(post_delete, sender=LearningResource)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(m2m_changed, sender=Skill.prerequisites.through)
+@receiver(m2m_changed, sender=CareerPath.required_skills.through)
+@receiver(m2m_changed, sender=CareerPath.recommended_skills.through)
+@receiver(m2m_changed, sender=LearningResource.skills.through)
+def catalog_relations_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_catalog()
+
+
+@receiver(post_save, sender=UserProgress)
+@receiver(post_delete, sender=UserProgress)
+def user_progress_changed(sender, instance, **kwargs):
+    touch_progress(instance.user_id)
@@ -0,0 +1,237 @@
+"""
+Skill Prerequisite Graph
+In-memory view of the Skill.prerequisites DAG, loaded with a single query. Offers
+topological ordering, cycle detection, transitive prerequisite sets stored as integer
+bitsets and the ordered list of skills still needed to unlock a target. The built
+graph is a VersionedCache, rebuilt when the signals in roadmaps.signals bump its
+version.
+"""
+
+import hashlib
+import heapq
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.core.exceptions import ValidationError
+
+from .models import Skill
+from .versioning import VersionedCache
+
+
+class SkillGraph:
+    """Prerequisite graph over dense skill indices; public methods take and return skill ids"""
+
+    def __init__(self, skills: Dict[int, int], edges: Iterable[tuple]):
+        # skills maps skill id -> estimated hours, edges are (skill id, prerequisite id)
+        self.ids = sorted(skills)
+        self.index = {skill_id: i for i, skill_id in enumerate(self.ids)}
+        self.hours = [skills[skill_id] or 0 for skill_id in self.ids]
+        self.prerequisites: List[List[int]] = [[] for _ in self.ids]
+        self.unlocks: List[List[int]] = [[] for _ in self.ids]
+        for skill_id, prerequisite_id in edges:
+            skill, prerequisite = self.index[skill_id], self.index[prerequisite_id]
+            self.prerequisites[skill].append(prerequisite)
+            self.unlocks[prerequisite].append(skill)
+
+        # Identifies the graph's content, so processes that rebuilt it independently agree on it
+        self.digest = hashlib.sha1(repr((self.ids, self.hours, self.prerequisites)).encode()).hexdigest()
+
+        self.order = self._topological_order()
+        self.position = {node: i for i, node in enumerate(self.order)}
+        self.ancestors = self._ancestor_masks()
+
+    @classmethod
+    def load(cls) -> 'SkillGraph':
+        """Build from one LEFT JOIN over skills and the prerequisite table"""
+        skills, edges = {}, []
+        for skill_id, hours, prerequisite_id in Skill.objects.values_list('id', 'estimated_hours', 'prerequisites'):
+            skills[skill_id] = hours
+            if prerequisite_id is not None:
+                edges.append((skill_id, prerequisite_id))
+        return cls(skills, edges)
+
+    def __contains__(self, skill_id) -> bool:
+        return skill_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # Ordering
+
+    def _topological_order(self) -> List[int]:
+        """Kahn's algorithm, lowest skill id first among ready nodes; nodes on cycles are left out"""
+        pending = [len(prerequisites) for prerequisites in self.prerequisites]
+        ready = [node for node, count in enumerate(pending) if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            node = heapq.heappop(ready)
+            order.append(node)
+            for dependent in self.unlocks[node]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        return order
+
+    @property
+    def is_acyclic(self) -> bool:
+        return len(self.order) == len(self.ids)
+
+    def find_cycle(self) -> Optional[List[int]]:
+        """Skill ids along one prerequisite cycle, or None when the graph is a DAG"""
+        if self.is_acyclic:
+            return None
+
+        # Every node missing from the topological order has a prerequisite that is also
+        # missing, so walking prerequisites from any of them must revisit a node
+        node = next(n for n in range(len(self.ids)) if n not in self.position)
+        seen = {}
+        path = []
+        while node not in seen:
+            seen[node] = len(path)
+            path.append(node)
+            node = next(p for p in self.prerequisites[node] if p not in self.position)
+        return [self.ids[n] for n in path[seen[node]:]]
+
+    def _ancestor_masks(self) -> List[int]:
+        masks = [0] * len(self.ids)
+        for node in self.order:
+            mask = 0
+            for prerequisite in self.prerequisites[node]:
+                mask |= masks[prerequisite] | (1 << prerequisite)
+            masks[node] = mask
+
+        # Nodes on or behind a cycle fall back to a breadth-first search
+        for node in range(len(self.ids)):
+            if node not in self.position:
+                masks[node] = self._search_ancestors(node)
+        return masks
+
+    def _search_ancestors(self, node: int) -> int:
+        mask, queue = 0, deque(self.prerequisites[node])
+        while queue:
+            current = queue.popleft()
+            if not mask >> current & 1:
+                mask |= 1 << current
+                queue.extend(self.prerequisites[current])
+        return mask
+
+    # Bitset helpers
+
+    def mask_of(self, skill_ids: Iterable[int]) -> int:
+        mask = 0
+        for skill_id in skill_ids:
+            if skill_id in self.index:
+                mask |= 1 << self.index[skill_id]
+        return mask
+
+    def indices_of(self, mask: int) -> List[int]:
+        nodes = []
+        while mask:
+            low = mask & -mask
+            nodes.append(low.bit_length() - 1)
+            mask ^= low
+        return nodes
+
+    def ids_of(self, mask: int) -> List[int]:
+        return [self.ids[node] for node in self.indices_of(mask)]
+
+    def _in_learning_order(self, mask: int) -> List[int]:
+        # Cyclic nodes have no position and go last
+        nodes = sorted(self.indices_of(mask), key=lambda node: (self.position.get(node, len(self.ids)), node))
+        return [self.ids[node] for node in nodes]
+
+    # Queries
+
+    def ancestor_mask(self, skill_id: int) -> int:
+        return self.ancestors[self.index[skill_id]] if skill_id in self.index else 0
+
+    def all_prerequisites(self, skill_id: int) -> Set[int]:
+        """Every direct and indirect prerequisite of a skill"""
+        return set(self.ids_of(self.ancestor_mask(skill_id)))
+
+    def depends_on(self, skill_id: int, prerequisite_id: int) -> bool:
+        return prerequisite_id in self.index and bool(self.ancestor_mask(skill_id) >> self.index[prerequisite_id] & 1)
+
+    def would_create_cycle(self, skill_id: int, prerequisite_id: int) -> bool:
+        """Whether making prerequisite_id a prerequisite of skill_id closes a cycle"""
+        return skill_id == prerequisite_id or self.depends_on(prerequisite_id, skill_id)
+
+    def learning_order(self, skill_ids: Iterable[int] = None) -> List[int]:
+        """Skill ids in an order where prerequisites come first (all skills when none given)"""
+        if skill_ids is None:
+            return self._in_learning_order((1 << len(self.ids)) - 1)
+        return self._in_learning_order(self.mask_of(skill_ids))
+
+    def covered_mask(self, known_ids: Iterable[int]) -> int:
+        """Known skills and every prerequisite they imply"""
+        mask = 0
+        for skill_id in known_ids:
+            if skill_id in self.index:
+                mask |= self.ancestor_mask(skill_id) | (1 << self.index[skill_id])
+        return mask
+
+    def unlock_path(self, target_ids: Iterable[int], known_ids: Iterable[int] = ()) -> List[int]:
+        """Skills still to learn, in learning order, before every target (targets included) is unlocked"""
+        return self._in_learning_order(self.covered_mask(target_ids) & ~self.covered_mask(known_ids))
+
+    def missing_prerequisites(self, skill_id: int, known_ids: Iterable[int] = ()) -> List[int]:
+        return self._in_learning_order(self.ancestor_mask(skill_id) & ~self.covered_mask(known_ids))
+
+    def unlock_hours(self, target_ids: Iterable[int], known_ids: Iterable[int] = ()) -> int:
+        return sum(self.hours[self.index[skill_id]] for skill_id in self.unlock_path(target_ids, known_ids))
+
+
+class PrerequisiteCycleError(ValidationError):
+    """A prerequisite edge that would close a cycle"""
+
+
+def _reaches(prerequisites: Dict[int, List[int]], start: int, goal: int) -> bool:
+    seen, stack = {start}, [start]
+    while stack:
+        node = stack.pop()
+        if node == goal:
+            return True
+        for prerequisite in prerequisites.get(node, ()):
+            if prerequisite not in seen:
+                seen.add(prerequisite)
+                stack.append(prerequisite)
+    return False
+
+
+def check_prerequisite_edges(edges: Iterable[tuple]):
+    """
+    Raise PrerequisiteCycleError if any (skill id, prerequisite id) edge would close a
+    cycle. The edges are read from the database rather than the cached graph, which may
+    not yet include another process's latest edits.
+    """
+    edges = list(edges)
+    if not edges:
+        return
+    prerequisites: Dict[int, List[int]] = {}
+    for skill_id, prerequisite_id in Skill.prerequisites.through.objects.values_list('from_skill_id', 'to_skill_id'):
+        prerequisites.setdefault(skill_id, []).append(prerequisite_id)
+
+    for skill_id, prerequisite_id in edges:
+        if _reaches(prerequisites, prerequisite_id, skill_id):
+            raise PrerequisiteCycleError(
+                f'Skill {prerequisite_id} cannot be a prerequisite of skill {skill_id}: '
+                f'it would create a prerequisite cycle', code='prerequisite_cycle')
+
+
+skill_graph_cache = VersionedCache('roadmaps:skill_graph_version', SkillGraph.load)
+
+
+def graph_version() -> str:
+    """Content digest of the current graph, for caches of values derived from it"""
+    return get_skill_graph().digest
+
+
+def invalidate_skill_graph():
+    """Bump the shared version so every process rebuilds its graph on next use"""
+    skill_graph_cache.invalidate()
+
+
+def get_skill_graph() -> SkillGraph:
+    """The current prerequisite graph, rebuilt only when the version has moved"""
+    return skill_graph_cache.get()
@@ -21,6 +21,12 @@ def auth_client(api_client, user):
     return api_client
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
+
+
 # ------------------
 # SkillCategory Tests
 # ------------------
@@ -100,3 +106,650 @@ def test_analyze_skill_gaps(auth_client, monkeypatch):
     )
     assert response.status_code == 200
     assert "ai_gap_analysis" in response.data
+
+
+# ------------------
+# Skill Prerequisite Graph
+# ------------------
+
+def _skill(category, name, hours=10, prerequisites=()):
+    from roadmaps.models import Skill
+    skill = Skill.objects.create(name=name, description=name, category=category, estimated_hours=hours)
+    skill.prerequisites.set(prerequisites)
+    return skill
+
+
+@pytest.fixture
+def skill_tree(db):
+    category = SkillCategory.objects.create(name="Web")
+    html = _skill(category, "HTML", 5)
+    css = _skill(category, "CSS", 8, [html])
+    js = _skill(category, "JavaScript", 20, [html])
+    react = _skill(category, "React", 30, [js, css])
+    return {"html": html, "css": css, "js": js, "react": react}
+
+
+@pytest.mark.django_db
+def test_skill_graph_orders_and_closes_prerequisites(skill_tree, django_assert_num_queries):
+    from roadmaps.skill_graph import SkillGraph
+
+    with django_assert_num_queries(1):
+        graph = SkillGraph.load()
+
+    ids = {name: skill.id for name, skill in skill_tree.items()}
+    order = graph.learning_order()
+    assert order.index(ids["html"]) < order.index(ids["css"]) < order.index(ids["react"])
+    assert order.index(ids["js"]) < order.index(ids["react"])
+    assert graph.all_prerequisites(ids["react"]) == {ids["html"], ids["css"], ids["js"]}
+    assert graph.unlock_path([ids["react"]], known_ids=[ids["html"], ids["css"]]) == [ids["js"], ids["react"]]
+    # Knowing JavaScript implies its HTML prerequisite
+    assert graph.unlock_path([ids["react"]], known_ids=[ids["js"]]) == [ids["css"], ids["react"]]
+    assert graph.missing_prerequisites(ids["react"], known_ids=[ids["js"]]) == [ids["css"]]
+    assert graph.unlock_hours([ids["react"]], known_ids=[ids["html"]]) == 58
+    assert graph.would_create_cycle(ids["html"], ids["react"])
+    assert graph.find_cycle() is None
+
+
+def test_skill_graph_reports_cycles():
+    from roadmaps.skill_graph import SkillGraph
+
+    graph = SkillGraph({1: 1, 2: 1, 3: 1, 4: 1}, [(2, 1), (3, 2), (2, 3), (4, 3)])
+    assert not graph.is_acyclic
+    assert sorted(graph.find_cycle()) == [2, 3]
+    assert graph.all_prerequisites(4) == {1, 2, 3}
+
+
+@pytest.mark.django_db
+def test_skill_graph_cache_invalidated_on_prerequisite_change(skill_tree, django_assert_num_queries):
+    from django.core.exceptions import ValidationError
+    from django.db import transaction
+    from roadmaps.skill_graph import get_skill_graph
+
+    graph = get_skill_graph()
+    with django_assert_num_queries(0):
+        assert get_skill_graph() is graph
+
+    with pytest.raises(ValidationError), transaction.atomic():
+        skill_tree["html"].prerequisites.add(skill_tree["react"])
+
+    skill_tree["react"].prerequisites.remove(skill_tree["css"])
+    refreshed = get_skill_graph()
+    assert refreshed is not graph
+    assert skill_tree["css"].id not in refreshed.all_prerequisites(skill_tree["react"].id)
+
+
+
+@pytest.mark.django_db
+def test_prerequisite_cycles_are_rejected_as_validation_errors(skill_tree):
+    from roadmaps.admin import SkillAdminForm
+    from roadmaps.serializers import SkillSerializer
+
+    html, react = skill_tree["html"], skill_tree["react"]
+    serializer = SkillSerializer(html, data={"prerequisites": [react.id]}, partial=True)
+    assert not serializer.is_valid()
+    assert "cycle" in str(serializer.errors["prerequisites"][0])
+
+    data = {field: getattr(html, field) for field in ("name", "description", "difficulty_level", "estimated_hours",
+                                                      "market_demand", "avg_salary_impact")}
+    form = SkillAdminForm(instance=html, data=dict(data, category=html.category_id, prerequisites=[react.id],
+                                                   learning_resources="[]", practice_projects="[]"))
+    assert not form.is_valid()
+    assert list(form.errors) == ["prerequisites"]
+
+
+@pytest.mark.django_db
+def test_prerequisite_cycle_check_reads_edges_from_the_database(skill_tree):
+    from roadmaps.models import Skill
+    from roadmaps.skill_graph import PrerequisiteCycleError, check_prerequisite_edges, get_skill_graph
+
+    html, react = skill_tree["html"], skill_tree["react"]
+    extra = Skill.objects.create(name="Testing", category=html.category)
+    graph = get_skill_graph()
+
+    # Another process added react -> testing; this process's cached graph has not seen it
+    Skill.prerequisites.through.objects.create(from_skill=extra, to_skill=react)
+    assert get_skill_graph() is graph and not graph.would_create_cycle(html.id, extra.id)
+    with pytest.raises(PrerequisiteCycleError):
+        check_prerequisite_edges([(html.id, extra.id)])
+    check_prerequisite_edges([(extra.id, html.id)])
+
+
+# ------------------
+# Roadmap Planner
+# ------------------
+
+@pytest.fixture
+def learner(db):
+    from django.contrib.auth import get_user_model
+    return get_user_model().objects.create_user(username="learner", email="learner@example.com", password="pass123")
+
+
+@pytest.fixture
+def learner_client(api_client, learner):
+    api_client.force_authenticate(user=learner)
+    return api_client
+
+
+def test_schedule_fills_weeks_in_learning_order():
+    from datetime import date
+    from roadmaps.planner import schedule
+
+    plan = schedule([(1, 6), (2, 10), (3, 4)], hours_per_week=10, start_date=date(2026, 1, 5))
+    assert [m.start_date for m in plan.milestones] == [date(2026, 1, 5), date(2026, 1, 9), date(2026, 1, 16)]
+    assert plan.milestones[-1].end_date == date(2026, 1, 18)
+    assert [(g["week"], g["hours"], g["skill_ids"]) for g in plan.weekly_goals] == [
+        (1, 10, [1, 2]), (2, 10, [2, 3]),
+    ]
+    assert plan.total_hours == 20
+
+
+@pytest.mark.django_db
+def test_generate_roadmap_plans_missing_skills(learner_client, learner, skill_tree):
+    from roadmaps.models import CareerPath, SkillAssessment
+
+    path = CareerPath.objects.create(title="Frontend Developer", description="UI", category=skill_tree["html"].category)
+    path.required_skills.set([skill_tree["react"]])
+    skill_tree["css"].difficulty_level = "intermediate"
+    skill_tree["css"].save()
+    SkillAssessment.objects.create(user=learner, skill=skill_tree["css"], current_level="beginner", confidence_score=70)
+
+    response = learner_client.post("/api/roadmaps/generate/", {
+        "career_goal": "frontend developer",
+        "current_skills": ["html"],
+        "time_commitment_hours_per_week": 10,
+    }, format="json")
+
+    assert response.status_code == 201
+    milestones = response.data["milestones"]
+    assert [m["skill"] for m in milestones] == [skill_tree["css"].id, skill_tree["js"].id, skill_tree["react"].id]
+    assert [m["order"] for m in milestones] == [1, 2, 3]
+    assert [m["estimated_hours"] for m in milestones] == [4, 20, 30]
+    assert response.data["target_career_path"] == path.id
+    assert response.data["weekly_goals"][0]["skills"] == ["CSS", "JavaScript"]
+
+
+@pytest.mark.django_db
+def test_milestone_progress_updates_weighted_roadmap_progress(learner_client, learner, skill_tree):
+    from roadmaps.ai_service import RoadmapAIService
+
+    roadmap = RoadmapAIService.generate_personalized_roadmap(learner, career_goal="React", current_skills=["HTML"])
+    first, second, third = roadmap.milestones.order_by("order")
+
+    response = learner_client.post(
+        f"/api/roadmaps/{roadmap.id}/milestones/{first.id}/progress/", {"status": "completed"}, format="json"
+    )
+    assert response.status_code == 200
+    assert response.data["roadmap_progress"]["completed_milestones"] == 1
+    assert response.data["roadmap_progress"]["overall_progress_percentage"] == round(100 * 8 / 58)
+
+
+# ------------------
+# Roadmap Forecasting
+# ------------------
+
+@pytest.mark.django_db
+def test_forecast_critical_path_velocity_and_risk(learner_client, learner, skill_tree,
+                                                  django_capture_on_commit_callbacks):
+    from datetime import timedelta
+    from django.utils import timezone
+    from roadmaps.ai_service import RoadmapAIService
+    from roadmaps.forecasting import forecast_roadmap
+
+    roadmap = RoadmapAIService.generate_personalized_roadmap(learner, career_goal="React", time_commitment=10)
+    html, css, js, react = roadmap.milestones.order_by("order")
+
+    forecast = forecast_roadmap(roadmap)
+    assert forecast["remaining_hours"] == 63
+    assert [step["milestone_id"] for step in forecast["critical_path"]] == [html.id, js.id, react.id]
+    assert forecast["critical_path_hours"] == 55
+    assert forecast["on_track"]
+
+    # Took twice the estimate on HTML: the rest is expected to take twice as long as well
+    html.status, html.actual_hours_spent = "completed", 10
+    with django_capture_on_commit_callbacks(execute=True):
+        html.save()
+    roadmap.target_completion_date = timezone.now().date() + timedelta(days=30)
+    roadmap.save()
+
+    response = learner_client.get(f"/api/roadmaps/{roadmap.id}/forecast/")
+    assert response.status_code == 200
+    assert response.data["velocity_factor"] == 2.0
+    assert response.data["adjusted_remaining_hours"] == 116
+    assert response.data["critical_path_hours"] == 50
+    assert not response.data["on_track"]
+    at_risk = {item["milestone_id"]: item["reasons"] for item in response.data["at_risk_milestones"]}
+    assert "critical_path" in at_risk[react.id]
+    assert "behind_plan" in at_risk[css.id]
+
+
+@pytest.mark.django_db
+def test_forecast_state_updates_incrementally(learner, skill_tree, django_assert_num_queries,
+                                              django_capture_on_commit_callbacks):
+    from roadmaps.ai_service import RoadmapAIService
+    from roadmaps.forecasting import ForecastState, forecast_state
+
+    roadmap = RoadmapAIService.generate_personalized_roadmap(learner, career_goal="React")
+    forecast_state(roadmap.id)
+    js = roadmap.milestones.get(skill=skill_tree["js"])
+    with django_capture_on_commit_callbacks(execute=True):
+        js.progress_percentage = 50
+        js.save()
+
+    with django_assert_num_queries(0):
+        cached = forecast_state(roadmap.id)
+    rebuilt = ForecastState.build(roadmap.id)
+    assert cached.longest == rebuilt.longest
+    assert cached.critical_path() == rebuilt.critical_path()
+
+
+@pytest.mark.django_db
+def test_racing_milestone_updates_fall_back_to_a_rebuild(learner, skill_tree):
+    from django.core.cache import cache
+    from roadmaps.ai_service import RoadmapAIService
+    from roadmaps.forecasting import _revision_key, apply_milestone_update, forecast_state
+    from roadmaps.models import RoadmapMilestone
+
+    roadmap = RoadmapAIService.generate_personalized_roadmap(learner, career_goal="React")
+    forecast_state(roadmap.id)
+    js = roadmap.milestones.get(skill=skill_tree["js"])
+    html = roadmap.milestones.get(skill=skill_tree["html"])
+    RoadmapMilestone.objects.filter(id=js.id).update(progress_percentage=50)
+    RoadmapMilestone.objects.filter(id=html.id).update(status='completed')
+
+    # Another writer has moved the revision for js but not yet written its state
+    cache.incr(_revision_key(roadmap.id))
+    html.status = 'completed'
+    apply_milestone_update(html)
+
+    state = forecast_state(roadmap.id)
+    assert state.remaining[html.id] == 0
+    assert state.rows[js.id]['progress_percentage'] == 50
+
+
+# ------------------
+# Career Gap Ranking
+# ------------------
+
+@pytest.mark.django_db
+def test_ranked_career_paths_orders_by_gap(learner_client, learner, skill_tree):
+    from roadmaps.models import CareerPath, SkillAssessment
+
+    category = skill_tree["html"].category
+    frontend = CareerPath.objects.create(title="Frontend", description="UI", category=category)
+    frontend.required_skills.set([skill_tree["react"]])
+    designer = CareerPath.objects.create(title="Web Designer", description="Pages", category=category)
+    designer.required_skills.set([skill_tree["css"]])
+    designer.recommended_skills.set([skill_tree["js"]])
+    SkillAssessment.objects.create(user=learner, skill=skill_tree["html"], current_level="beginner", confidence_score=80)
+
+    response = learner_client.get("/api/roadmaps/career-paths/ranked/")
+    assert response.status_code == 200
+    results = response.data["results"]
+    assert [r["career_path_id"] for r in results] == [designer.id, frontend.id]
+    # Frontend needs React plus its unmet prerequisites; HTML is already covered
+    assert results[1]["missing_hours"] == 58
+    assert results[1]["top_missing_skills"] == ["React"]
+    assert results[0]["missing_hours"] == 8
+
+    # Covering CSS makes the designer path ready and the matrix follows catalog edits
+    SkillAssessment.objects.create(user=learner, skill=skill_tree["css"], current_level="advanced", confidence_score=80)
+    frontend.required_skills.set([skill_tree["js"]])
+    results = learner_client.get("/api/roadmaps/career-paths/ranked/", {"sort": "hours"}).data["results"]
+    assert results[0]["career_path_id"] == designer.id
+    assert results[0]["missing_hours"] == 0
+    assert results[1]["missing_hours"] == 20
+
+    assert learner_client.get("/api/roadmaps/career-paths/ranked/", {"sort": "bogus"}).status_code == 400
+
+
+# ------------------
+# Roadmap Analytics
+# ------------------
+
+@pytest.mark.django_db
+def test_roadmap_analytics_cached_until_milestone_update(learner_client, learner, skill_tree,
+                                                         django_assert_num_queries):
+    from roadmaps.ai_service import RoadmapAIService
+
+    roadmap = RoadmapAIService.generate_personalized_roadmap(learner, career_goal="React")
+    url = f"/api/roadmaps/{roadmap.id}/analytics/"
+    first = learner_client.get(url)
+    assert first.status_code == 200
+    assert first.data["milestones"] == {"total": 4, "completed": 0, "in_progress": 0, "not_started": 4}
+    assert first.data["time_tracking"]["estimated_hours"] == 63
+    assert first.data["skill_categories_progress"] == {"Web": {"completed": 0, "total": 4}}
+
+    # Only the roadmap lookup; the aggregates come from the cache
+    with django_assert_num_queries(1):
+        assert learner_client.get(url).data == first.data
+
+    milestone = roadmap.milestones.get(skill=skill_tree["html"])
+    learner_client.post(f"/api/roadmaps/{roadmap.id}/milestones/{milestone.id}/progress/",
+                        {"status": "completed", "hours_spent": 6}, format="json")
+    updated = learner_client.get(url).data
+    assert updated["milestones"]["completed"] == 1
+    assert updated["time_tracking"]["actual_hours"] == 6
+    assert updated["skill_categories_progress"]["Web"] == {"completed": 1, "total": 4}
+
+
+# ------------------
+# Learning Analytics
+# ------------------
+
+@pytest.mark.django_db
+def test_learning_analytics_streak_from_activity_log(learner_client, learner, skill_tree):
+    from roadmaps.ai_service import RoadmapAIService
+
+    roadmap = RoadmapAIService.generate_personalized_roadmap(learner, career_goal="React")
+    milestone = roadmap.milestones.first()
+    learner_client.post(f"/api/roadmaps/{roadmap.id}/milestones/{milestone.id}/progress/",
+                        {"status": "in_progress"}, format="json")
+
+    response = learner_client.get("/api/roadmaps/analytics/")
+    assert response.status_code == 200
+    assert response.data["activity"]["streak_days"] == 1
+    assert response.data["activity"]["heatmap"][0]["count"] == 1
+    assert response.data["roadmaps"]["active"] == 1
+
+
+# ------------------
+# Catalog Cache
+# ------------------
+
+@pytest.mark.django_db
+def test_catalog_lists_serve_rows_and_etags(learner_client, skill_tree, django_assert_num_queries):
+    from roadmaps.models import CareerPath
+
+    path = CareerPath.objects.create(title="Frontend", description="UI", category=skill_tree["html"].category)
+    path.required_skills.set([skill_tree["react"], skill_tree["css"]])
+
+    response = learner_client.get("/api/roadmaps/career-paths/")
+    assert response.status_code == 200
+    assert response.data["results"][0]["required_skills_count"] == 2
+    etag = response["ETag"]
+
+    # A matching ETag is answered without touching the database
+    with django_assert_num_queries(0):
+        assert learner_client.get("/api/roadmaps/career-paths/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # Listing pages ids in the database and takes rows from the catalog
+    with django_assert_num_queries(2):
+        skills = learner_client.get("/api/roadmaps/skills/", {"sort": "demand"})
+    assert {row["name"] for row in skills.data["results"]} == {"HTML", "CSS", "JavaScript", "React"}
+
+    # The page of ids is cached until the catalog changes
+    with django_assert_num_queries(0):
+        again = learner_client.get("/api/roadmaps/skills/", {"sort": "demand"})
+    assert again.data == skills.data
+
+    # Filter backends apply, and their parameters are part of the cache key
+    by_name = learner_client.get("/api/roadmaps/skills/", {"ordering": "-name"}).data["results"]
+    assert [row["name"] for row in by_name] == ["React", "JavaScript", "HTML", "CSS"]
+    by_name = learner_client.get("/api/roadmaps/skills/", {"ordering": "name"}).data["results"]
+    assert [row["name"] for row in by_name] == ["CSS", "HTML", "JavaScript", "React"]
+
+    detail = learner_client.get(f"/api/roadmaps/skills/{skill_tree['react'].id}/")
+    assert sorted(detail.data["prerequisites_names"]) == ["CSS", "JavaScript"]
+    assert learner_client.get("/api/roadmaps/skills/999999/").status_code == 404
+
+    categories = learner_client.get("/api/roadmaps/categories/")
+    assert categories.data["results"][0]["skills_count"] == 4
+
+    # Catalog edits change the content digest, so old ETags stop matching
+    path.required_skills.add(skill_tree["html"])
+    refreshed = learner_client.get("/api/roadmaps/career-paths/", HTTP_IF_NONE_MATCH=etag)
+    assert refreshed.status_code == 200
+    assert refreshed.data["results"][0]["required_skills_count"] == 3
+
+
+@pytest.mark.django_db
+def test_versioned_cache_invalidates_again_on_commit_and_ages_out(django_capture_on_commit_callbacks):
+    from roadmaps.versioning import LOCAL_MAX_AGE, VersionedCache
+
+    builds = []
+    versioned = VersionedCache('roadmaps:test_version', lambda: builds.append(1) or len(builds))
+    assert versioned.get() == 1
+
+    # A rebuild between the edit and the commit is discarded once the transaction commits
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        versioned.invalidate()
+        assert versioned.get() == 2
+    assert len(callbacks) == 1
+    assert versioned.get() == 3
+
+    # With a per-process cache, edits made elsewhere are picked up once the copy is old enough
+    versioned._built_at -= LOCAL_MAX_AGE + 1
+    assert versioned.get() == 4
+
+
+@pytest.mark.django_db
+def test_catalog_resources_overlay_user_progress(learner_client, learner, skill_tree, django_assert_num_queries):
+    from roadmaps.models import LearningResource, UserProgress
+
+    resource = LearningResource.objects.create(title="MDN", url="https://developer.mozilla.org", resource_type="documentation")
+    resource.skills.set([skill_tree["html"]])
+
+    first = learner_client.get("/api/roadmaps/resources/", {"skills": str(skill_tree["html"].id)})
+    assert first.data["results"][0]["user_progress"] is None
+    assert first.data["results"][0]["skills_data"][0]["name"] == "HTML"
+
+    UserProgress.objects.create(user=learner, resource=resource, status="in_progress", progress_percentage=40)
+    second = learner_client.get("/api/roadmaps/resources/", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert second.status_code == 200
+    assert second.data["results"][0]["user_progress"]["progress_percentage"] == 40
+
+    # The tag comes from the catalog and progress versions, not from a query
+    with django_assert_num_queries(0):
+        assert learner_client.get("/api/roadmaps/resources/", HTTP_IF_NONE_MATCH=second["ETag"]).status_code == 304
+
+
+@pytest.mark.django_db
+def test_skill_difficulty_sort_is_database_side(learner_client, skill_tree, django_assert_num_queries):
+    for name, level in (("react", "advanced"), ("js", "intermediate"), ("css", "expert")):
+        skill_tree[name].difficulty_level = level
+        skill_tree[name].save()
+    learner_client.get("/api/roadmaps/skills/")  # Warm the catalog
+
+    with django_assert_num_queries(2):  # COUNT and one page of ids
+        response = learner_client.get("/api/roadmaps/skills/", {"sort": "difficulty"})
+    assert [row["name"] for row in response.data["results"]] == ["HTML", "JavaScript", "React", "CSS"]
+    assert response.data["count"] == 4
+
+
+# ------------------
+# Resource Ranking
+# ------------------
+
+def _resource(title, skills, resource_type="article", level="beginner", rating=4.0):
+    from roadmaps.models import LearningResource
+
+    resource = LearningResource.objects.create(title=title, url=f"https://example.com/{title}",
+                                               resource_type=resource_type, difficulty_level=level, rating=rating)
+    resource.skills.set(skills)
+    return resource
+
+
+@pytest.mark.django_db
+def test_resource_recommendations_fit_style_and_level(learner_client, learner, skill_tree):
+    from roadmaps.models import SkillAssessment, UserProgress
+
+    html, css = skill_tree["html"], skill_tree["css"]
+    video = _resource("html-video", [html], resource_type="video")
+    article = _resource("html-article", [html])
+    expert = _resource("expert-video", [html, css], resource_type="video", level="expert", rating=5.0)
+    finished = _resource("finished", [html], resource_type="video", rating=5.0)
+    UserProgress.objects.create(user=learner, resource=finished, status="completed", progress_percentage=100)
+
+    response = learner_client.post("/api/roadmaps/resources/recommendations/", {
+        "skill_ids": [str(html.id)], "learning_style": "visual", "difficulty_level": "beginner",
+    }, format="json")
+    assert response.status_code == 200
+    assert [r["id"] for r in response.data["recommendations"]] == [video.id, article.id, expert.id]
+    assert response.data["total"] == 3
+    second_page = learner_client.post("/api/roadmaps/resources/recommendations/", {
+        "skill_ids": [html.id], "learning_style": "visual", "difficulty_level": "beginner", "limit": 2, "offset": 2,
+    }, format="json").data
+    assert [r["id"] for r in second_page["recommendations"]] == [expert.id]
+
+    # An expert assessment in CSS lifts the expert resource, scored for the skill that suits it best
+    SkillAssessment.objects.create(user=learner, skill=css, current_level="expert", confidence_score=90)
+    results = learner_client.post("/api/roadmaps/resources/recommendations/", {
+        "skill_ids": [html.id, css.id], "learning_style": "visual", "difficulty_level": "beginner",
+    }, format="json").data["recommendations"]
+    assert results[0]["id"] == expert.id
+    assert results[0]["skill_id"] == css.id
+    assert len(results) == 3
+
+    assert learner_client.post("/api/roadmaps/resources/recommendations/", {"skill_ids": ["x"]},
+                               format="json").status_code == 400
+
+
+@pytest.mark.django_db
+def test_resource_recommendations_match_full_scoring(learner, skill_tree):
+    from roadmaps.resource_ranking import get_resource_index, learner_adjustment, recommend_resources
+
+    html, js = skill_tree["html"], skill_tree["js"]
+    types, levels = ("video", "article", "project"), ("beginner", "intermediate", "advanced", "expert")
+    for i in range(24):
+        skills = [html, js] if i % 5 == 0 else [html] if i % 2 else [js]
+        _resource(f"r{i}", skills, resource_type=types[i % 3], level=levels[i % 4], rating=(i * 7 % 11) / 2)
+
+    # Without assessments every skill scores a resource the same, so a plain sort is the reference
+    expected = sorted(
+        ((r.base_score + learner_adjustment(r, "advanced", "hands_on"), r.id)
+         for r in get_resource_index().resources.values()),
+        key=lambda item: (-item[0], item[1]),
+    )
+    results, total = recommend_resources(learner, [html.id, js.id], "hands_on", "advanced", limit=5)
+    assert [r["id"] for r in results] == [resource_id for _, resource_id in expected[:5]]
+    assert total == 24
+
+    # Later pages continue the same order and the merge stops at the end of the window
+    results, total = recommend_resources(learner, [html.id, js.id], "hands_on", "advanced", limit=5, offset=20)
+    assert [r["id"] for r in results] == [resource_id for _, resource_id in expected[20:]]
+    assert recommend_resources(learner, [html.id, js.id], limit=5, offset=30) == ([], 24)
+
+
+@pytest.mark.django_db
+def test_recommended_sort_orders_catalog_by_base_score(learner_client, learner, skill_tree):
+    from roadmaps.models import LearningResource, UserProgress
+    from roadmaps.resource_ranking import get_resource_index
+
+    low = _resource("low", [skill_tree["html"]], rating=1.0)
+    high = _resource("high", [skill_tree["html"]], rating=5.0)
+    middle = _resource("middle", [skill_tree["html"]], rating=3.0)
+    _resource("unlisted", [skill_tree["html"]], rating=5.0)
+    LearningResource.objects.exclude(title="unlisted").update(is_recommended=True)
+    UserProgress.objects.create(user=learner, resource=middle, status="completed")
+
+    # Scored in SQL exactly as the index scores in Python, and only recommended resources are listed
+    response = learner_client.get("/api/roadmaps/resources/", {"sort": "recommended"})
+    expected = sorted((-get_resource_index().resources[r.id].base_score, r.id) for r in (low, high, middle))
+    assert [row["id"] for row in response.data["results"]] == [resource_id for _, resource_id in expected]
+    assert response.data["count"] == 3
+
+
+# ------------------
+# Resource Time Tracking
+# ------------------
+
+@pytest.mark.django_db
+def test_resource_progress_adds_time_in_the_database(learner_client, learner, skill_tree):
+    from roadmaps.models import DailyStudyTime, UserProgress
+
+    resource = _resource("guide", [skill_tree["html"]])
+    url = f"/api/roadmaps/resources/{resource.id}/progress/"
+    learner_client.post(url, {"status": "in_progress", "time_spent_minutes": 10}, format="json")
+
+    # Another tab's write lands between this request's read and its response
+    UserProgress.objects.filter(user=learner, resource=resource).update(time_spent_minutes=25)
+    response = learner_client.post(url, {"time_spent_minutes": 5, "review": "Clear"}, format="json")
+    assert response.data["time_spent_minutes"] == 30
+    assert response.data["status"] == "in_progress"
+    assert DailyStudyTime.objects.get(user=learner, resource=resource).minutes == 15
+
+
+@pytest.mark.django_db
+def test_resource_heartbeats_apply_in_bulk(learner_client, learner, skill_tree, django_assert_max_num_queries,
+                                           monkeypatch):
+    from django.utils import timezone
+    from roadmaps.models import DailyStudyTime, UserProgress
+
+    # Far enough past midnight that the daily cap does not trim these minutes
+    noon = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+    monkeypatch.setattr(timezone, "now", lambda: noon)
+
+    first = _resource("first", [skill_tree["html"]])
+    second = _resource("second", [skill_tree["css"]])
+    UserProgress.objects.create(user=learner, resource=first, status="completed", progress_percentage=100,
+                                time_spent_minutes=60)
+    heartbeats = [
+        {"resource_id": first.id, "time_spent_minutes": 5, "progress_percentage": 40},
+        {"resource_id": second.id, "time_spent_minutes": 3, "progress_percentage": 20},
+        {"resource_id": second.id, "time_spent_minutes": 2, "progress_percentage": 35},
+        {"resource_id": 999999, "time_spent_minutes": 1},
+    ]
+    response = learner_client.post("/api/roadmaps/resources/heartbeats/", {"heartbeats": heartbeats}, format="json")
+    assert response.status_code == 200
+    assert response.data == {"updated_resource_ids": [first.id, second.id], "skipped_resource_ids": [999999]}
+
+    rows = {row.resource_id: row for row in UserProgress.objects.filter(user=learner)}
+    assert (rows[first.id].status, rows[first.id].progress_percentage, rows[first.id].time_spent_minutes) == \
+        ("completed", 100, 65)
+    assert (rows[second.id].status, rows[second.id].progress_percentage, rows[second.id].time_spent_minutes) == \
+        ("in_progress", 35, 5)
+    assert dict(DailyStudyTime.objects.values_list("resource_id", "minutes")) == {first.id: 5, second.id: 5}
+
+    # The statement count does not grow with the batch
+    many = [_resource(f"extra{i}", [skill_tree["js"]]) for i in range(10)]
+    beats = [{"resource_id": resource.id, "time_spent_minutes": 1} for resource in many]
+    with django_assert_max_num_queries(13):
+        learner_client.post("/api/roadmaps/resources/heartbeats/", {"heartbeats": beats}, format="json")
+
+    analytics = learner_client.get("/api/roadmaps/analytics/").data["study_time"]
+    assert sum(analytics["by_day"].values()) == 20
+    assert analytics["total_minutes"] == 80
+
+    bad = learner_client.post("/api/roadmaps/resources/heartbeats/",
+                              {"heartbeats": [{"resource_id": first.id, "time_spent_minutes": -5}]}, format="json")
+    assert bad.status_code == 400
+
+
+@pytest.mark.django_db
+def test_heartbeat_minutes_are_bounded_by_the_wall_clock(learner, skill_tree):
+    from datetime import timedelta
+    from django.utils import timezone
+    from roadmaps.models import DailyStudyTime, UserProgress
+    from roadmaps.progress import add_study_time, apply_heartbeats
+
+    def logged(resource):
+        return dict(DailyStudyTime.objects.filter(user=learner, resource=resource).values_list("date", "minutes"))
+
+    def total(resource):
+        return UserProgress.objects.get(user=learner, resource=resource).time_spent_minutes
+
+    midnight = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    today, yesterday = midnight.date(), midnight.date() - timedelta(days=1)
+
+    # A 55 minute session reported at 00:05 started before midnight
+    session = _resource("session", [skill_tree["html"]])
+    apply_heartbeats(learner, [{"resource_id": session.id, "time_spent_minutes": 55}], midnight + timedelta(minutes=5))
+    assert logged(session) == {today: 5, yesterday: 50}
+    assert total(session) == 55
+
+    # An oversized batch fills both days and nothing more, in both tables
+    flood = _resource("flood", [skill_tree["html"]])
+    when = midnight + timedelta(minutes=30)
+    apply_heartbeats(learner, [{"resource_id": flood.id, "time_spent_minutes": 24 * 60}] * 200, when)
+    assert logged(flood) == {today: 30, yesterday: 24 * 60}
+    assert total(flood) == 30 + 24 * 60
+
+    # Later only the newly elapsed time fits
+    apply_heartbeats(learner, [{"resource_id": flood.id, "time_spent_minutes": 15}], when + timedelta(minutes=10))
+    assert logged(flood)[today] == 40
+    assert total(flood) == 40 + 24 * 60
+
+    # Time entered on the progress endpoint is added as reported
+    add_study_time(learner, {flood.id: 500}, when + timedelta(minutes=10))
+    assert logged(flood)[today] == 540
+    assert total(flood) == 540 + 24 * 60
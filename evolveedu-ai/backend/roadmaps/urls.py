@@ -13,6 +13,7 @@ urlpatterns = [
 
     # Career Paths
     path('career-paths/', views.CareerPathListView.as_view(), name='career_path_list'),
+    path('career-paths/ranked/', views.ranked_career_paths, name='ranked_career_paths'),
     path('career-paths/<int:pk>/', views.CareerPathDetailView.as_view(), name='career_path_detail'),
 
     # Personalized Roadmaps
@@ -29,6 +30,7 @@ urlpatterns = [
 
     # Analytics
     path('<int:roadmap_id>/analytics/', views.roadmap_analytics, name='roadmap_analytics'),
+    path('<int:roadmap_id>/forecast/', views.roadmap_forecast, name='roadmap_forecast'),
     path('analytics/', views.learning_analytics, name='learning_analytics'),
 
     # Skill Assessments
@@ -38,6 +40,7 @@ urlpatterns = [
     # Learning Resources
     path('resources/', views.LearningResourceListView.as_view(), name='learning_resources'),
     path('resources/recommendations/', views.get_resource_recommendations, name='resource_recommendations'),
+    path('resources/heartbeats/', views.resource_heartbeats, name='resource_heartbeats'),
     path('resources/<int:resource_id>/progress/', views.update_resource_progress, name='update_resource_progress'),
 
     # User Progress
@@ -0,0 +1,107 @@
+"""
+Versioned Process Caches
+Keeps an expensive derived object (a graph, a matrix) in process memory next to a
+version number held in the Django cache. Invalidating bumps the version, so every
+process sharing that cache rebuilds its copy on next use without any messaging.
+
+The version is only shared when the cache backend is (Redis via REDIS_URL). With
+the default local memory cache each process keeps its own version, so an edit only
+invalidates the process that made it; other processes then rebuild once their copy
+is LOCAL_MAX_AGE seconds old.
+"""
+
+import threading
+import time
+from typing import Callable, Sequence
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+LOCAL_MAX_AGE = 60  # Staleness bound for edits made in other processes when versions are per process
+
+
+def cache_is_shared() -> bool:
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def current_version(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        # Seeded from the clock so an evicted key never reissues a version a process already holds
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_version(key: str):
+    """
+    Move a version now, so this transaction sees its own edits, and again on commit,
+    so values other processes derived from pre-commit data are dropped
+    """
+    _bump(key)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(key))
+
+
+class VersionedCache:
+    """
+    Process-local value rebuilt when its shared version, or a dependency's, moves.
+    With max_age the value is also rebuilt once it is that many seconds old, for
+    inputs that change too often to invalidate on every write.
+    """
+
+    def __init__(self, key: str, builder: Callable, depends_on: Sequence['VersionedCache'] = (),
+                 max_age: float = None):
+        self.key = key
+        self.builder = builder
+        self.depends_on = tuple(depends_on)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+        self._built_at = 0.0
+
+    def own_version(self) -> int:
+        return current_version(self.key)
+
+    def version(self):
+        if not self.depends_on:
+            return self.own_version()
+        return (self.own_version(),) + tuple(dependency.version() for dependency in self.depends_on)
+
+    def invalidate(self):
+        """Bump the version (see bump_version) and drop this process's copy"""
+        bump_version(self.key)
+        self._value = None
+
+    def _max_age(self):
+        if cache_is_shared():
+            return self.max_age
+        return LOCAL_MAX_AGE if self.max_age is None else min(self.max_age, LOCAL_MAX_AGE)
+
+    def _fresh(self, version) -> bool:
+        if self._value is None or self._version != version:
+            return False
+        max_age = self._max_age()
+        return max_age is None or time.monotonic() - self._built_at < max_age
+
+    def get(self):
+        version = self.version()
+        value = self._value
+        if self._fresh(version):
+            return value
+        with self._lock:
+            if not self._fresh(version):
+                self._value = self.builder()
+                self._version = version
+                self._built_at = time.monotonic()
+            return self._value
@@ -1,10 +1,19 @@
 # roadmaps/views.py
+import hashlib
+import time
+
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Avg, Count
+from django.db import transaction
+from django.db.models import Q, Avg, Sum
+from django.core.cache import cache
+from django.http import Http404
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
+from accounts.activity import activity_summary, record_activity
 from .models import (
     SkillCategory, Skill, CareerPath, PersonalizedRoadmap,
     RoadmapMilestone, SkillAssessment, LearningResource, UserProgress
@@ -15,23 +24,103 @@ from .serializers import (
     PersonalizedRoadmapListSerializer, PersonalizedRoadmapCreateSerializer,
     RoadmapMilestoneSerializer, SkillAssessmentSerializer, SkillAssessmentCreateSerializer,
     LearningResourceSerializer, UserProgressSerializer, GenerateRoadmapRequestSerializer,
-    SkillGapAnalysisSerializer
+    SkillGapAnalysisSerializer, ResourceHeartbeatBatchSerializer
 )
-# from .ai_service import RoadmapAIService
-
-
-class SkillCategoryListView(generics.ListCreateAPIView):
-    queryset = SkillCategory.objects.all()
+from .ai_service import RoadmapAIService
+from .analytics import roadmap_dashboard
+from .catalog import catalog_etag, catalog_version, get_catalog, page_cache_seconds
+from .forecasting import forecast_roadmap
+from .gap_engine import SORT_KEYS, rank_career_paths, user_skill_levels
+from .progress import add_study_time, apply_heartbeats, daily_study_minutes, progress_version
+from .resource_ranking import REFRESH_SECONDS, base_score_expression
+
+
+class _CachedPage:
+    """Stands in for the queryset of a cached page: the paginator only takes its length and that page's slice"""
+
+    def __init__(self, count, offset, ids):
+        self.count_value, self.offset, self.ids = count, offset, ids
+
+    def __len__(self):
+        return self.count_value
+
+    def __getitem__(self, index):
+        return self.ids[index.start - self.offset:index.stop - self.offset]
+
+
+class CatalogListMixin:
+    """
+    Lists catalog rows for the ids selected by get_queryset() and the filter backends
+    (?ordering= over ordering_fields), in that order. The database filters, sorts and
+    pages ids; each page of ids is cached under the catalog version and the query
+    parameters, and row data comes from the catalog.
+    """
+    catalog_rows = None
+
+    def rows_for(self, ids):
+        rows = getattr(get_catalog(), self.catalog_rows)
+        return [rows[row_id] for row_id in ids if row_id in rows]
+
+    def page_cache_scope(self, request) -> str:
+        """Extra cache key part for orders that change without a catalog edit"""
+        return ''
+
+    def _page_cache_key(self, request) -> str:
+        params = hashlib.sha1(repr(sorted(request.query_params.lists())).encode()).hexdigest()
+        return (f'roadmaps:catalog_page:{type(self).__name__}:{catalog_version()}:'
+                f'{self.page_cache_scope(request)}:{params}')
+
+    def list(self, request, *args, **kwargs):
+        key = self._page_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            if page is None:
+                cached = (None, 0, list(queryset))
+            else:
+                paginator = self.paginator.page.paginator
+                cached = (paginator.count, (self.paginator.page.number - 1) * paginator.per_page, list(page))
+            cache.set(key, cached, page_cache_seconds())
+        elif cached[0] is not None:
+            self.paginate_queryset(_CachedPage(*cached))
+
+        count, _, ids = cached
+        if count is None:
+            return Response(self.rows_for(ids))
+        return self.get_paginated_response(self.rows_for(ids))
+
+
+class CatalogDetailMixin:
+    catalog_rows = None
+
+    def retrieve(self, request, *args, **kwargs):
+        row = getattr(get_catalog(), self.catalog_rows).get(kwargs['pk'])
+        if row is None:
+            raise Http404
+        return Response(row)
+
+
+@method_decorator(etag(catalog_etag), name='get')
+class SkillCategoryListView(CatalogListMixin, generics.ListCreateAPIView):
     serializer_class = SkillCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    catalog_rows = 'categories'
+    ordering_fields = ['name']
+
+    def get_queryset(self):
+        return SkillCategory.objects.order_by('name').values_list('id', flat=True)
 
 
-class SkillListView(generics.ListAPIView):
+@method_decorator(etag(catalog_etag), name='get')
+class SkillListView(CatalogListMixin, generics.ListAPIView):
     serializer_class = SkillListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    catalog_rows = 'skill_rows'
+    ordering_fields = ['name', 'estimated_hours', 'market_demand']
 
     def get_queryset(self):
-        queryset = Skill.objects.all().select_related('category')
+        queryset = Skill.objects.all()
 
         # Filter by category
         category = self.request.query_params.get('category')
@@ -60,26 +149,30 @@ class SkillListView(generics.ListAPIView):
         if sort_by == 'demand':
             queryset = queryset.order_by('-market_demand', 'name')
         elif sort_by == 'difficulty':
-            difficulty_order = ['beginner', 'intermediate', 'advanced', 'expert']
-            queryset = sorted(queryset, key=lambda x: difficulty_order.index(x.difficulty_level))
+            queryset = queryset.annotate(difficulty_rank=Skill.difficulty_rank()).order_by('difficulty_rank', 'name')
         else:
             queryset = queryset.order_by('name')
 
-        return queryset
+        return queryset.values_list('id', flat=True)
 
 
-class SkillDetailView(generics.RetrieveAPIView):
+@method_decorator(etag(catalog_etag), name='get')
+class SkillDetailView(CatalogDetailMixin, generics.RetrieveAPIView):
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
     permission_classes = [permissions.IsAuthenticated]
+    catalog_rows = 'skills'
 
 
-class CareerPathListView(generics.ListAPIView):
+@method_decorator(etag(catalog_etag), name='get')
+class CareerPathListView(CatalogListMixin, generics.ListAPIView):
     serializer_class = CareerPathListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    catalog_rows = 'career_path_rows'
+    ordering_fields = ['title', 'average_salary_min', 'average_salary_max', 'job_growth_rate']
 
     def get_queryset(self):
-        queryset = CareerPath.objects.all().select_related('category')
+        queryset = CareerPath.objects.all()
 
         # Filter by category
         category = self.request.query_params.get('category')
@@ -114,13 +207,33 @@ class CareerPathListView(generics.ListAPIView):
         else:
             queryset = queryset.order_by('title')
 
-        return queryset
+        return queryset.values_list('id', flat=True)
 
 
-class CareerPathDetailView(generics.RetrieveAPIView):
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def ranked_career_paths(request):
+    sort = request.query_params.get('sort', 'readiness')
+    if sort not in SORT_KEYS:
+        return Response({'error': f"sort must be one of: {', '.join(SORT_KEYS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(100, max(1, int(request.query_params.get('limit', 10))))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'sort': sort,
+        'results': rank_career_paths(user_skill_levels(request.user), sort=sort, limit=limit)
+    })
+
+
+@method_decorator(etag(catalog_etag), name='get')
+class CareerPathDetailView(CatalogDetailMixin, generics.RetrieveAPIView):
     queryset = CareerPath.objects.all()
     serializer_class = CareerPathSerializer
     permission_classes = [permissions.IsAuthenticated]
+    catalog_rows = 'career_paths'
 
 
 class PersonalizedRoadmapListView(generics.ListCreateAPIView):
@@ -167,6 +280,7 @@ def generate_ai_roadmap(request):
             target_months = serializer.validated_data['target_months']
             learning_style = serializer.validated_data['preferred_learning_style']
             focus_areas = serializer.validated_data.get('focus_areas', [])
+            ai_summary = serializer.validated_data['ai_summary']
 
             roadmap = RoadmapAIService.generate_personalized_roadmap(
                 user=request.user,
@@ -176,7 +290,8 @@ def generate_ai_roadmap(request):
                 time_commitment=time_commitment,
                 target_months=target_months,
                 learning_style=learning_style,
-                focus_areas=focus_areas
+                focus_areas=focus_areas,
+                ai_summary=ai_summary
             )
 
             return Response(
@@ -221,8 +336,8 @@ def update_milestone_progress(request, roadmap_id, milestone_id):
 
     # Update milestone progress
     new_status = request.data.get('status')
-    progress_percentage = request.data.get('progress_percentage', 0)
-    hours_spent = request.data.get('hours_spent', 0)
+    progress_percentage = request.data.get('progress_percentage')
+    hours_spent = request.data.get('hours_spent')
 
     if new_status:
         milestone.status = new_status
@@ -239,7 +354,8 @@ def update_milestone_progress(request, roadmap_id, milestone_id):
     if hours_spent is not None:
         milestone.actual_hours_spent = int(hours_spent)
 
-    milestone.save()
+    milestone.save()  # Drops the cached analytics and forecast state (see signals)
+    record_activity(request.user, 'roadmap')
 
     # Update overall roadmap progress
     progress_update = RoadmapAIService.update_roadmap_progress(roadmap)
@@ -254,54 +370,14 @@ def update_milestone_progress(request, roadmap_id, milestone_id):
 @permission_classes([permissions.IsAuthenticated])
 def roadmap_analytics(request, roadmap_id):
     roadmap = get_object_or_404(PersonalizedRoadmap, id=roadmap_id, user=request.user)
+    return Response(roadmap_dashboard(roadmap))
 
-    milestones = roadmap.milestones.all()
-    total_milestones = milestones.count()
-    completed_milestones = milestones.filter(status='completed').count()
-    in_progress_milestones = milestones.filter(status='in_progress').count()
-
-    # Calculate time metrics
-    total_estimated_hours = sum(m.estimated_hours for m in milestones)
-    total_actual_hours = sum(m.actual_hours_spent for m in milestones)
-
-    # Calculate completion rate
-    completion_rate = (completed_milestones / total_milestones * 100) if total_milestones > 0 else 0
 
-    # Time analysis
-    days_since_start = (timezone.now().date() - roadmap.start_date).days
-    days_remaining = max(0, (roadmap.target_completion_date - timezone.now().date()).days)
-
-    # Progress by skill category
-    skill_progress = {}
-    for milestone in milestones:
-        category = milestone.skill.category.name
-        if category not in skill_progress:
-            skill_progress[category] = {'completed': 0, 'total': 0}
-        skill_progress[category]['total'] += 1
-        if milestone.status == 'completed':
-            skill_progress[category]['completed'] += 1
-
-    return Response({
-        'roadmap_id': roadmap.id,
-        'title': roadmap.title,
-        'overall_progress': roadmap.overall_progress_percentage,
-        'completion_rate': round(completion_rate, 1),
-        'milestones': {
-            'total': total_milestones,
-            'completed': completed_milestones,
-            'in_progress': in_progress_milestones,
-            'not_started': total_milestones - completed_milestones - in_progress_milestones
-        },
-        'time_tracking': {
-            'estimated_hours': total_estimated_hours,
-            'actual_hours': total_actual_hours,
-            'days_since_start': days_since_start,
-            'days_remaining': days_remaining,
-            'efficiency_ratio': round(total_actual_hours / total_estimated_hours, 2) if total_estimated_hours > 0 else 0
-        },
-        'skill_categories_progress': skill_progress,
-        'status': roadmap.status
-    })
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def roadmap_forecast(request, roadmap_id):
+    roadmap = get_object_or_404(PersonalizedRoadmap, id=roadmap_id, user=request.user)
+    return Response(forecast_roadmap(roadmap))
 
 
 class SkillAssessmentListView(generics.ListCreateAPIView):
@@ -328,12 +404,39 @@ class SkillAssessmentDetailView(generics.RetrieveUpdateDestroyAPIView):
         return SkillAssessment.objects.filter(user=self.request.user)
 
 
-class LearningResourceListView(generics.ListAPIView):
+def _resource_etag(request, *args, **kwargs):
+    # Rows carry the user's own progress, so its version is part of the tag
+    tag = f"{catalog_etag(request)}-{request.user.id}-{progress_version(request.user.id)}"
+    if request.query_params.get('sort') == 'recommended':
+        # Recommended order follows other learners' completion rates, which the tag cannot see
+        tag += f"-{int(time.time() // REFRESH_SECONDS)}"
+    return tag
+
+
+@method_decorator(etag(_resource_etag), name='get')
+class LearningResourceListView(CatalogListMixin, generics.ListAPIView):
     serializer_class = LearningResourceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    catalog_rows = 'resources'
+    ordering_fields = ['title', 'rating', 'created_at']
+
+    def page_cache_scope(self, request) -> str:
+        if request.query_params.get('sort') == 'recommended':
+            return str(int(time.time() // REFRESH_SECONDS))
+        return ''
+
+    def rows_for(self, ids):
+        rows = super().rows_for(ids)
+        progress = {
+            resource_id: {'status': progress_status, 'progress_percentage': percentage, 'time_spent_minutes': minutes}
+            for resource_id, progress_status, percentage, minutes in UserProgress.objects.filter(
+                user=self.request.user, resource_id__in=[row['id'] for row in rows]
+            ).values_list('resource_id', 'status', 'progress_percentage', 'time_spent_minutes')
+        }
+        return [dict(row, user_progress=progress.get(row['id'])) for row in rows]
 
     def get_queryset(self):
-        queryset = LearningResource.objects.all().prefetch_related('skills')
+        queryset = LearningResource.objects.all()
 
         # Filter by resource type
         resource_type = self.request.query_params.get('type')
@@ -368,19 +471,28 @@ class LearningResourceListView(generics.ListAPIView):
         if sort_by == 'rating':
             queryset = queryset.order_by('-rating', 'title')
         elif sort_by == 'recommended':
-            queryset = queryset.filter(is_recommended=True).order_by('-content_quality_score')
+            queryset = (queryset.filter(is_recommended=True)
+                        .annotate(base_score=base_score_expression()).order_by('-base_score', 'id'))
         else:
             queryset = queryset.order_by('title')
 
-        return queryset
+        return queryset.values_list('id', flat=True)
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def get_resource_recommendations(request):
-    skill_ids = request.data.get('skill_ids', [])
+    try:
+        skill_ids = [int(skill_id) for skill_id in request.data.get('skill_ids', [])]
+    except (TypeError, ValueError):
+        return Response({'error': 'skill_ids must be a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
     learning_style = request.data.get('learning_style', 'mixed')
     difficulty_level = request.data.get('difficulty_level', 'intermediate')
+    try:
+        limit = min(50, max(1, int(request.data.get('limit', 10))))
+        offset = max(0, int(request.data.get('offset', 0)))
+    except (TypeError, ValueError):
+        return Response({'error': 'limit and offset must be integers'}, status=status.HTTP_400_BAD_REQUEST)
 
     if not skill_ids:
         return Response({'error': 'skill_ids are required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -390,7 +502,9 @@ def get_resource_recommendations(request):
             user=request.user,
             skill_ids=skill_ids,
             learning_style=learning_style,
-            difficulty_level=difficulty_level
+            difficulty_level=difficulty_level,
+            limit=limit,
+            offset=offset
         )
 
         return Response(recommendations)
@@ -440,31 +554,60 @@ def update_resource_progress(request, resource_id):
     rating = request.data.get('rating')
     review = request.data.get('review')
 
+    fields = []
     if new_status:
         progress.status = new_status
+        fields.append('status')
         if new_status == 'in_progress' and not progress.started_at:
             progress.started_at = timezone.now()
+            fields.append('started_at')
         elif new_status == 'completed':
             progress.completed_at = timezone.now()
             progress.progress_percentage = 100
+            fields += ['completed_at', 'progress_percentage']
 
     if progress_percentage is not None:
         progress.progress_percentage = min(100, max(0, int(progress_percentage)))
-
-    if time_spent is not None:
-        progress.time_spent_minutes += int(time_spent)
+        fields.append('progress_percentage')
 
     if rating is not None:
         progress.rating = int(rating)
+        fields.append('rating')
 
     if review:
         progress.review = review
+        fields.append('review')
 
-    progress.save()
+    with transaction.atomic():
+        progress.save(update_fields=sorted(set(fields)) + ['last_accessed'])
+
+        # Added in the database so concurrent heartbeats are not lost
+        if time_spent is not None:
+            add_study_time(request.user, {resource.id: int(time_spent)})
+            progress.refresh_from_db(fields=['time_spent_minutes', 'last_accessed'])
+        record_activity(request.user, 'resource')
 
     return Response(UserProgressSerializer(progress).data)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def resource_heartbeats(request):
+    serializer = ResourceHeartbeatBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    heartbeats = serializer.validated_data['heartbeats']
+    updated = apply_heartbeats(request.user, heartbeats)
+    if updated:
+        record_activity(request.user, 'resource')
+
+    return Response({
+        'updated_resource_ids': updated,
+        'skipped_resource_ids': sorted({beat['resource_id'] for beat in heartbeats} - set(updated)),
+    })
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def learning_analytics(request):
@@ -483,7 +626,7 @@ def learning_analytics(request):
     in_progress_resources = user_progress.filter(status='in_progress').count()
 
     total_study_time = user_progress.aggregate(
-        total_time=models.Sum('time_spent_minutes')
+        total_time=Sum('time_spent_minutes')
     )['total_time'] or 0
 
     # Skill assessments
@@ -498,15 +641,10 @@ def learning_analytics(request):
     thirty_days_ago = timezone.now() - timedelta(days=30)
     recent_progress = user_progress.filter(last_accessed__gte=thirty_days_ago).count()
 
-    # Learning streak
-    streak_days = 0
-    current_date = timezone.now().date()
-    for i in range(30):  # Check last 30 days
-        check_date = current_date - timedelta(days=i)
-        if user_progress.filter(last_accessed__date=check_date).exists():
-            streak_days += 1
-        else:
-            break
+    # Learning streak, daily activity and daily study minutes
+    activity = activity_summary(user, days=30)
+    minutes_by_day = daily_study_minutes(user, days=30)
+    recent_study_time = sum(minutes_by_day.values())
 
     return Response({
         'roadmaps': {
@@ -524,11 +662,14 @@ def learning_analytics(request):
         'study_time': {
             'total_minutes': total_study_time,
             'total_hours': round(total_study_time / 60, 1),
-            'average_per_day': round(total_study_time / 30, 1) if total_study_time > 0 else 0
+            'average_per_day': round(recent_study_time / 30, 1),
+            'by_day': minutes_by_day
         },
         'skill_distribution': skill_levels,
         'activity': {
             'recent_activity_count': recent_progress,
-            'streak_days': streak_days
+            'streak_days': activity['streak_days'],
+            'active_days': activity['active_days'],
+            'heatmap': activity['heatmap']
         }
     })
\ No newline at end of file